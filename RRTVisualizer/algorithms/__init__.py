@@ -7,6 +7,9 @@ from .base_rrt import BaseRRT
 from .rrt_star import RRTStar
 from .rrt_connect import RRTConnect
 from .informed_rrt import InformedRRT
+from .rrt_star_connect import RRTStarConnect
+from .bit_star import BITStar
+from .fmt_star import FMTStar
 
 # 导出所有实现的算法
-__all__ = ['BaseRRT', 'RRTStar', 'RRTConnect', 'InformedRRT']
\ No newline at end of file
+__all__ = ['BaseRRT', 'RRTStar', 'RRTConnect', 'InformedRRT', 'RRTStarConnect', 'BITStar', 'FMTStar']
\ No newline at end of file
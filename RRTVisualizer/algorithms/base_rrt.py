@@ -4,13 +4,27 @@
 
 import numpy as np
 import time
+from collections import deque
 from environment.space import ConfigurationSpace
+from .nearest_neighbors import create_nn_index
+from .tree import Tree
+
+
+# 规划停止的原因：达到最大迭代次数、找到路径（不继续优化的算法）、用完时间预算、解代价收敛
+STOP_REASONS = ('max_iter', 'goal_reached', 'time_budget', 'converged')
+
+# 收敛判定的默认相对改进阈值
+DEFAULT_CONVERGENCE_TOLERANCE = 1e-3
 
 
 class BaseRRT:
     """基础RRT算法实现类"""
 
-    def __init__(self, start, goal, config_space, step_size=0.5, goal_sample_rate=0.05, max_iter=1000):
+    # 树是否维护子节点邻接表（需要更新子树代价的算法开启）
+    track_children = False
+
+    def __init__(self, start, goal, config_space, step_size=0.5, goal_sample_rate=0.05, max_iter=1000,
+                 nn_index='kdtree'):
         """
         初始化RRT规划器
 
@@ -21,6 +35,7 @@ class BaseRRT:
             step_size: 扩展步长
             goal_sample_rate: 采样目标点的概率
             max_iter: 最大迭代次数
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
         """
         # 确保起点和终点是NumPy数组
         self.start = np.array(start) if not isinstance(start, np.ndarray) else start
@@ -29,11 +44,10 @@ class BaseRRT:
         self.step_size = step_size
         self.goal_sample_rate = goal_sample_rate
         self.max_iter = max_iter
+        self.nn_index = nn_index
 
-        # 树的节点和边
-        self.vertices = [self.start]  # 节点列表
-        self.edges = []  # 边列表 [(parent_idx, child_idx), ...]
-        self.parents = {0: None}  # 父节点索引字典
+        # 树的节点坐标、父节点和代价，边由父节点按需导出
+        self.tree = self.create_tree(self.start)
 
         # 记录规划过程的数据，用于可视化和分析
         self.planning_time = 0
@@ -43,17 +57,115 @@ class BaseRRT:
         self.success = False
         self.expansion_history = []  # 记录每次扩展的节点，用于可视化
 
+        # 停止条件：时间预算（秒）和收敛判定，None表示不使用
+        self.set_stop_criteria()
+        self.stop_reason = None
+        self._stop_start_time = None
+        self._cost_history = None
+
     def reset(self):
         """重置规划器状态"""
-        self.vertices = [self.start]
-        self.edges = []
-        self.parents = {0: None}
+        self.tree = self.create_tree(self.start)
         self.planning_time = 0
         self.iterations = 0
         self.path = []
         self.path_length = 0
         self.success = False
         self.expansion_history = []
+        self.stop_reason = None
+
+    def set_stop_criteria(self, time_budget=None, convergence_window=None,
+                          convergence_tolerance=DEFAULT_CONVERGENCE_TOLERANCE):
+        """
+        设置max_iter之外的停止条件
+
+        参数:
+            time_budget: 规划的时间预算（秒），None表示不限制
+            convergence_window: 收敛判定的迭代窗口，None表示不做收敛判定
+            convergence_tolerance: 窗口内解代价的相对改进低于该值时视为收敛
+        """
+        if time_budget is not None and not time_budget > 0:
+            raise ValueError("time budget must be positive")
+        if convergence_window is not None and (not isinstance(convergence_window, int) or convergence_window < 1):
+            raise ValueError("convergence window must be a positive integer")
+        if not convergence_tolerance >= 0:
+            raise ValueError("convergence tolerance must be non-negative")
+
+        self.time_budget = time_budget
+        self.convergence_window = convergence_window
+        self.convergence_tolerance = convergence_tolerance
+
+    def start_stop_criteria(self, start_time):
+        """
+        规划开始时初始化停止条件的状态
+
+        参数:
+            start_time: 规划开始时间
+        """
+        self._stop_start_time = start_time
+        # 保存最近 window + 1 次迭代的解代价，首尾比较即为窗口内的改进量
+        self._cost_history = deque(maxlen=self.convergence_window + 1) if self.convergence_window else None
+        self.stop_reason = 'max_iter'
+
+    def time_budget_exceeded(self):
+        """
+        检查时间预算是否用完，用完时记录停止原因
+        一次迭代内部工作量较大的算法可以在迭代中途单独检查，不影响收敛判定的迭代窗口
+
+        返回:
+            bool: 是否超出时间预算
+        """
+        if self.time_budget is not None and time.time() - self._stop_start_time >= self.time_budget:
+            self.stop_reason = 'time_budget'
+            return True
+        return False
+
+    def should_stop(self, cost=float('inf')):
+        """
+        在每次迭代开始前检查是否应当停止，并记录停止原因
+
+        参数:
+            cost: 当前最优解代价，尚未找到解时为无穷大
+
+        返回:
+            bool: 是否停止
+        """
+        if self.time_budget_exceeded():
+            return True
+
+        history = self._cost_history
+        if history is not None:
+            history.append(cost)
+            if len(history) == history.maxlen and np.isfinite(history[0]):
+                # 窗口内的相对改进低于阈值时视为收敛
+                if history[0] - cost <= self.convergence_tolerance * history[0]:
+                    self.stop_reason = 'converged'
+                    return True
+        return False
+
+    @property
+    def vertices(self):
+        """树中所有节点的坐标 (N, 2)"""
+        return self.tree.points
+
+    @property
+    def edges(self):
+        """树的所有边 (E, 2)，每行为 (parent_idx, child_idx)，由父节点数组按需导出"""
+        return self.tree.edges()
+
+    def create_tree(self, root):
+        """
+        创建以root为根的树，并挂载最近邻索引
+
+        参数:
+            root: 根节点坐标
+
+        返回:
+            tree: Tree对象
+        """
+        tree = Tree(root, track_children=self.track_children)
+        tree.attach_index('nn', create_nn_index(self.nn_index))
+        return tree
 
     def random_sample(self):
         """
@@ -76,10 +188,21 @@ class BaseRRT:
         返回:
             nearest_idx: 最近节点的索引
         """
-        # 计算所有节点到给定点的距离
-        distances = [np.linalg.norm(np.array(v) - point) for v in self.vertices]
-        # 返回最小距离对应的索引
-        return np.argmin(distances)
+        return self.tree.indexes['nn'].nearest(point)
+
+    def add_vertex(self, point, parent=None, cost=0.0):
+        """
+        将新节点加入树中，同时更新挂载在树上的空间索引
+
+        参数:
+            point: 新节点坐标
+            parent: 父节点索引
+            cost: 从起点到新节点的代价
+
+        返回:
+            new_idx: 新节点的索引
+        """
+        return self.tree.add(point, parent, cost)
 
     def steer(self, from_node, to_point):
         """
@@ -131,18 +254,21 @@ class BaseRRT:
         distance = np.linalg.norm(point - self.goal)
         return distance < self.step_size / 2  # 降低阈值，使连接更紧密
 
-    def extract_path(self, goal_idx):
+    def extract_path(self, goal_idx, return_indices=False):
         """
         从树中提取路径
         增强版本：增加了额外的验证和错误处理
 
         参数:
             goal_idx: 目标点在树中的索引
+            return_indices: 是否同时返回路径上节点的索引
 
         返回:
             path: 路径点列表 [[x1, y1], [x2, y2], ...]
+            indices: 从起点到目标点的节点索引列表（仅当return_indices为True时返回，
+                     不包含修复时补在开头的起点）
         """
-        path = []
+        indices = []
         current = goal_idx
 
         # 从目标点沿父节点回溯到起点，添加安全检查防止无限循环
@@ -165,15 +291,15 @@ class BaseRRT:
                 print(f"警告：无效的节点索引 {current}")
                 break
 
-            path.append(self.vertices[current])
-            current = self.parents.get(current, None)
+            indices.append(current)
+            current = self.tree.parent_of(current)
 
         # 如果深度达到最大值但还没结束，可能存在循环
         if depth >= max_depth:
             print(f"警告：提取路径时达到最大深度 {max_depth}，可能存在循环")
 
-        # 路径是从目标点到起点的，需要反转
-        path = path[::-1]
+        # 路径是从目标点到起点的，需要反转；一次性按索引取出所有路径点
+        path = list(self.vertices[indices[::-1]])
 
         # 验证路径起点是否与算法起点一致
         if len(path) > 0:
@@ -192,6 +318,8 @@ class BaseRRT:
             if goal_distance > self.step_size:
                 print(f"警告：提取的路径终点 {path[-1]} 与算法终点 {self.goal.tolist()} 不匹配，距离为 {goal_distance}")
 
+        if return_indices:
+            return path, indices[::-1]
         return path
 
     def calculate_path_length(self, path):
@@ -204,10 +332,10 @@ class BaseRRT:
         返回:
             length: 路径长度
         """
-        length = 0
-        for i in range(len(path) - 1):
-            length += np.linalg.norm(path[i + 1] - path[i])
-        return length
+        if len(path) < 2:
+            return 0
+        segments = np.diff(np.asarray(path, dtype=float), axis=0)
+        return float(np.sqrt(np.einsum('ij,ij->i', segments, segments)).sum())
 
     def plan(self):
         """
@@ -225,8 +353,11 @@ class BaseRRT:
 
         # 记录开始时间
         start_time = time.time()
+        self.start_stop_criteria(start_time)
 
         for i in range(self.max_iter):
+            if self.should_stop():
+                break
             self.iterations = i + 1
 
             # 1. 随机采样一个点
@@ -244,10 +375,8 @@ class BaseRRT:
                 continue
 
             # 5. 将新节点添加到树中
-            self.vertices.append(new_point)
-            new_idx = len(self.vertices) - 1
-            self.edges.append((nearest_idx, new_idx))
-            self.parents[new_idx] = nearest_idx
+            cost = self.tree.costs[nearest_idx] + np.linalg.norm(new_point - nearest_point)
+            new_idx = self.add_vertex(new_point, nearest_idx, cost)
 
             # 记录扩展历史，用于可视化
             self.expansion_history.append((nearest_idx, new_idx))
@@ -258,6 +387,7 @@ class BaseRRT:
                 self.path = self.extract_path(new_idx)
                 self.path_length = self.calculate_path_length(self.path)
                 self.success = True
+                self.stop_reason = 'goal_reached'
                 break
 
         # 记录规划耗时
@@ -290,5 +420,7 @@ class BaseRRT:
             "path_length": self.path_length,
             "planning_time": self.planning_time,
             "iterations": self.iterations,
-            "nodes": len(self.vertices)
+            "stop_reason": self.stop_reason,
+            "nodes": len(self.vertices),
+            "nn_index": self.nn_index
         }
\ No newline at end of file
@@ -0,0 +1,511 @@
+"""
+BIT* (Batch Informed Trees) 算法实现
+
+BIT*每次采样一批状态，把树的顶点和未连接的样本看作一个隐式的随机几何图，
+按启发式代价 g_T(v) + ĉ(v, x) + ĥ(x) 从小到大处理边队列：只有可能改进当前解的边才做碰撞检测，
+检测通过后把样本连接到树上或重布线已有的顶点。一批的边处理完后剪枝并采样下一批。
+
+每次扩展一个顶点时，它到近邻样本和顶点的距离、边的启发式代价及筛选都以NumPy数组运算批量完成；
+样本的启发式代价在每批开始时一次性计算。找到解后在Informed RRT*的椭圆内采样，
+近邻半径同样按椭圆面积收缩，剪枝使用同一个代价上界。
+"""
+
+import heapq
+import math
+import numpy as np
+import time
+from .informed_rrt import InformedRRT, PRUNE_TOLERANCE
+from .nearest_neighbors import create_near_index
+from .rrt_star import DEFAULT_EDGE_BUDGET
+
+
+# 每批采样的状态数
+DEFAULT_BATCH_SIZE = 100
+
+# 凑满一批无碰撞样本的最大采样轮数
+MAX_BATCH_SAMPLE_ROUNDS = 10
+
+# 批量计算顶点到样本距离时，每块距离矩阵的最大元素数
+PAIRWISE_BLOCK_SIZE = 500000
+
+
+def _pairwise_distances(points, others):
+    """两组点之间的距离矩阵 (M, N)"""
+    diff = points[:, None, :] - others[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+
+
+def _k_smallest(distances, k):
+    """距离矩阵每行最小的k个元素的列索引 (M, min(k, N))，不保证有序"""
+    if distances.shape[1] > k:
+        return np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+
+
+class BITStar(InformedRRT):
+    """BIT*算法实现类"""
+
+    # 边在出队时才做碰撞检测，本身就是懒惰的，不区分碰撞检测模式
+    collision_modes = ('eager',)
+
+    def __init__(self, start, goal, config_space, step_size=0.5, max_iter=1000, search_radius=1.0,
+                 nn_index='kdtree', near_index='grid', neighborhood='radius', simplify_level='neighbors',
+                 edge_budget=DEFAULT_EDGE_BUDGET, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        初始化BIT*规划器
+
+        参数:
+            start: 起始点坐标 [x, y]
+            goal: 目标点坐标 [x, y]
+            config_space: 配置空间对象
+            step_size: 近邻半径的下限
+            max_iter: 最大采样状态数，按批消耗
+            search_radius: 近邻半径（fixed模式）或近邻半径的上限（radius模式）
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
+            near_index: 近邻半径查询索引类型 ('grid' 或 'brute_force')
+            neighborhood: 近邻范围 ('fixed'、'radius' 或 'knearest')
+            simplify_level: 找到路径后可视化保留的边 ('path'、'neighbors' 或 'budget')
+            edge_budget: budget模式下保留的边数
+            batch_size: 每批采样的状态数
+        """
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            raise ValueError("batch size must be a positive integer")
+
+        super().__init__(start, goal, config_space, step_size=step_size, goal_sample_rate=0.0,
+                         max_iter=max_iter, search_radius=search_radius, nn_index=nn_index,
+                         near_index=near_index, neighborhood=neighborhood, simplify_level=simplify_level,
+                         edge_budget=edge_budget)
+        self.batch_size = batch_size
+        self.reset_batches()
+
+    def reset(self):
+        """重置规划器状态"""
+        super().reset()
+        self.reset_batches()
+
+    def reset_batches(self):
+        """清空样本和队列，终点作为第一批的样本之一"""
+        # 未连接到树上的样本，连接后标记为失效，并记录对应的顶点索引
+        self.samples = self.goal.reshape(1, 2).astype(float)
+        self.sample_alive = np.ones(1, dtype=bool)
+        self.sample_vertex = np.full(1, -1, dtype=np.int64)
+        self.sample_g_hat = np.linalg.norm(self.samples - self.start, axis=1)
+        self.sample_h_hat = np.linalg.norm(self.samples - self.goal, axis=1)
+        self.sample_index = None
+
+        # 顶点队列 [(g_T(v) + ĥ(v), v)] 和边队列 [(g_T(v) + ĉ(v, x) + ĥ(x), v, x)]
+        # 边的终点x为非负数时是顶点索引，为负数时表示样本 -(x + 1)
+        self.vertex_queue = []
+        self.edge_queue = []
+        self.expanded = set()
+
+        # 本批开始时的顶点数，索引不小于它的顶点是本批新加入的
+        self.batch_start_size = 0
+        self.radius = self.search_radius
+        self.k = None
+
+        # 本批开始时已有顶点的近邻样本，按顶点分段存放：顶点v的近邻为 ids[offsets[v]:offsets[v + 1]]
+        self.near_offsets = np.zeros(1, dtype=np.int64)
+        self.near_sample_ids = np.empty(0, dtype=np.int64)
+        self.near_sample_distances = np.empty(0)
+        # k近邻模式下本批开始时已有顶点的第k近邻距离（样本和顶点合在一起），扩展时按它筛选样本
+        self.near_thresholds = np.empty(0)
+
+        # 检测过有碰撞的边，以端点坐标为键；顶点和样本的编号每批都会变化，坐标不变
+        self.blocked_edges = set()
+
+        # 统计数据
+        self.batches = 0
+        self.edges_processed = 0
+
+    def sample_batch(self, count):
+        """
+        采样一批无碰撞的状态：找到解之前在整个空间内均匀采样，之后在椭圆内采样
+
+        参数:
+            count: 样本数
+
+        返回:
+            samples: 样本数组 (K, 2)，K <= count
+        """
+        if self.ellipse_transform is None:
+            return self.config_space.sample_free_batch(count, MAX_BATCH_SAMPLE_ROUNDS)
+
+        collected = []
+        total = 0
+        for _ in range(MAX_BATCH_SAMPLE_ROUNDS):
+            if total >= count:
+                break
+            points = self.sample_ellipse_batch(count)
+            points = points[~self.config_space.is_point_in_obstacle_batch(points)]
+            collected.append(points)
+            total += len(points)
+
+        if not collected:
+            return np.empty((0, 2))
+        return np.vstack(collected)[:count]
+
+    def prune(self):
+        """
+        按当前最优解代价剪枝：删除 f̂(x) = ||x - start|| + ||x - goal|| 不小于最优解代价的样本，
+        以及 f̂(v) 超过最优解代价的顶点；随之断开的后代顶点若仍可能改进解，则放回样本集合
+
+        返回:
+            samples: 剪枝后保留的样本数组
+        """
+        c_best = self.best_cost
+        keep = self.sample_alive & (self.sample_g_hat + self.sample_h_hat < c_best)
+        samples = self.samples[keep]
+        if not np.isfinite(c_best):
+            return samples
+
+        tree = self.tree
+        f_hat = tree.distances_to(self.start) + tree.distances_to(self.goal)
+        points = tree.points.copy()
+        size = len(tree)
+        remap = tree.remove(~(f_hat <= c_best * (1 + PRUNE_TOLERANCE)))
+        removed = size - len(tree)
+        if removed:
+            self.remap_node_indices(remap)
+            samples = np.vstack([samples, points[(remap < 0) & (f_hat < c_best)]])
+
+        self.prune_passes += 1
+        self.pruned_nodes += removed
+        return samples
+
+    def start_batch(self):
+        """剪枝并采样新的一批状态，重新计算近邻范围，把所有顶点放入顶点队列"""
+        samples = self.prune()
+        count = min(self.batch_size, self.max_iter - self.iterations)
+        new_samples = self.sample_batch(count)
+        self.iterations += count
+        self.batches += 1
+
+        self.samples = np.vstack([samples, new_samples])
+        self.sample_alive = np.ones(len(self.samples), dtype=bool)
+        self.sample_vertex = np.full(len(self.samples), -1, dtype=np.int64)
+        self.sample_g_hat = np.linalg.norm(self.samples - self.start, axis=1)
+        self.sample_h_hat = np.linalg.norm(self.samples - self.goal, axis=1)
+
+        # 近邻范围按隐式图的状态总数确定
+        q = len(self.tree) + len(self.samples)
+        if self.neighborhood == 'knearest':
+            self.k = self.neighbor_count(q)
+            cell_size = self.search_radius
+        else:
+            self.radius = self.search_radius if self.neighborhood == 'fixed' else self.neighbor_radius(q)
+            cell_size = self.radius
+        self.sample_index = create_near_index(self.near_index, cell_size)
+        self.sample_index.rebuild_from(self.samples)
+        self.compute_near_samples()
+
+        tree = self.tree
+        keys = tree.costs + tree.distances_to(self.goal)
+        self.vertex_queue = list(zip(keys.tolist(), range(len(tree))))
+        heapq.heapify(self.vertex_queue)
+        self.edge_queue = []
+        self.expanded = set()
+        self.batch_start_size = len(tree)
+
+    def compute_near_samples(self):
+        """
+        一次性计算本批开始时所有顶点半径内的样本，距离矩阵按块计算以限制内存
+        这些顶点扩展时只需要连接样本，不再逐个查询空间索引
+
+        k近邻模式下记录每个顶点最近的k个样本，以及样本和其他顶点合在一起的第k近邻距离：
+        本批中新增的顶点都来自样本，剪枝只在批开始时进行，所以这个距离在本批内不变
+        """
+        points = self.tree.points
+        samples = self.samples
+        knearest = self.neighborhood == 'knearest'
+        block = max(1, PAIRWISE_BLOCK_SIZE // max(len(samples) + (len(points) if knearest else 0), 1))
+        counts, ids, distances, thresholds = [], [], [], []
+        for begin in range(0, len(points), block):
+            pairwise = _pairwise_distances(points[begin:begin + block], samples)
+            if not knearest:
+                rows, cols = np.nonzero(pairwise < self.radius)
+            else:
+                cols = _k_smallest(pairwise, self.k)
+                rows = np.repeat(np.arange(len(pairwise)), cols.shape[1])
+                cols = cols.ravel()
+
+                # 到其他顶点的距离中最小的k个，与最近的k个样本合并后取第k小
+                vertex_pairwise = _pairwise_distances(points[begin:begin + block], points)
+                vertex_pairwise[np.arange(len(pairwise)), np.arange(begin, begin + len(pairwise))] = np.inf
+                vertex_nearest = np.take_along_axis(vertex_pairwise, _k_smallest(vertex_pairwise, self.k), axis=1)
+                joint = np.hstack([pairwise[rows, cols].reshape(len(pairwise), -1), vertex_nearest])
+                if joint.shape[1] >= self.k:
+                    thresholds.append(np.partition(joint, self.k - 1, axis=1)[:, self.k - 1])
+                else:
+                    thresholds.append(np.full(len(pairwise), np.inf))
+            counts.append(np.bincount(rows, minlength=len(pairwise)))
+            ids.append(cols)
+            distances.append(pairwise[rows, cols])
+
+        self.near_offsets = np.concatenate([[0], np.cumsum(np.concatenate(counts))]).astype(np.int64)
+        self.near_sample_ids = np.concatenate(ids).astype(np.int64)
+        self.near_sample_distances = np.concatenate(distances)
+        self.near_thresholds = np.concatenate(thresholds) if thresholds else np.empty(0)
+
+    def near(self, point, vertex, with_vertices):
+        """
+        查找给定顶点附近的样本和其他顶点
+
+        参数:
+            point: 顶点坐标
+            vertex: 顶点索引
+            with_vertices: 是否需要近邻顶点（只有本批新加入的顶点需要）
+
+        返回:
+            (sample_ids, sample_distances, vertex_ids, vertex_distances): 近邻样本和顶点的索引及距离数组
+        """
+        knearest = self.neighborhood == 'knearest'
+        if vertex < self.batch_start_size:
+            begin, end = self.near_offsets[vertex], self.near_offsets[vertex + 1]
+            sample_ids = self.near_sample_ids[begin:end]
+            sample_distances = self.near_sample_distances[begin:end]
+        else:
+            if knearest:
+                # 本批新增的顶点本身也是样本索引中的一个点，多取一个
+                sample_ids = self.sample_index.k_nearest(point, self.k + 1)
+            else:
+                sample_ids = self.sample_index.within_radius(point, self.radius)
+            sample_ids = np.asarray(sample_ids, dtype=np.int64)
+            sample_distances = np.linalg.norm(self.samples[sample_ids] - point, axis=1)
+        useful = self.sample_alive[sample_ids]
+        if knearest and vertex < self.batch_start_size:
+            # 本批开始时已有的顶点直接按预先计算的第k近邻距离筛选，它们不需要近邻顶点
+            useful &= sample_distances <= self.near_thresholds[vertex]
+            return (sample_ids[useful], sample_distances[useful],
+                    np.empty(0, dtype=np.int64), np.empty(0))
+        sample_ids, sample_distances = sample_ids[useful], sample_distances[useful]
+
+        if knearest:
+            # 已连接的样本同时也是顶点，最近的k个样本（含已连接的）和最近的k个顶点中一定包含
+            # 未连接样本和顶点合在一起最近的k个，不需要计算到全部样本和顶点的距离
+            vertex_ids = np.asarray(self.tree.indexes['near'].k_nearest(point, self.k + 1), dtype=np.int64)
+            vertex_ids = vertex_ids[vertex_ids != vertex]
+            vertex_distances = self.tree.distances_to(point, vertex_ids)
+            distances = np.concatenate([sample_distances, vertex_distances])
+            if len(distances) > self.k:
+                # 样本和顶点一起取最近的k个
+                threshold = np.partition(distances, self.k - 1)[self.k - 1]
+                sample_mask = sample_distances <= threshold
+                vertex_mask = vertex_distances <= threshold
+                sample_ids, sample_distances = sample_ids[sample_mask], sample_distances[sample_mask]
+                vertex_ids, vertex_distances = vertex_ids[vertex_mask], vertex_distances[vertex_mask]
+            if not with_vertices:
+                return sample_ids, sample_distances, np.empty(0, dtype=np.int64), np.empty(0)
+            return sample_ids, sample_distances, vertex_ids, vertex_distances
+
+        if not with_vertices:
+            return sample_ids, sample_distances, np.empty(0, dtype=np.int64), np.empty(0)
+        vertex_ids = np.asarray(self.tree.indexes['near'].within_radius(point, self.radius), dtype=np.int64)
+        vertex_ids = vertex_ids[vertex_ids != vertex]
+        return sample_ids, sample_distances, vertex_ids, self.tree.distances_to(point, vertex_ids)
+
+    def expand_vertex(self, vertex):
+        """
+        扩展顶点：把到近邻样本的边，以及（本批新加入的顶点）到近邻顶点的重布线边放入边队列
+        只有启发式估计能够改进当前解的边才入队
+
+        参数:
+            vertex: 顶点索引
+        """
+        tree = self.tree
+        point = tree.points[vertex]
+        g_vertex = tree.costs[vertex]
+        g_hat = math.hypot(point[0] - self.start[0], point[1] - self.start[1])
+        c_best = self.best_cost
+        rewire = vertex >= self.batch_start_size
+        sample_ids, sample_distances, vertex_ids, vertex_distances = self.near(point, vertex, rewire)
+
+        if len(sample_ids):
+            h_hat = self.sample_h_hat[sample_ids]
+            useful = g_hat + sample_distances + h_hat < c_best
+            keys = g_vertex + sample_distances + h_hat
+            for key, sample in zip(keys[useful].tolist(), sample_ids[useful].tolist()):
+                heapq.heappush(self.edge_queue, (key, vertex, -sample - 1))
+
+        if rewire and len(vertex_ids):
+            # 排除树中已有的边，只保留能够降低近邻顶点代价的边
+            parents = tree.parents
+            h_hat = tree.distances_to(self.goal, vertex_ids)
+            useful = ((parents[vertex_ids] != vertex) & (vertex_ids != parents[vertex]) &
+                      (g_hat + vertex_distances + h_hat < c_best) &
+                      (g_vertex + vertex_distances < tree.costs[vertex_ids]))
+            keys = g_vertex + vertex_distances + h_hat
+            for key, target in zip(keys[useful].tolist(), vertex_ids[useful].tolist()):
+                heapq.heappush(self.edge_queue, (key, vertex, target))
+
+    def process_edge(self):
+        """
+        取出边队列中启发式代价最小的边，可能改进解时检测碰撞，
+        通过后把样本连接到树上或重布线已有的顶点
+
+        返回:
+            bool: 树是否发生变化
+        """
+        key, vertex, target = heapq.heappop(self.edge_queue)
+        self.edges_processed += 1
+
+        # 剩余的边都不可能改进当前解，本批结束
+        if key >= self.best_cost:
+            self.edge_queue = []
+            self.vertex_queue = []
+            return False
+
+        tree = self.tree
+        sample = None
+        if target < 0:
+            sample = -target - 1
+            if not self.sample_alive[sample]:
+                # 样本在本批中已经连接到树上，按顶点处理
+                target, sample = int(self.sample_vertex[sample]), None
+        if target == vertex:
+            return False
+
+        point = tree.points[vertex]
+        target_point = self.samples[sample] if sample is not None else tree.points[target]
+        target_cost = float('inf') if sample is not None else tree.costs[target]
+        x, y = point
+        target_x, target_y = target_point
+        edge_cost = math.hypot(target_x - x, target_y - y)
+        new_cost = tree.costs[vertex] + edge_cost
+
+        # 不能降低终点的代价，或者经过该边的启发式代价不小于当前解时跳过，不做碰撞检测
+        if not new_cost < target_cost:
+            return False
+        g_hat = math.hypot(x - self.start[0], y - self.start[1])
+        h_hat = math.hypot(target_x - self.goal[0], target_y - self.goal[1])
+        if g_hat + edge_cost + h_hat >= self.best_cost:
+            return False
+
+        # 之前的批次中已经检测为有碰撞的边不再重复检测
+        edge_key = (x, y, target_x, target_y)
+        if edge_key in self.blocked_edges:
+            return False
+        if not self.is_collision_free(point, target_point):
+            self.blocked_edges.add(edge_key)
+            return False
+
+        if sample is None:
+            # 重布线：终点的代价降低量传递给整棵子树
+            tree.set_parent(target, vertex)
+            tree.costs[target] = new_cost
+            tree.propagate_costs(target)
+            self.expansion_history.append((vertex, target))
+            return True
+
+        new_idx = self.add_vertex(target_point, vertex, new_cost)
+        self.sample_alive[sample] = False
+        self.sample_vertex[sample] = new_idx
+        heapq.heappush(self.vertex_queue, (new_cost + self.sample_h_hat[sample], new_idx))
+        self.expansion_history.append((vertex, new_idx))
+        if np.array_equal(target_point, self.goal):
+            self.goal_nodes.append(new_idx)
+        return True
+
+    def plan_anytime(self):
+        """
+        以生成器形式执行BIT*规划算法，每当最优解代价降低时产生一个解快照
+        plan()由父类提供，逐个消费快照并返回生成器结束时的规划结果
+
+        产生:
+            snapshot: 解快照（见solution_snapshot）
+
+        返回:
+            success: 是否成功找到路径
+            path: 找到的路径 (如果成功)
+            vertices: 树的所有节点
+            edges: 树的所有边
+            planning_time: 规划耗时
+        """
+        # 重置规划器状态
+        self.reset()
+
+        # 记录开始时间
+        start_time = time.time()
+        self.start_stop_criteria(start_time)
+
+        while True:
+            # 一批处理完后检查停止条件，再开始新的一批
+            if not self.edge_queue and not self.vertex_queue:
+                if self.iterations >= self.max_iter or self.should_stop(self.best_cost):
+                    break
+                self.start_batch()
+            elif self.time_budget_exceeded():
+                # 批内处理每条边前都检查时间预算，收敛判定仍按批进行
+                break
+
+            # 顶点队列中最好的顶点不差于边队列中最好的边时，先扩展顶点
+            while self.vertex_queue and (not self.edge_queue or self.vertex_queue[0][0] <= self.edge_queue[0][0]):
+                _, vertex = heapq.heappop(self.vertex_queue)
+                if vertex not in self.expanded:
+                    self.expanded.add(vertex)
+                    self.expand_vertex(vertex)
+            if not self.edge_queue:
+                continue
+
+            if not self.process_edge():
+                continue
+
+            # 树发生变化后更新当前最优解
+            if self.update_best_solution():
+                # 每次找到更好的路径时重新计算采样椭圆
+                self.best_path_length = self.best_cost
+                self.ellipse_transform = self.compute_ellipse_transform()
+                if not self.initial_solution_found:
+                    self.initial_solution_found = True
+                    print(f"找到初始解，长度: {self.best_cost:.2f}")
+                self.success = True
+
+                # 最优解改进时产生快照
+                yield self.solution_snapshot(start_time)
+
+        self.success = self.best_goal_idx is not None
+        if self.success:
+            self.path, self.path_indices = self.extract_path(self.best_goal_idx, return_indices=True)
+            self.path_length = self.calculate_path_length(self.path)
+
+        # 记录规划耗时
+        self.planning_time = time.time() - start_time
+
+        print(f"BIT*规划完成:")
+        print(f"  碰撞检测次数: {self.collision_checks}, 处理的边: {self.edges_processed}")
+        print(f"  批次: {self.batches}, 采样状态数: {self.iterations}, 停止原因: {self.stop_reason}")
+        print(f"  节点数量: {len(self.vertices)}, 剩余样本: {int(np.count_nonzero(self.sample_alive))}")
+        print(f"  找到路径: {self.success}")
+        print(f"  规划时间: {self.planning_time:.3f}秒")
+        print(f"  路径长度: {self.path_length if self.success else 'N/A'}")
+
+        edges = self.simplify_tree_for_visualization() if self.success else self.edges
+        return {
+            'success': self.success,
+            'path': self.path,
+            'vertices': self.vertices,
+            'edges': edges,
+            'planning_time': self.planning_time,
+            'iterations': self.iterations,
+            'expansion_history': self.expansion_history
+        }
+
+    def get_name(self):
+        """返回算法名称"""
+        return "BIT* 算法"
+
+    def get_details(self):
+        """返回算法详细信息"""
+        details = super().get_details()
+        details["name"] = self.get_name()
+        details["batch_size"] = self.batch_size
+        details["batches"] = self.batches
+        details["edges_processed"] = self.edges_processed
+        details["samples"] = int(np.count_nonzero(self.sample_alive))
+        if self.neighborhood == 'knearest':
+            details["neighbor_count"] = self.k
+        else:
+            details["neighbor_radius"] = self.radius
+        for key in ("prune_interval", "parent_selection", "ellipse_samples_count", "regular_samples_count"):
+            details.pop(key, None)
+        return details
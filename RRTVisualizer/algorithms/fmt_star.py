@@ -0,0 +1,257 @@
+"""
+FMT* (Fast Marching Tree) 算法实现
+
+FMT*先一次性采样全部n个无碰撞状态，再从起点开始按代价从小到大推进一棵树：
+每次取出开放集合中代价最小的节点z，对z邻域内尚未访问的每个样本x，
+在x邻域内的开放节点中选出使代价最小的父节点，只检测这一条连线（懒惰碰撞检测），
+通过则把x加入树和开放集合，z处理完后关闭。终点连接到树上时代价已经确定，规划结束。
+
+样本一次性批量采样，近邻集合通过网格索引在首次用到时查询并缓存，每个节点最多查询一次；
+同一次扩展中所有候选连线合并为一次批量碰撞检测。
+"""
+
+import heapq
+import numpy as np
+import time
+from .nearest_neighbors import create_near_index
+from .rrt_star import RRTStar, DEFAULT_EDGE_BUDGET
+from .tree import Tree
+
+
+class FMTStar(RRTStar):
+    """FMT*算法实现类"""
+
+    # 只检测选出的父节点到样本的连线，本身就是懒惰的，不区分碰撞检测模式
+    collision_modes = ('eager',)
+
+    # 节点加入树时代价已经确定，之后不会重布线，不需要子节点邻接表
+    track_children = False
+
+    def __init__(self, start, goal, config_space, step_size=0.5, max_iter=1000, search_radius=1.0,
+                 nn_index='kdtree', near_index='grid', neighborhood='radius', simplify_level='neighbors',
+                 edge_budget=DEFAULT_EDGE_BUDGET):
+        """
+        初始化FMT*规划器
+
+        参数:
+            start: 起始点坐标 [x, y]
+            goal: 目标点坐标 [x, y]
+            config_space: 配置空间对象
+            step_size: 近邻半径的下限
+            max_iter: 采样状态数
+            search_radius: 近邻半径（fixed模式）或近邻半径的上限（radius模式）
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
+            near_index: 近邻半径查询索引类型 ('grid' 或 'brute_force')
+            neighborhood: 近邻范围 ('fixed'、'radius' 或 'knearest')
+            simplify_level: 找到路径后可视化保留的边 ('path'、'neighbors' 或 'budget')
+            edge_budget: budget模式下保留的边数
+        """
+        super().__init__(start, goal, config_space, step_size=step_size, goal_sample_rate=0.0,
+                         max_iter=max_iter, search_radius=search_radius, nn_index=nn_index,
+                         near_index=near_index, neighborhood=neighborhood, simplify_level=simplify_level,
+                         edge_budget=edge_budget)
+        self.reset_samples()
+
+    def reset(self):
+        """重置规划器状态"""
+        super().reset()
+        self.reset_samples()
+
+    def reset_samples(self):
+        """清空样本集合和近邻缓存"""
+        # 全部状态：0为起点，最后一个为终点，中间为采样得到的样本
+        self.samples = self.start.reshape(1, 2).astype(float)
+        self.sample_index = None
+        self.neighbor_cache = [None]
+        self.radius = self.search_radius
+        self.k = None
+        self.expansions = 0
+
+    def create_tree(self, root):
+        """
+        创建不挂载空间索引的树
+        近邻查询都在全部状态的索引上进行并缓存，树上的索引不会被查询，逐个插入只会增加开销
+
+        参数:
+            root: 根节点坐标
+
+        返回:
+            tree: Tree对象
+        """
+        return Tree(root, track_children=self.track_children)
+
+    def prepare_samples(self):
+        """
+        一次性采样全部状态，按状态总数确定近邻范围，并把全部状态写入近邻索引
+
+        返回:
+            goal_id: 终点在状态数组中的编号
+        """
+        samples = self.config_space.sample_free_batch(self.max_iter)
+        self.iterations = len(samples)
+        self.samples = np.vstack([self.start.reshape(1, 2), samples, self.goal.reshape(1, 2)]).astype(float)
+        self.neighbor_cache = [None] * len(self.samples)
+
+        n = len(self.samples)
+        if self.neighborhood == 'knearest':
+            self.k = self.neighbor_count(n)
+        else:
+            self.radius = self.search_radius if self.neighborhood == 'fixed' else self.neighbor_radius(n)
+        self.sample_index = create_near_index(self.near_index, self.radius)
+        self.sample_index.rebuild_from(self.samples)
+        return n - 1
+
+    def neighbors(self, i):
+        """
+        状态i的近邻状态编号，首次查询后缓存
+
+        参数:
+            i: 状态编号
+
+        返回:
+            neighbors: 按距离升序排列的近邻编号数组，不含i本身
+        """
+        cached = self.neighbor_cache[i]
+        if cached is None:
+            point = self.samples[i]
+            if self.neighborhood == 'knearest':
+                # 查询点本身也在索引中，多取一个
+                cached = self.sample_index.k_nearest(point, self.k + 1)
+            else:
+                cached = self.sample_index.within_radius(point, self.radius)
+            cached = np.asarray(cached, dtype=np.int64)
+            cached = cached[cached != i]
+            self.neighbor_cache[i] = cached
+        return cached
+
+    def plan_anytime(self):
+        """
+        以生成器形式执行FMT*规划算法，终点连接到树上时产生唯一的解快照
+        plan()由父类提供，逐个消费快照并返回生成器结束时的规划结果
+
+        产生:
+            snapshot: 解快照（见solution_snapshot）
+
+        返回:
+            success: 是否成功找到路径
+            path: 找到的路径 (如果成功)
+            vertices: 树的所有节点
+            edges: 树的所有边
+            planning_time: 规划耗时
+        """
+        # 重置规划器状态
+        self.reset()
+
+        # 记录开始时间
+        start_time = time.time()
+        self.start_stop_criteria(start_time)
+
+        goal_id = self.prepare_samples()
+        samples = self.samples
+        n = len(samples)
+
+        # 每个状态的代价和在树中的节点索引，未连接的状态为 inf / -1
+        costs = np.full(n, np.inf)
+        costs[0] = 0.0
+        vertex_of = np.full(n, -1, dtype=np.int64)
+        vertex_of[0] = 0
+        unvisited = np.ones(n, dtype=bool)
+        unvisited[0] = False
+        open_mask = np.zeros(n, dtype=bool)
+        open_mask[0] = True
+        open_queue = [(0.0, 0)]
+
+        while open_queue:
+            if self.should_stop(self.best_cost):
+                break
+
+            # 开放集合中每个状态只入队一次，代价确定后不再改变
+            _, z = heapq.heappop(open_queue)
+            self.expansions += 1
+
+            near = self.neighbors(z)
+            candidates = near[unvisited[near]]
+            if len(candidates):
+                # 每个候选样本在其邻域的开放状态中选出代价最小的父节点
+                xs, parents, new_costs = [], [], []
+                for x in candidates.tolist():
+                    x_near = self.neighbors(x)
+                    y_near = x_near[open_mask[x_near]]
+                    if not len(y_near):
+                        continue
+                    y_costs = costs[y_near] + np.linalg.norm(samples[y_near] - samples[x], axis=1)
+                    best = int(np.argmin(y_costs))
+                    xs.append(x)
+                    parents.append(int(y_near[best]))
+                    new_costs.append(float(y_costs[best]))
+
+                # 所有选出的连线一次批量检测，通过的样本加入树，本轮结束后才进入开放集合
+                if xs:
+                    free = self.config_space.is_collision_free_batch(samples[parents], samples[xs])
+                    self.collision_checks += len(xs)
+                    added = []
+                    for x, parent, cost, edge_free in zip(xs, parents, new_costs, free):
+                        if not edge_free:
+                            continue
+                        parent_vertex = int(vertex_of[parent])
+                        new_idx = self.add_vertex(samples[x], parent_vertex, cost)
+                        self.expansion_history.append((parent_vertex, new_idx))
+                        vertex_of[x] = new_idx
+                        costs[x] = cost
+                        unvisited[x] = False
+                        added.append(x)
+                        heapq.heappush(open_queue, (cost, x))
+                    open_mask[added] = True
+
+            open_mask[z] = False
+
+            # 终点的代价在连接到树上时已经确定
+            if not unvisited[goal_id]:
+                self.goal_nodes.append(int(vertex_of[goal_id]))
+                self.update_best_solution()
+                self.stop_reason = 'goal_reached'
+                yield self.solution_snapshot(start_time)
+                break
+
+        self.success = self.best_goal_idx is not None
+        if self.success:
+            self.path, self.path_indices = self.extract_path(self.best_goal_idx, return_indices=True)
+            self.path_length = self.calculate_path_length(self.path)
+
+        # 记录规划耗时
+        self.planning_time = time.time() - start_time
+
+        print(f"FMT*规划完成:")
+        print(f"  碰撞检测次数: {self.collision_checks}, 扩展次数: {self.expansions}")
+        print(f"  采样状态数: {self.iterations}, 停止原因: {self.stop_reason}")
+        print(f"  节点数量: {len(self.vertices)}")
+        print(f"  找到路径: {self.success}")
+        print(f"  规划时间: {self.planning_time:.3f}秒")
+        print(f"  路径长度: {self.path_length if self.success else 'N/A'}")
+
+        edges = self.simplify_tree_for_visualization() if self.success else self.edges
+        return {
+            'success': self.success,
+            'path': self.path,
+            'vertices': self.vertices,
+            'edges': edges,
+            'planning_time': self.planning_time,
+            'iterations': self.iterations,
+            'expansion_history': self.expansion_history
+        }
+
+    def get_name(self):
+        """返回算法名称"""
+        return "FMT* 算法"
+
+    def get_details(self):
+        """返回算法详细信息"""
+        details = super().get_details()
+        details["expansions"] = self.expansions
+        if self.neighborhood == 'knearest':
+            details["neighbor_count"] = self.k
+        else:
+            details["neighbor_radius"] = self.radius
+        for key in ("parent_selection", "goal_sample_rate"):
+            details.pop(key, None)
+        return details
@@ -3,18 +3,29 @@ Informed RRT* 算法实现
 
 Informed RRT*是RRT*的改进版本，在找到初始解后，使用椭圆采样
 来限制搜索空间，加速收敛到最优解。
+找到解后可以周期性地剪枝：已知代价加上到终点的直线距离超过当前最优解的节点
+不可能改进解，连同其子树一起从树和空间索引中删除。
 """
 
 import numpy as np
 import time
-from .rrt_star import RRTStar
+from .rrt_star import RRTStar, DEFAULT_EDGE_BUDGET
+
+
+# 剪枝阈值的相对余量，避免浮点误差误删最优路径上的节点
+PRUNE_TOLERANCE = 1e-9
+
+# 椭圆采样每批生成的样本数，样本缓存在缓冲区中逐个取用
+ELLIPSE_SAMPLE_BATCH = 256
 
 
 class InformedRRT(RRTStar):
     """Informed RRT*算法实现类"""
 
     def __init__(self, start, goal, config_space, step_size=0.5, goal_sample_rate=0.05,
-                 max_iter=1000, search_radius=1.0):
+                 max_iter=1000, search_radius=1.0, nn_index='kdtree', near_index='grid',
+                 collision_mode='eager', neighborhood='fixed', parent_selection='batch',
+                 simplify_level='neighbors', edge_budget=DEFAULT_EDGE_BUDGET, prune_interval=None):
         """
         初始化Informed RRT*规划器
 
@@ -26,8 +37,18 @@ class InformedRRT(RRTStar):
             goal_sample_rate: 采样目标点的概率
             max_iter: 最大迭代次数
             search_radius: 近邻搜索半径
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
+            near_index: 近邻半径查询索引类型 ('grid' 或 'brute_force')
+            collision_mode: 碰撞检测模式 ('eager' 或 'lazy')
+            neighborhood: 近邻范围 ('fixed'、'radius' 或 'knearest')
+            parent_selection: 选择父节点的方式 ('batch' 或 'sorted')
+            simplify_level: 找到路径后可视化保留的边 ('path'、'neighbors' 或 'budget')
+            edge_budget: budget模式下保留的边数
+            prune_interval: 找到解后每隔多少次迭代剪枝一次，None或0表示不剪枝
         """
-        super().__init__(start, goal, config_space, step_size, goal_sample_rate, max_iter, search_radius)
+        super().__init__(start, goal, config_space, step_size, goal_sample_rate, max_iter, search_radius,
+                         nn_index, near_index, collision_mode, neighborhood, parent_selection,
+                         simplify_level, edge_budget)
 
         # 当前最佳路径长度，用于构建采样椭圆
         self.best_path_length = float('inf')
@@ -35,6 +56,10 @@ class InformedRRT(RRTStar):
         # 椭圆变换矩阵
         self.ellipse_transform = None
 
+        # 椭圆样本缓冲区及下一个待取用样本的位置，椭圆变化时清空
+        self.ellipse_buffer = np.empty((0, 2))
+        self.ellipse_buffer_pos = 0
+
         # 初始解找到的标志
         self.initial_solution_found = False
 
@@ -42,20 +67,41 @@ class InformedRRT(RRTStar):
         self.ellipse_samples_count = 0
         self.regular_samples_count = 0
 
+        # 剪枝设置和统计
+        self.prune_interval = prune_interval
+        self.pruned_nodes = 0
+        self.prune_passes = 0
+
     def reset(self):
         """重置规划器状态"""
         super().reset()
+        self.discard_solution()
+        self.ellipse_samples_count = 0
+        self.regular_samples_count = 0
+        self.pruned_nodes = 0
+        self.prune_passes = 0
+
+    def discard_solution(self):
+        """
+        放弃当前解和按它建立的采样椭圆，恢复在整个空间内均匀采样
+        懒惰模式下验证使所有候选解都失效时调用，否则会一直在已失效路径的椭圆内采样
+        """
         self.best_path_length = float('inf')
         self.ellipse_transform = None
+        self.ellipse_buffer = np.empty((0, 2))
+        self.ellipse_buffer_pos = 0
         self.initial_solution_found = False
-        self.ellipse_samples_count = 0
-        self.regular_samples_count = 0
+        self.success = False
 
     def compute_ellipse_transform(self):
         """
         计算椭圆采样的变换矩阵
         椭圆的焦点是起点和终点，长轴长度是当前最佳路径长度
+        同时清空按旧椭圆生成的样本缓冲区
         """
+        self.ellipse_buffer = np.empty((0, 2))
+        self.ellipse_buffer_pos = 0
+
         # 计算起点到终点的距离
         c_best = np.linalg.norm(self.goal - self.start)
 
@@ -83,8 +129,36 @@ class InformedRRT(RRTStar):
         C = np.vstack([a1, a2]).T
         L = np.diag([r1, r2])
 
-        # 返回变换矩阵、中心点和半轴长度
-        return {'C': C, 'L': L, 'center': center, 'r1': r1, 'r2': r2}
+        # 返回变换矩阵、预先相乘的C·L、中心点和半轴长度
+        return {'C': C, 'L': L, 'CL': C @ L, 'center': center, 'r1': r1, 'r2': r2}
+
+    def prune_tree(self):
+        """
+        删除不可能改进当前最优解的节点：已知代价 + 到终点的直线距离 > 最优解经过终点区域节点到终点的代价上界
+        最优路径上的节点满足三角不等式，不会被删除；被删除节点的后代同样满足删除条件，随之一起删除
+
+        返回:
+            removed: 删除的节点数量
+        """
+        if self.best_goal_idx is None:
+            return 0
+
+        bound = self.best_cost + np.linalg.norm(self.vertices[self.best_goal_idx] - self.goal)
+        heuristic = self.tree.costs + self.tree.distances_to(self.goal)
+        # 与起点断开的节点（懒惰模式修复失败的子树）代价为无穷大，同样被删除
+        mask = ~(heuristic <= bound * (1 + PRUNE_TOLERANCE))
+
+        self.prune_passes += 1
+        removed = self.remove_nodes(mask)
+        self.pruned_nodes += removed
+        return removed
+
+    def sampling_volume(self):
+        """找到解后只在椭圆内采样，采样区域体积取自由空间面积与椭圆面积的较小值"""
+        volume = super().sampling_volume()
+        if self.ellipse_transform is not None:
+            volume = min(volume, np.pi * self.ellipse_transform['r1'] * self.ellipse_transform['r2'])
+        return volume
 
     def informed_sample(self):
         """
@@ -109,71 +183,48 @@ class InformedRRT(RRTStar):
                 self.regular_samples_count += 1
                 return super().random_sample()
 
-        # 在单位球内均匀采样
-        max_attempts = 100
-        for _ in range(max_attempts):
-            # 在单位圆内均匀采样
-            while True:
-                x_ball = np.random.uniform(-1, 1, 2)
-                if np.linalg.norm(x_ball) <= 1:
-                    break
-
-            # 应用椭圆变换
-            try:
-                x_ellipse = self.ellipse_transform['C'] @ (self.ellipse_transform['L'] @ x_ball)
-                sample = self.ellipse_transform['center'] + x_ellipse
-            except:
-                # 如果变换出错，使用普通采样
+        # 缓冲区取完时批量补充椭圆样本
+        if self.ellipse_buffer_pos >= len(self.ellipse_buffer):
+            self.ellipse_buffer = self.sample_ellipse_batch(ELLIPSE_SAMPLE_BATCH)
+            self.ellipse_buffer_pos = 0
+
+            # 如果整批样本都在配置空间外，则使用普通采样
+            if len(self.ellipse_buffer) == 0:
                 self.regular_samples_count += 1
                 return super().random_sample()
 
-            # 确保样本在配置空间内
-            if self.config_space.is_in_bounds(sample):
-                self.ellipse_samples_count += 1
-                return sample
-
-        # 如果多次尝试都失败，则使用普通采样
-        self.regular_samples_count += 1
-        return super().random_sample()
+        sample = self.ellipse_buffer[self.ellipse_buffer_pos]
+        self.ellipse_buffer_pos += 1
+        self.ellipse_samples_count += 1
+        return sample
 
-    def new_cost(self, from_idx, to_point):
+    def sample_ellipse_batch(self, n):
         """
-        计算从起点经过from_idx节点到to_point的总代价
-        修复KeyError问题
+        在当前椭圆内批量均匀采样，并过滤掉配置空间外的样本
+        单位圆内的点由归一化的高斯向量乘以sqrt(u)的半径得到，不需要拒绝采样
 
         参数:
-            from_idx: 中间节点的索引
-            to_point: 目标点坐标
+            n: 生成的样本数
 
         返回:
-            cost: 总代价
+            samples: 在配置空间内的椭圆样本数组 (K, 2)，K <= n
         """
-        # 如果from_idx不在costs字典中，初始化它
-        if from_idx not in self.costs:
-            # 尝试计算从起点到该节点的成本
-            if from_idx != 0 and from_idx in self.parents:
-                parent_idx = self.parents[from_idx]
-                if parent_idx in self.costs:
-                    parent_cost = self.costs[parent_idx]
-                    edge_cost = np.linalg.norm(self.vertices[parent_idx] - self.vertices[from_idx])
-                    self.costs[from_idx] = parent_cost + edge_cost
-                else:
-                    # 如果父节点成本也未知，假设是无穷大，这样的路径就不会被选择
-                    self.costs[from_idx] = float('inf')
-            else:
-                # 如果是起点或无法确定成本，设置为无穷大
-                self.costs[from_idx] = 0.0 if from_idx == 0 else float('inf')
-
-        # 从起点到中间节点的代价
-        from_cost = self.costs[from_idx]
-        # 中间节点到目标点的代价（欧式距离）
-        to_cost = np.linalg.norm(self.vertices[from_idx] - to_point)
-
-        return from_cost + to_cost
-
-    def plan(self):
+        directions = np.random.standard_normal((n, 2))
+        norms = np.linalg.norm(directions, axis=1, keepdims=True)
+        radii = np.sqrt(np.random.random((n, 1)))
+        x_ball = directions * (radii / np.maximum(norms, 1e-12))
+
+        # 应用椭圆变换：x = C·L·x_ball + center
+        samples = x_ball @ self.ellipse_transform['CL'].T + self.ellipse_transform['center']
+        return samples[self.config_space.is_in_bounds_batch(samples)]
+
+    def plan_anytime(self):
         """
-        执行Informed RRT*规划算法
+        以生成器形式执行Informed RRT*规划算法，每当最优解代价降低时产生一个解快照
+        plan()由父类提供，逐个消费快照并返回生成器结束时的规划结果
+
+        产生:
+            snapshot: 解快照（见solution_snapshot）
 
         返回:
             success: 是否成功找到路径
@@ -187,109 +238,63 @@ class InformedRRT(RRTStar):
 
         # 记录开始时间
         start_time = time.time()
+        self.start_stop_criteria(start_time)
 
         # 动态调整搜索半径（可选）
         # 随着节点数量的增加，搜索半径可以适当减小
         search_radius = self.search_radius
 
         for i in range(self.max_iter):
+            # 时间预算用完或最优解代价在窗口内不再明显改进时提前停止
+            if self.should_stop(self.best_cost):
+                break
             self.iterations = i + 1
 
+            # 周期性剪枝，保持树的规模和每次迭代的开销
+            if self.prune_interval and self.success and i % self.prune_interval == 0:
+                self.prune_tree()
+
             # 1. 采样一个点（可能是有信息的采样）
             rand_point = self.informed_sample()
 
-            # 2. 找到树中最近的节点
-            nearest_idx = self.nearest_neighbor(rand_point)
-            nearest_point = self.vertices[nearest_idx]
-
-            # 3. 朝随机点方向扩展一步
-            new_point = self.steer(nearest_point, rand_point)
-
-            # 4. 检查是否无碰撞
-            if not self.is_collision_free(nearest_point, new_point):
+            # 2-8. 扩展、选择父节点并重布线
+            new_idx = self.expand(rand_point, search_radius)
+            if new_idx is None:
                 continue
 
-            # 5. 将新节点添加到树中
-            self.vertices.append(new_point)
-            new_idx = len(self.vertices) - 1
-
-            # 确保初始化新节点的成本
-            if new_idx not in self.costs:
-                self.costs[new_idx] = float('inf')  # 初始设置为无穷大
-
-
-            # 6. 找到新节点附近的节点
-            near_indices = self.near_vertices(new_point, search_radius)
-
-            # 7. 选择最优父节点（能够最小化从起点到新节点的代价）
-            min_cost = float('inf')
-            min_idx = None
-
-            for near_idx in near_indices:
-                # 确保costs字典中包含near_idx
-                if near_idx not in self.costs:
-                    # 如果没有cost，计算一个初始成本
-                    parent = self.parents.get(near_idx)
-                    if parent is not None and parent in self.costs:
-                        self.costs[near_idx] = self.costs[parent] + np.linalg.norm(
-                            self.vertices[parent] - self.vertices[near_idx]
-                        )
-                    else:
-                        # 无法确定路径成本，设置为无穷大
-                        self.costs[near_idx] = float('inf')
-
-                # 检查从near_idx到new_point是否无碰撞
-                if not self.is_collision_free(self.vertices[near_idx], new_point):
-                    continue
-
-                # 计算经过近邻节点到新节点的代价
-                cost = self.new_cost(near_idx, new_point)
-
-                if cost < min_cost:
-                    min_cost = cost
-                    min_idx = near_idx
-
-            # 如果没有找到有效的父节点，使用最近的节点作为父节点
-            if min_idx is None:
-                min_idx = nearest_idx
-                min_cost = self.new_cost(nearest_idx, new_point)
-
-            # 更新父节点和代价
-            self.parents[new_idx] = min_idx
-            self.edges.append((min_idx, new_idx))
-            self.costs[new_idx] = min_cost
-
-            # 记录扩展历史，用于可视化
-            self.expansion_history.append((min_idx, new_idx))
-
-            # 8. 重布线：检查是否可以通过新节点改进近邻节点的路径
-            self.rewire(new_idx, near_indices)
-
-            # 9. 检查是否达到目标
-            if self.is_goal_reached(new_point):
-                # 提取路径
-                self.path = self.extract_path(new_idx)
-                self.path_length = self.calculate_path_length(self.path)
-
+            # 9. 记录到达目标区域的节点，并更新当前最优解（懒惰模式下需先验证路径上的连线）
+            # 重布线降低已有目标节点的代价时同样会更新最优解和采样椭圆
+            self.add_goal_node(new_idx)
+            improved = self.update_best_solution()
+            # 懒惰模式下验证发现无效边后最优解代价可能回升，椭圆需随之放大
+            if improved or np.isfinite(self.best_cost) and self.best_cost > self.best_path_length:
                 # 更新最佳路径长度
-                if self.path_length < self.best_path_length:
-                    self.best_path_length = self.path_length
-                    # 每次找到更好的路径时重新计算椭圆变换
-                    self.ellipse_transform = self.compute_ellipse_transform()
-                    # 打印最佳路径长度，帮助调试
-                    print(f"更新最佳路径，长度: {self.best_path_length:.2f}")
+                self.best_path_length = self.best_cost
+                # 每次找到更好的路径时重新计算椭圆变换
+                self.ellipse_transform = self.compute_ellipse_transform()
+                # 打印最佳路径长度，帮助调试
+                print(f"更新最佳路径，长度: {self.best_path_length:.2f}")
 
                 # 标记为找到初始解
                 if not self.initial_solution_found:
                     self.initial_solution_found = True
-                    print(f"找到初始解，长度: {self.path_length:.2f}")
+                    print(f"找到初始解，长度: {self.best_cost:.2f}")
 
                 self.success = True
 
                 # 不要退出循环，继续优化路径
+            elif self.initial_solution_found and not np.isfinite(self.best_cost):
+                # 所有候选解都在验证中失效，椭圆是按无效路径建立的，回到均匀采样
+                self.discard_solution()
+                print("已有解全部失效，恢复均匀采样")
+
+            # 最优解改进时产生快照
+            if improved:
+                yield self.solution_snapshot(start_time)
 
             # 动态调整搜索半径（可选）- 随着节点数增加，减小搜索半径
-            if self.initial_solution_found and i % 100 == 0 and i > 0:
+            # 收缩半径和k近邻模式自带随节点数变化的近邻范围，不需要此启发式调整
+            if self.neighborhood == 'fixed' and self.initial_solution_found and i % 100 == 0 and i > 0:
                 # 计算节点密度
                 node_density = len(self.vertices) / (self.config_space.bounds['x_max'] * self.config_space.bounds['y_max'])
                 # 根据节点密度调整搜索半径
@@ -297,20 +302,28 @@ class InformedRRT(RRTStar):
                 # 限制最小和最大值
                 search_radius = max(min(adjusted_radius, self.search_radius), self.search_radius * 0.3)
 
+        # 只在规划结束时提取一次最优路径
+        self.success = self.best_goal_idx is not None
+        if self.success:
+            self.path, self.path_indices = self.extract_path(self.best_goal_idx, return_indices=True)
+            self.path_length = self.calculate_path_length(self.path)
+
         # 记录规划耗时
         self.planning_time = time.time() - start_time
 
         # 打印算法统计信息
         print(f"InformedRRT*规划完成:")
-        print(f"  总迭代次数: {self.iterations}")
+        print(f"  碰撞检测模式: {self.collision_mode}, 检测次数: {self.collision_checks}")
+        print(f"  总迭代次数: {self.iterations}, 停止原因: {self.stop_reason}")
         print(f"  节点数量: {len(self.vertices)}")
         print(f"  找到路径: {self.success}")
         print(f"  规划时间: {self.planning_time:.3f}秒")
         print(f"  路径长度: {self.path_length if self.success else 'N/A'}")
         print(f"  椭圆采样次数: {self.ellipse_samples_count}")
         print(f"  普通采样次数: {self.regular_samples_count}")
-        if self.success:
-            self.simplify_tree_for_visualization()
+        if self.prune_interval:
+            print(f"  剪枝次数: {self.prune_passes}, 删除节点数: {self.pruned_nodes}")
+        edges = self.simplify_tree_for_visualization() if self.success else self.edges
 
         if self.ellipse_transform:
             print(f"  椭圆信息: 长半轴={self.ellipse_transform['r1']:.2f}, 短半轴={self.ellipse_transform['r2']:.2f}")
@@ -319,101 +332,12 @@ class InformedRRT(RRTStar):
             'success': self.success,
             'path': self.path,
             'vertices': self.vertices,
-            'edges': self.edges,
+            'edges': edges,
             'planning_time': self.planning_time,
             'iterations': self.iterations,
             'expansion_history': self.expansion_history
         }
 
-    def rewire(self, new_idx, near_indices):
-        """
-        重布线操作：检查是否可以通过新节点来改进近邻节点的路径
-        修复版本，确保costs字典中包含所有必要的键并保持数据一致性
-
-        参数:
-            new_idx: 新节点的索引
-            near_indices: 近邻节点的索引列表
-        """
-        new_point = self.vertices[new_idx]
-
-        for near_idx in near_indices:
-            # 跳过自身
-            if near_idx == new_idx:
-                continue
-
-            # 确保costs字典中包含near_idx
-            if near_idx not in self.costs:
-                # 如果没有cost，计算一个初始成本
-                parent = self.parents.get(near_idx)
-                if parent is not None and parent in self.costs:
-                    self.costs[near_idx] = self.costs[parent] + np.linalg.norm(
-                        self.vertices[parent] - self.vertices[near_idx]
-                    )
-                else:
-                    # 无法确定路径成本，设置为无穷大
-                    self.costs[near_idx] = float('inf')
-                    print(f"警告: 重布线中节点 {near_idx} 的父节点 {parent} 没有成本值")
-
-            # 检查从new_idx到near_idx是否无碰撞
-            if not self.is_collision_free(new_point, self.vertices[near_idx]):
-                continue
-
-            try:
-                # 确保new_idx在costs字典中
-                if new_idx not in self.costs:
-                    parent = self.parents.get(new_idx)
-                    if parent is not None and parent in self.costs:
-                        self.costs[new_idx] = self.costs[parent] + np.linalg.norm(
-                            self.vertices[parent] - self.vertices[new_idx]
-                        )
-                    else:
-                        self.costs[new_idx] = float('inf')
-                        print(f"警告: 重布线中节点 {new_idx} 的父节点 {parent} 没有成本值")
-
-                # 计算经过新节点到近邻节点的代价
-                cost = self.costs[new_idx] + np.linalg.norm(new_point - self.vertices[near_idx])
-
-                # 如果代价更低，则更新父节点和代价
-                if cost < self.costs[near_idx]:
-                    # 保存旧状态以便回滚
-                    old_parent = self.parents[near_idx]
-                    old_cost = self.costs[near_idx]
-
-                    # 原子化更新操作
-                    # 1. 更新父节点引用
-                    self.parents[near_idx] = new_idx
-
-                    # 2. 更新边集合 - 安全更新
-                    new_edges = [(p, c) for (p, c) in self.edges if c != near_idx]
-                    new_edges.append((new_idx, near_idx))
-                    self.edges = new_edges
-
-                    # 3. 更新代价
-                    self.costs[near_idx] = cost
-
-                    # 4. 记录重布线历史
-                    self.expansion_history.append((new_idx, near_idx))
-
-                    # 验证更新是否成功
-                    if near_idx not in self.parents or self.parents[near_idx] != new_idx:
-                        print(f"错误: 更新父节点失败 - 节点 {near_idx}")
-                        # 回滚更改
-                        self.parents[near_idx] = old_parent
-                        self.costs[near_idx] = old_cost
-                        self.edges = [(p, c) for (p, c) in self.edges if c != near_idx]
-                        if old_parent is not None:
-                            self.edges.append((old_parent, near_idx))
-
-            except Exception as e:
-                print(f"重布线过程出现异常: {e}")
-                # 任何异常情况下，确保数据一致性
-                if 'old_parent' in locals() and 'old_cost' in locals():
-                    self.parents[near_idx] = old_parent
-                    self.costs[near_idx] = old_cost
-                    self.edges = [(p, c) for (p, c) in self.edges if c != near_idx]
-                    if old_parent is not None:
-                        self.edges.append((old_parent, near_idx))
-
     def get_name(self):
         """返回算法名称"""
         return "Informed RRT* 算法"
@@ -426,6 +350,9 @@ class InformedRRT(RRTStar):
         details["initial_solution_found"] = self.initial_solution_found
         details["ellipse_samples_count"] = self.ellipse_samples_count
         details["regular_samples_count"] = self.regular_samples_count
+        details["prune_interval"] = self.prune_interval
+        details["pruned_nodes"] = self.pruned_nodes
+        details["prune_passes"] = self.prune_passes
 
         if self.ellipse_transform:
             details["ellipse_long_axis"] = float(self.ellipse_transform['r1']) * 2
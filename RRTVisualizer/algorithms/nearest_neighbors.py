@@ -0,0 +1,552 @@
+"""
+最近邻索引实现
+
+为RRT系列算法提供可插拔的最近邻查询结构：
+- BruteForceIndex: 向量化的暴力搜索，作为基准实现
+- KDTreeIndex: 增量式KD树，支持逐点插入并定期重新平衡
+- GridIndex: 均匀网格（桶哈希）索引，用于RRT*的半径与k近邻查询
+
+所有索引在距离相同时都返回索引最小的节点，因此在固定随机种子下
+得到的规划结果一致，可以直接进行性能对比。
+"""
+
+import numpy as np
+from abc import ABC, abstractmethod
+
+
+class NearestNeighborIndex(ABC):
+    """最近邻索引基类"""
+
+    def __init__(self, initial_capacity=64):
+        """
+        初始化索引
+
+        参数:
+            initial_capacity: 点缓冲区的初始容量
+        """
+        self._initial_capacity = initial_capacity
+        self._points = np.empty((initial_capacity, 2), dtype=float)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def points(self):
+        """返回已插入点的视图 (N, 2)"""
+        return self._points[:self._size]
+
+    def _append_point(self, point):
+        """
+        将点追加到缓冲区，容量不足时按倍数扩容
+
+        参数:
+            point: 点坐标 [x, y]
+
+        返回:
+            idx: 新点的索引
+        """
+        if self._size == len(self._points):
+            grown = np.empty((2 * len(self._points), 2), dtype=float)
+            grown[:self._size] = self._points[:self._size]
+            self._points = grown
+
+        idx = self._size
+        self._points[idx] = point
+        self._size += 1
+        return idx
+
+    def clear(self):
+        """清空索引"""
+        self._points = np.empty((self._initial_capacity, 2), dtype=float)
+        self._size = 0
+
+    def _set_points(self, points):
+        """
+        清空索引并一次性写入全部点，不更新索引结构，供批量重建使用
+
+        参数:
+            points: 点坐标数组 (N, 2)
+
+        返回:
+            points: 写入的点坐标数组
+        """
+        self.clear()
+        points = np.asarray(points, dtype=float)
+        if len(points) > len(self._points):
+            self._points = np.empty((len(points), 2), dtype=float)
+        self._points[:len(points)] = points
+        self._size = len(points)
+        return points
+
+    def rebuild_from(self, points):
+        """
+        清空索引并按顺序重新插入一组点，插入后点的索引即其在points中的位置
+
+        参数:
+            points: 点坐标数组 (N, 2)
+        """
+        self.clear()
+        for point in points:
+            self.add(point)
+
+    @abstractmethod
+    def add(self, point):
+        """
+        插入一个点
+
+        参数:
+            point: 点坐标 [x, y]
+
+        返回:
+            idx: 新点的索引（按插入顺序从0开始编号）
+        """
+        pass
+
+    @abstractmethod
+    def nearest(self, point):
+        """
+        查询距离给定点最近的已插入点
+
+        参数:
+            point: 查询点坐标 [x, y]
+
+        返回:
+            idx: 最近点的索引
+        """
+        pass
+
+    def within_radius(self, point, radius, max_count=None):
+        """
+        查询给定半径内的所有点，默认实现扫描全部点
+
+        参数:
+            point: 查询点坐标 [x, y]
+            radius: 搜索半径（严格小于）
+            max_count: 最多返回的点数，None表示不限制
+
+        返回:
+            indices: 按距离升序排列的点索引列表
+        """
+        candidates = np.arange(self._size)
+        distances = _distances(self._points[:self._size], point)
+        inside = distances < radius
+        return _sorted_by_distance(candidates[inside], distances[inside], max_count)
+
+    def k_nearest(self, point, k):
+        """
+        查询距离给定点最近的k个点，默认实现扫描全部点
+
+        参数:
+            point: 查询点坐标 [x, y]
+            k: 返回的点数
+
+        返回:
+            indices: 按距离升序排列的点索引列表
+        """
+        distances = _distances(self._points[:self._size], point)
+        return _sorted_by_distance(np.arange(self._size), distances, k)
+
+
+def _distances(points, point):
+    """计算一组点到给定点的欧式距离"""
+    diff = points - point
+    return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+
+def _sorted_by_distance(indices, distances, limit=None):
+    """
+    按 (距离, 索引) 升序排列候选点
+
+    参数:
+        indices: 候选点索引数组
+        distances: 对应的距离数组
+        limit: 最多保留的点数
+
+    返回:
+        indices: 排序并截断后的索引列表
+    """
+    order = np.lexsort((indices, distances))
+    if limit is not None:
+        order = order[:limit]
+    return indices[order].tolist()
+
+
+class BruteForceIndex(NearestNeighborIndex):
+    """暴力搜索索引：每次查询扫描全部点"""
+
+    def add(self, point):
+        return self._append_point(point)
+
+    def nearest(self, point):
+        if self._size == 0:
+            raise ValueError("nearest neighbor query on an empty index")
+
+        diff = self._points[:self._size] - point
+        distances = np.einsum('ij,ij->i', diff, diff)
+        # np.argmin在距离相同时返回第一个（索引最小的）点
+        return int(np.argmin(distances))
+
+
+class KDTreeIndex(NearestNeighborIndex):
+    """
+    增量式KD树索引
+
+    叶子节点保存至多bucket_size个点，插入时下降到对应叶子，叶子溢出时
+    沿跨度最大的维度按中位数分裂。当点数相对上次建树翻倍，或插入路径
+    深度超过平衡树的上限时，从头重建一棵平衡树。
+    """
+
+    def __init__(self, bucket_size=32, initial_capacity=64):
+        """
+        初始化KD树索引
+
+        参数:
+            bucket_size: 叶子节点的最大点数
+            initial_capacity: 点缓冲区的初始容量
+        """
+        super().__init__(initial_capacity)
+        self.bucket_size = bucket_size
+        self.rebuild_count = 0
+        self._reset_nodes()
+
+    def _reset_nodes(self):
+        """清空树结构，只保留一个空的根叶子"""
+        # 以并行列表保存节点：内部节点的bucket为None，叶子节点的split_dim为-1
+        self._split_dim = [-1]
+        self._split_val = [0.0]
+        self._left = [-1]
+        self._right = [-1]
+        self._bucket = [[]]
+        self._built_size = 0
+
+    def clear(self):
+        super().clear()
+        self.rebuild_count = 0
+        self._reset_nodes()
+
+    def _new_leaf(self, indices):
+        self._split_dim.append(-1)
+        self._split_val.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._bucket.append(indices)
+        return len(self._bucket) - 1
+
+    def _split(self, indices):
+        """
+        将一组点按中位数划分
+
+        参数:
+            indices: 点索引数组
+
+        返回:
+            (dim, value, left_indices, right_indices)
+            左侧点在dim维上 <= value，右侧点 >= value
+        """
+        coords = self._points[indices]
+        spread = coords.max(axis=0) - coords.min(axis=0)
+        dim = int(np.argmax(spread))
+
+        mid = len(indices) // 2
+        order = np.argpartition(coords[:, dim], mid)
+        value = float(coords[order[mid], dim])
+
+        # 叶子中保持索引升序，保证距离相同时优先返回较小的索引
+        left = np.sort(indices[order[:mid]])
+        right = np.sort(indices[order[mid:]])
+        return dim, value, left, right
+
+    def _build(self, indices):
+        """递归构建平衡子树，返回子树根节点编号"""
+        if len(indices) <= self.bucket_size:
+            return self._new_leaf(indices.tolist())
+
+        dim, value, left, right = self._split(indices)
+        node = self._new_leaf(None)
+        self._split_dim[node] = dim
+        self._split_val[node] = value
+        self._left[node] = self._build(left)
+        self._right[node] = self._build(right)
+        return node
+
+    def rebuild_from(self, points):
+        """一次性写入全部点后直接构建平衡KD树，避免逐点插入"""
+        self._set_points(points)
+        if self._size:
+            self.rebuild()
+
+    def rebuild(self):
+        """对当前全部点重建平衡KD树"""
+        self._split_dim = []
+        self._split_val = []
+        self._left = []
+        self._right = []
+        self._bucket = []
+        self._build(np.arange(self._size))
+        self._built_size = self._size
+        self.rebuild_count += 1
+
+    def _max_depth(self):
+        """允许的最大深度，超过后触发重新平衡"""
+        leaves = max(1, self._size // self.bucket_size)
+        return 2 * int(np.log2(leaves)) + 4
+
+    def add(self, point):
+        idx = self._append_point(point)
+
+        # 点数翻倍后重建，摊还代价为O(log n)
+        if self._size >= 2 * max(self._built_size, self.bucket_size):
+            self.rebuild()
+            return idx
+
+        node = 0
+        depth = 0
+        while self._split_dim[node] >= 0:
+            if point[self._split_dim[node]] < self._split_val[node]:
+                node = self._left[node]
+            else:
+                node = self._right[node]
+            depth += 1
+
+        bucket = self._bucket[node]
+        bucket.append(idx)
+
+        if len(bucket) > self.bucket_size:
+            if depth >= self._max_depth():
+                self.rebuild()
+                return idx
+
+            dim, value, left, right = self._split(np.array(bucket))
+            self._split_dim[node] = dim
+            self._split_val[node] = value
+            self._bucket[node] = None
+            self._left[node] = self._new_leaf(left.tolist())
+            self._right[node] = self._new_leaf(right.tolist())
+
+        return idx
+
+    def nearest(self, point):
+        if self._size == 0:
+            raise ValueError("nearest neighbor query on an empty index")
+
+        best_idx = -1
+        best_dist = np.inf
+        px = float(point[0])
+        py = float(point[1])
+
+        # 栈中保存 (节点, 该节点区域到查询点距离平方的下界)
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound > best_dist:
+                continue
+
+            dim = self._split_dim[node]
+            if dim < 0:
+                bucket = self._bucket[node]
+                if not bucket:
+                    continue
+                diff = self._points[bucket] - (px, py)
+                distances = np.einsum('ij,ij->i', diff, diff)
+                pos = int(np.argmin(distances))
+                dist = distances[pos]
+                idx = bucket[pos]
+                if dist < best_dist or (dist == best_dist and idx < best_idx):
+                    best_dist = dist
+                    best_idx = idx
+                continue
+
+            delta = (px if dim == 0 else py) - self._split_val[node]
+            far_bound = max(bound, delta * delta)
+            if delta < 0:
+                near_node, far_node = self._left[node], self._right[node]
+            else:
+                near_node, far_node = self._right[node], self._left[node]
+
+            # 先压入远侧，使近侧先被访问以尽快收紧上界
+            stack.append((far_node, far_bound))
+            stack.append((near_node, bound))
+
+        return best_idx
+
+
+class GridIndex(NearestNeighborIndex):
+    """
+    均匀网格（桶哈希）索引
+
+    平面被划分为边长为cell_size的正方形单元，每个单元保存落入其中的
+    点索引。半径查询只访问与查询圆相交的单元；当cell_size与搜索半径
+    相当时只需访问3x3个单元，查询代价与树的规模无关。
+    """
+
+    def __init__(self, cell_size=1.0, initial_capacity=64):
+        """
+        初始化网格索引
+
+        参数:
+            cell_size: 网格单元边长，通常取近邻搜索半径
+            initial_capacity: 点缓冲区的初始容量
+        """
+        super().__init__(initial_capacity)
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self._cells = {}
+        self._cell_min = None
+        self._cell_max = None
+
+    def clear(self):
+        super().clear()
+        self._cells = {}
+        self._cell_min = None
+        self._cell_max = None
+
+    def _cell_of(self, point):
+        return (int(np.floor(point[0] / self.cell_size)),
+                int(np.floor(point[1] / self.cell_size)))
+
+    def add(self, point):
+        idx = self._append_point(point)
+        cell = self._cell_of(point)
+        self._cells.setdefault(cell, []).append(idx)
+
+        # 记录已占用单元的范围，k近邻查询据此判断何时停止扩展
+        if self._cell_min is None:
+            self._cell_min = list(cell)
+            self._cell_max = list(cell)
+        else:
+            self._cell_min[0] = min(self._cell_min[0], cell[0])
+            self._cell_min[1] = min(self._cell_min[1], cell[1])
+            self._cell_max[0] = max(self._cell_max[0], cell[0])
+            self._cell_max[1] = max(self._cell_max[1], cell[1])
+        return idx
+
+    def rebuild_from(self, points):
+        """一次性写入全部点，按单元分组后批量建立单元表，单元内的点保持索引升序"""
+        points = self._set_points(points)
+        if not self._size:
+            return
+
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        # lexsort是稳定排序，同一单元内的点按索引升序排列
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        sorted_cells = cells[order]
+        boundaries = np.flatnonzero((np.diff(sorted_cells, axis=0) != 0).any(axis=1)) + 1
+        for group in np.split(order, boundaries):
+            cell = cells[group[0]]
+            self._cells[(int(cell[0]), int(cell[1]))] = group.tolist()
+
+        self._cell_min = cells.min(axis=0).tolist()
+        self._cell_max = cells.max(axis=0).tolist()
+
+    def _gather(self, cx_range, cy_range):
+        """收集给定单元范围内的点索引"""
+        indices = []
+        cells = self._cells
+        for cx in cx_range:
+            for cy in cy_range:
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    indices.extend(bucket)
+        return indices
+
+    def _gather_ring(self, center, ring):
+        """收集与中心单元切比雪夫距离恰为ring的单元中的点索引"""
+        cx, cy = center
+        if ring == 0:
+            return self._gather((cx,), (cy,))
+
+        indices = self._gather(range(cx - ring, cx + ring + 1), (cy - ring, cy + ring))
+        indices.extend(self._gather((cx - ring, cx + ring), range(cy - ring + 1, cy + ring)))
+        return indices
+
+    def nearest(self, point):
+        if self._size == 0:
+            raise ValueError("nearest neighbor query on an empty index")
+        return self.k_nearest(point, 1)[0]
+
+    def within_radius(self, point, radius, max_count=None):
+        if self._size == 0:
+            return []
+
+        size = self.cell_size
+        indices = self._gather(
+            range(int(np.floor((point[0] - radius) / size)), int(np.floor((point[0] + radius) / size)) + 1),
+            range(int(np.floor((point[1] - radius) / size)), int(np.floor((point[1] + radius) / size)) + 1)
+        )
+        if not indices:
+            return []
+
+        indices = np.array(indices)
+        distances = _distances(self._points[indices], point)
+        inside = distances < radius
+        return _sorted_by_distance(indices[inside], distances[inside], max_count)
+
+    def k_nearest(self, point, k):
+        if self._size == 0 or k <= 0:
+            return []
+
+        center = self._cell_of(point)
+        # 覆盖全部已占用单元所需的最大环数
+        max_ring = max(abs(center[0] - self._cell_min[0]), abs(center[0] - self._cell_max[0]),
+                       abs(center[1] - self._cell_min[1]), abs(center[1] - self._cell_max[1]))
+
+        candidates = []
+        ring = 0
+        while True:
+            candidates.extend(self._gather_ring(center, ring))
+
+            # 查询点位于中心单元内，未访问单元中的点距离至少为 ring * cell_size
+            if len(candidates) >= k or ring >= max_ring:
+                indices = np.array(candidates)
+                distances = _distances(self._points[indices], point)
+                if ring >= max_ring or np.partition(distances, k - 1)[k - 1] < ring * self.cell_size:
+                    return _sorted_by_distance(indices, distances, k)
+            ring += 1
+
+
+# 可选的最近邻索引类型
+NN_INDEXES = {
+    'brute_force': BruteForceIndex,
+    'kdtree': KDTreeIndex
+}
+
+# 可选的近邻（半径/k近邻）索引类型
+NEAR_INDEXES = {
+    'brute_force': BruteForceIndex,
+    'grid': GridIndex
+}
+
+
+def create_nn_index(name):
+    """
+    根据名称创建最近邻索引
+
+    参数:
+        name: 索引类型名称，见NN_INDEXES
+
+    返回:
+        index: 最近邻索引实例
+    """
+    if name not in NN_INDEXES:
+        raise ValueError(f"unknown nearest neighbor index: {name}")
+    return NN_INDEXES[name]()
+
+
+def create_near_index(name, cell_size):
+    """
+    根据名称创建近邻索引
+
+    参数:
+        name: 索引类型名称，见NEAR_INDEXES
+        cell_size: 网格单元边长（仅对网格索引有效）
+
+    返回:
+        index: 近邻索引实例
+    """
+    if name not in NEAR_INDEXES:
+        raise ValueError(f"unknown near index: {name}")
+    if name == 'grid':
+        return GridIndex(cell_size)
+    return NEAR_INDEXES[name]()
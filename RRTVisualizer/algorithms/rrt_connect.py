@@ -6,7 +6,7 @@ from .base_rrt import BaseRRT
 class RRTConnect(BaseRRT):
     """RRT-Connect算法实现类"""
 
-    def __init__(self, start, goal, config_space, step_size=0.5, max_iter=1000):
+    def __init__(self, start, goal, config_space, step_size=0.5, max_iter=1000, nn_index='kdtree'):
         """
         初始化RRT-Connect规划器
 
@@ -16,20 +16,19 @@ class RRTConnect(BaseRRT):
             config_space: 配置空间对象
             step_size: 扩展步长
             max_iter: 最大迭代次数
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
         """
-        super().__init__(start, goal, config_space, step_size, 0.0, max_iter)  # 不使用goal biasing
+        super().__init__(start, goal, config_space, step_size, 0.0, max_iter, nn_index)  # 不使用goal biasing
 
-        # 起点树
-        self.start_tree = {
-            'vertices': [self.start],
-            'parents': {0: None}
-        }
+        # 起点树就是基类的树，交换两棵树时self.tree始终指向以起点为根的树
+        self.start_tree = self.tree
 
         # 终点树
-        self.goal_tree = {
-            'vertices': [self.goal],
-            'parents': {0: None}
-        }
+        self.goal_tree = self.create_tree(self.goal)
+
+        # 两棵树当前是否处于交换状态（start_tree指向以终点为根的树）
+        # 每棵树自带节点数组和最近邻索引，交换时随树一起交换
+        self.trees_swapped = False
 
         # 连接点信息
         self.connection = {
@@ -42,17 +41,12 @@ class RRTConnect(BaseRRT):
         """重置规划器状态"""
         super().reset()
 
-        # 重置起点树
-        self.start_tree = {
-            'vertices': [self.start],
-            'parents': {0: None}
-        }
+        # 起点树就是基类重新创建的树
+        self.start_tree = self.tree
 
         # 重置终点树
-        self.goal_tree = {
-            'vertices': [self.goal],
-            'parents': {0: None}
-        }
+        self.goal_tree = self.create_tree(self.goal)
+        self.trees_swapped = False
 
         # 重置连接信息
         self.connection = {
@@ -61,6 +55,25 @@ class RRTConnect(BaseRRT):
             'goal_idx': None
         }
 
+    @property
+    def vertices(self):
+        """两棵树的所有节点 (N, 2)，以终点为根的树的节点排在后面"""
+        goal_tree = self.start_tree if self.trees_swapped else self.goal_tree
+        return np.vstack([self.tree.points, goal_tree.points])
+
+    @property
+    def edges(self):
+        """
+        两棵树的所有边 (E, 2)，以终点为根的树的索引整体偏移起点树的节点数
+        找到路径时包含连接两棵树的边
+        """
+        goal_tree = self.start_tree if self.trees_swapped else self.goal_tree
+        offset = len(self.tree)
+        edge_blocks = [self.tree.edges(), goal_tree.edges() + offset]
+        if self.connection['found']:
+            edge_blocks.append([[self.connection['start_idx'], self.connection['goal_idx'] + offset]])
+        return np.vstack(edge_blocks).astype(np.int64)
+
     def nearest_neighbor_in_tree(self, point, tree):
         """
         找到指定树中距离给定点最近的节点
@@ -72,10 +85,7 @@ class RRTConnect(BaseRRT):
         返回:
             nearest_idx: 最近节点的索引
         """
-        # 计算所有节点到给定点的距离
-        distances = [np.linalg.norm(np.array(v) - point) for v in tree['vertices']]
-        # 返回最小距离对应的索引
-        return np.argmin(distances)
+        return tree.indexes['nn'].nearest(point)
 
     def extend(self, tree, target):
         """
@@ -91,7 +101,7 @@ class RRTConnect(BaseRRT):
         """
         # 找到树中最近的节点
         nearest_idx = self.nearest_neighbor_in_tree(target, tree)
-        nearest_point = tree['vertices'][nearest_idx]
+        nearest_point = tree.points[nearest_idx]
 
         # 朝目标点方向扩展一步
         new_point = self.steer(nearest_point, target)
@@ -101,9 +111,8 @@ class RRTConnect(BaseRRT):
             return 'trapped', None
 
         # 将新节点添加到树中
-        tree['vertices'].append(new_point)
-        new_idx = len(tree['vertices']) - 1
-        tree['parents'][new_idx] = nearest_idx
+        cost = tree.costs[nearest_idx] + np.linalg.norm(new_point - nearest_point)
+        new_idx = tree.add(new_point, nearest_idx, cost)
 
         # 记录扩展历史
         self.expansion_history.append((nearest_idx, new_idx))
@@ -117,6 +126,7 @@ class RRTConnect(BaseRRT):
     def connect(self, tree, target):
         """
         将树持续朝目标点方向扩展，直到到达目标点或被阻挡
+        第一步之后新节点总在同一条直线上，不再查询最近邻，而是直接沿直线批量扩展
 
         参数:
             tree: 要扩展的树
@@ -133,20 +143,64 @@ class RRTConnect(BaseRRT):
         if status == 'trapped':
             return 'trapped', None
 
-        # 持续扩展，直到到达目标点或被阻挡
-        while status != 'reached':
-            status, newer_idx = self.extend(tree, target)
-            new_idx = newer_idx if newer_idx is not None else new_idx
+        # 第一步已经落在目标点上时，连线已经检测过，不需要再沿直线扩展
+        # （extend在距离目标不足一步时也返回reached，此时剩余的不足一步的连线仍需检测）
+        if status == 'reached' and np.array_equal(tree.points[new_idx], target):
+            return 'reached', new_idx
+
+        # 沿直线扩展剩余部分
+        return self.extend_along_line(tree, new_idx, target)
+
+    def extend_along_line(self, tree, from_idx, target):
+        """
+        从from_idx沿直线朝目标点按步长连续扩展，等价于反复调用extend，但只做一次整段碰撞检测
+        整段被阻挡时再批量检测每一步，保留第一个被阻挡步之前的节点
+        与目标点之间剩余的不足一步的连线同样需要无碰撞，才返回reached
+
+        参数:
+            tree: 要扩展的树
+            from_idx: 起始节点的索引
+            target: 目标点坐标
 
-            if status == 'trapped':
-                return 'trapped', new_idx
+        返回:
+            status: 扩展状态 ('reached', 'trapped')
+            last_idx: 最后扩展节点的索引
+        """
+        from_point = tree.points[from_idx]
+        direction = target - from_point
+        distance = np.linalg.norm(direction)
+
+        # 沿直线每隔step_size一个节点，最后一个节点到目标点的距离小于step_size
+        steps = int(distance // self.step_size)
+        if steps > 0:
+            offsets = np.arange(1, steps + 1)[:, None] * (self.step_size / distance)
+            waypoints = from_point + offsets * direction
+        else:
+            waypoints = np.empty((0, 2))
 
-        # 成功到达目标点
-        return 'reached', new_idx
+        # 整段无碰撞时一次性插入所有节点
+        if self.is_collision_free(from_point, target):
+            reachable = steps
+            status = 'reached'
+        else:
+            # 批量检测每一步及最后不足一步的连线，找到第一个被阻挡的线段
+            points = np.vstack([from_point, waypoints, target])
+            free = self.config_space.is_collision_free_batch(points[:-1], points[1:])
+            reachable = steps if free.all() else int(np.argmin(free))
+            status = 'trapped'
+
+        if reachable == 0:
+            return status, from_idx
+
+        indices = tree.add_chain(waypoints[:reachable], from_idx)
+        parents = np.concatenate([[from_idx], indices[:-1]])
+        self.expansion_history.extend(zip(parents.tolist(), indices.tolist()))
+        return status, int(indices[-1])
 
     def swap_trees(self):
-        """交换起点树和终点树"""
+        """交换起点树和终点树，树的节点数组和最近邻索引作为整体交换，不需要重建"""
         self.start_tree, self.goal_tree = self.goal_tree, self.start_tree
+        self.trees_swapped = not self.trees_swapped
 
     def extract_path_from_trees(self):
         """
@@ -160,19 +214,21 @@ class RRTConnect(BaseRRT):
         current = self.connection['start_idx']
 
         while current is not None:
-            start_path.append(self.start_tree['vertices'][current])
-            current = self.start_tree['parents'][current]
+            start_path.append(current)
+            current = self.start_tree.parent_of(current)
 
         # 路径是从连接点到起点的，需要反转
-        start_path = start_path[::-1]
+        start_path = list(self.start_tree.points[start_path[::-1]])
 
         # 从终点树中提取路径（从连接点到终点）
         goal_path = []
         current = self.connection['goal_idx']
 
         while current is not None:
-            goal_path.append(self.goal_tree['vertices'][current])
-            current = self.goal_tree['parents'][current]
+            goal_path.append(current)
+            current = self.goal_tree.parent_of(current)
+
+        goal_path = list(self.goal_tree.points[goal_path])
 
         # 合并路径
         return start_path + goal_path
@@ -193,8 +249,11 @@ class RRTConnect(BaseRRT):
 
         # 记录开始时间
         start_time = time.time()
+        self.start_stop_criteria(start_time)
 
         for i in range(self.max_iter):
+            if self.should_stop():
+                break
             self.iterations = i + 1
 
             # 1. 随机采样一个点
@@ -205,40 +264,30 @@ class RRTConnect(BaseRRT):
 
             # 如果成功扩展，则尝试将终点树连接到新节点
             if status_a != 'trapped' and new_a_idx is not None:
-                new_a_point = self.start_tree['vertices'][new_a_idx]
+                new_a_point = self.start_tree.points[new_a_idx]
                 status_b, new_b_idx = self.connect(self.goal_tree, new_a_point)
 
                 # 如果成功连接，则找到路径
                 if status_b == 'reached':
+                    # 连接时两棵树可能处于交换状态，先换回原来的方向再记录连接点
+                    if self.trees_swapped:
+                        self.swap_trees()
+                        new_a_idx, new_b_idx = new_b_idx, new_a_idx
                     self.connection['found'] = True
                     self.connection['start_idx'] = new_a_idx
                     self.connection['goal_idx'] = new_b_idx
+                    self.stop_reason = 'goal_reached'
                     break
 
             # 交换树，下次从终点树开始扩展
             self.swap_trees()
 
-        # 构建完整的顶点和边列表，用于可视化
-        all_vertices = self.start_tree['vertices'] + self.goal_tree['vertices']
-        all_edges = []
-
-        # 起点树的边
-        for child, parent in self.start_tree['parents'].items():
-            if parent is not None:
-                all_edges.append((parent, child))
-
-        # 终点树的边，需要偏移索引
-        offset = len(self.start_tree['vertices'])
-        for child, parent in self.goal_tree['parents'].items():
-            if parent is not None:
-                all_edges.append((parent + offset, child + offset))
+        # 未连接时两棵树也可能处于交换状态，换回原来的方向
+        if self.trees_swapped:
+            self.swap_trees()
 
-        # 如果成功找到路径，则添加连接两棵树的边
+        # 如果成功找到路径，则提取路径
         if self.connection['found']:
-            all_edges.append((self.connection['start_idx'],
-                              self.connection['goal_idx'] + offset))
-
-            # 提取路径
             self.path = self.extract_path_from_trees()
             self.path_length = self.calculate_path_length(self.path)
             self.success = True
@@ -249,8 +298,8 @@ class RRTConnect(BaseRRT):
         return {
             'success': self.success,
             'path': self.path,
-            'vertices': all_vertices,
-            'edges': all_edges,
+            'vertices': self.vertices,
+            'edges': self.edges,
             'planning_time': self.planning_time,
             'iterations': self.iterations,
             'expansion_history': self.expansion_history
@@ -265,7 +314,7 @@ class RRTConnect(BaseRRT):
         details = super().get_details()
         details["name"] = self.get_name()
         if self.success:
-            details["start_tree_size"] = len(self.start_tree['vertices'])
-            details["goal_tree_size"] = len(self.goal_tree['vertices'])
+            details["start_tree_size"] = len(self.start_tree)
+            details["goal_tree_size"] = len(self.goal_tree)
 
         return details
\ No newline at end of file
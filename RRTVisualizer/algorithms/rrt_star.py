@@ -2,19 +2,70 @@
 RRT* (RRT Star) 算法实现
 
 RRT*是RRT的改进版本，通过重布线和重组树结构，能够找到接近最优的路径。
-该实现包含了错误处理机制，解决了潜在的KeyError问题。
+节点的父节点和代价保存在共享的Tree数组中，每个节点始终有确定的代价。
+落在目标区域内的节点单独记录，重布线降低它们的代价后当前最优解随之更新，
+路径只在规划结束或需要中间解时提取。
+plan_anytime以生成器形式规划，最优解每次改进时产生一个解快照，便于尽早返回可行解并继续优化。
+
+懒惰碰撞检测模式下，插入节点时只检查节点本身，连线乐观地视为无碰撞，
+只有候选解路径上的边才会被检测；无效的边被移除后，为其子树重新寻找父节点。
+
+近邻范围可以是固定半径，也可以随节点数n收缩以保证渐近最优：
+半径 r(n) = γ·(log n / n)^(1/d) 或 k近邻 k(n) = k_RRT·log n，γ由自由空间面积确定。
+
+排序选父模式下，先计算所有候选父节点的代价并排序，按代价升序逐个检测连线，
+第一个无碰撞的候选即为父节点；重布线只检测能够降低代价且尚未检测过的近邻。
 """
 
+import math
 import numpy as np
 import time
 from .base_rrt import BaseRRT
+from .nearest_neighbors import create_near_index
+
+
+# 碰撞检测模式：eager 插入时检测所有连线，lazy 只检测候选解路径上的连线
+COLLISION_MODES = ('eager', 'lazy')
+
+# 懒惰模式下验证一条候选路径时，修复后重新验证的最大轮数
+MAX_LAZY_REPAIR_ROUNDS = 100
+
+# 选择父节点的方式：batch 批量检测所有近邻连线，sorted 按代价升序检测到第一个无碰撞的候选为止
+PARENT_SELECTIONS = ('batch', 'sorted')
+
+# 成功后可视化保留的边：path 只保留路径，neighbors 保留与路径节点相连的边，
+# budget 从路径开始逐层向外扩展，直到达到边数预算
+SIMPLIFY_LEVELS = ('path', 'neighbors', 'budget')
+
+# budget模式下默认保留的边数
+DEFAULT_EDGE_BUDGET = 500
+
+# 近邻范围：fixed 固定搜索半径，radius 随节点数收缩的半径，knearest 随节点数增长的k近邻
+NEIGHBORHOODS = ('fixed', 'radius', 'knearest')
+
+# 固定半径模式下近邻节点数量的上限
+MAX_NEAR_NODES = 50
+
+# 配置空间维度
+DIMENSION = 2
+
+# γ和k_RRT需严格大于理论下界，取下界乘以该系数
+NEIGHBORHOOD_MARGIN = 1.1
 
 
 class RRTStar(BaseRRT):
     """RRT*算法实现类"""
 
+    # 重布线降低节点代价后需要沿子节点邻接表更新整棵子树的代价
+    track_children = True
+
+    # 支持的碰撞检测模式
+    collision_modes = COLLISION_MODES
+
     def __init__(self, start, goal, config_space, step_size=0.5, goal_sample_rate=0.05,
-                 max_iter=1000, search_radius=1.0):
+                 max_iter=1000, search_radius=1.0, nn_index='kdtree', near_index='grid',
+                 collision_mode='eager', neighborhood='fixed', parent_selection='batch',
+                 simplify_level='neighbors', edge_budget=DEFAULT_EDGE_BUDGET):
         """
         初始化RRT*规划器
 
@@ -26,54 +77,162 @@ class RRTStar(BaseRRT):
             goal_sample_rate: 采样目标点的概率
             max_iter: 最大迭代次数
             search_radius: 近邻搜索半径
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
+            near_index: 近邻半径查询索引类型 ('grid' 或 'brute_force')
+            collision_mode: 碰撞检测模式 ('eager' 或 'lazy')
+            neighborhood: 近邻范围 ('fixed'、'radius' 或 'knearest')，radius模式以search_radius为半径上限
+            parent_selection: 选择父节点的方式 ('batch' 或 'sorted')
+            simplify_level: 找到路径后可视化保留的边 ('path'、'neighbors' 或 'budget')
+            edge_budget: budget模式下保留的边数
         """
-        super().__init__(start, goal, config_space, step_size, goal_sample_rate, max_iter)
+        if collision_mode not in self.collision_modes:
+            raise ValueError(f"Unknown collision mode: {collision_mode}")
+        if neighborhood not in NEIGHBORHOODS:
+            raise ValueError(f"Unknown neighborhood: {neighborhood}")
+        if parent_selection not in PARENT_SELECTIONS:
+            raise ValueError(f"Unknown parent selection: {parent_selection}")
+        if simplify_level not in SIMPLIFY_LEVELS:
+            raise ValueError(f"Unknown simplify level: {simplify_level}")
+
+        # 建树时需要用到近邻索引参数，因此先于基类初始化设置
         self.search_radius = search_radius
+        self.near_index = near_index
+        super().__init__(start, goal, config_space, step_size, goal_sample_rate, max_iter, nn_index)
 
-        # 存储从起点到每个节点的代价
-        self.costs = {0: 0.0}  # 起点的代价为0
+        self.collision_mode = collision_mode
+        self.neighborhood = neighborhood
+        self.parent_selection = parent_selection
+        self.simplify_level = simplify_level
+        self.edge_budget = edge_budget
+        self.reset_collision_stats()
+        self.reset_goal_tracking()
 
     def reset(self):
         """重置规划器状态"""
         super().reset()
-        self.costs = {0: 0.0}
+        self.reset_collision_stats()
+        self.reset_goal_tracking()
+
+    def reset_goal_tracking(self):
+        """重置目标区域节点集合和当前最优解"""
+        self.path_indices = []  # 最终路径上的节点索引
+        self.goal_nodes = []  # 落在目标区域内的节点索引
+        self.best_goal_idx = None  # 当前最优解的终点节点
+        self.best_cost = float('inf')  # 当前最优解的代价
+
+    def reset_collision_stats(self):
+        """重置碰撞检测统计和懒惰模式的边状态"""
+        self.collision_checks = 0  # 实际执行的线段碰撞检测次数
+        self.skipped_checks = 0  # 懒惰模式下插入时跳过的检测次数
+        self.lazy_checks = 0  # 懒惰模式下验证候选路径时补做的检测次数
+        self.invalidated_edges = 0  # 验证时发现的无效边数量
+
+        # 懒惰模式下已验证的边 {(parent, child)} 和已知无效的边
+        self.valid_edges = set()
+        self.invalid_edges = set()
+
+    def is_collision_free(self, from_point, to_point):
+        """
+        检查从from_point到to_point的路径是否无碰撞，并计入检测次数
 
-    def near_vertices(self, point, radius):
+        参数:
+            from_point: 起始点
+            to_point: 终点
+
+        返回:
+            bool: 是否无碰撞
         """
-        找到树中在给定半径内的所有节点
+        self.collision_checks += 1
+        return super().is_collision_free(from_point, to_point)
+
+    def create_tree(self, root):
+        """
+        创建树，并额外挂载近邻半径查询索引
+        search_radius可能在两次规划之间被修改，每次建树时按当前值确定网格单元大小
 
         参数:
-            point: 给定点坐标
-            radius: 搜索半径
+            root: 根节点坐标
 
         返回:
-            near_indices: 邻近节点的索引列表
+            tree: Tree对象
         """
-        near_indices = []
+        tree = super().create_tree(root)
+        tree.attach_index('near', create_near_index(self.near_index, self.search_radius))
+        return tree
 
-        # 优化：限制近邻节点的最大数量，防止在高密度区域产生过多近邻
-        max_near_nodes = 50  # 设置一个合理的上限
+    def sampling_volume(self):
+        """采样区域的体积μ(X_free)，用于确定收缩半径"""
+        return self.config_space.free_space_volume()
+
+    @property
+    def rrt_star_gamma(self):
+        """
+        收缩半径的系数 γ > 2·(1 + 1/d)^(1/d)·(μ(X_free) / ζ_d)^(1/d)
+        ζ_d为d维单位球体积
+        """
+        unit_ball = math.pi ** (DIMENSION / 2) / math.gamma(DIMENSION / 2 + 1)
+        return (NEIGHBORHOOD_MARGIN * 2 * (1 + 1 / DIMENSION) ** (1 / DIMENSION)
+                * (self.sampling_volume() / unit_ball) ** (1 / DIMENSION))
+
+    def neighbor_radius(self, n=None):
+        """
+        收缩半径 r(n) = γ·(log n / n)^(1/d)，限制在 [step_size, search_radius] 内
+        下限保证新节点扩展自的最近节点（距离不超过一个步长）始终在近邻中
+
+        参数:
+            n: 节点数量，None表示当前树的节点数
+
+        返回:
+            radius: 近邻搜索半径
+        """
+        n = len(self.tree) if n is None else n
+        if n < 2:
+            return self.search_radius
+        radius = self.rrt_star_gamma * (math.log(n) / n) ** (1 / DIMENSION)
+        return min(max(radius, self.step_size), self.search_radius)
+
+    def neighbor_count(self, n=None):
+        """
+        k近邻数量 k(n) = ceil(k_RRT·log n)，其中 k_RRT > e·(1 + 1/d)
+
+        参数:
+            n: 节点数量，None表示当前树的节点数
+
+        返回:
+            k: 近邻数量
+        """
+        n = len(self.tree) if n is None else n
+        k_rrt = NEIGHBORHOOD_MARGIN * math.e * (1 + 1 / DIMENSION)
+        return max(1, int(math.ceil(k_rrt * math.log(max(n, 1)))))
 
-        # 计算每个节点到point的距离
-        distances = []
-        for i, vertex in enumerate(self.vertices):
-            distance = np.linalg.norm(vertex - point)
-            if distance < radius:
-                distances.append((distance, i))
+    def near_vertices(self, point, radius):
+        """
+        按近邻范围设置找到树中的邻近节点
 
-        # 按距离排序
-        distances.sort()
+        参数:
+            point: 给定点坐标
+            radius: 搜索半径（收缩半径模式下作为上限，k近邻模式下不使用）
 
-        # 只保留最近的max_near_nodes个节点
-        for dist, idx in distances[:max_near_nodes]:
-            near_indices.append(idx)
+        返回:
+            near_indices: 按距离升序排列的邻近节点索引列表
+        """
+        index = self.tree.indexes['near']
 
-        return near_indices
+        if self.neighborhood == 'knearest':
+            # 查询点通常就是刚加入的新节点本身，多取一个以保证有k个其他节点
+            return index.k_nearest(point, self.neighbor_count() + 1)
+
+        if self.neighborhood == 'radius':
+            radius = min(radius, self.neighbor_radius())
+
+        # 优化：限制近邻节点的最大数量，防止在高密度区域产生过多近邻
+        # （Informed RRT*的节点集中在椭圆内，密度远高于均匀分布的假设）
+        # 网格索引只访问与搜索圆相交的单元，结果按距离升序排列
+        return index.within_radius(point, radius, MAX_NEAR_NODES)
 
     def new_cost(self, from_idx, to_point):
         """
         计算从起点经过from_idx节点到to_point的总代价
-        修复版本，处理KeyError问题
 
         参数:
             from_idx: 中间节点的索引
@@ -82,34 +241,363 @@ class RRTStar(BaseRRT):
         返回:
             cost: 总代价
         """
-        # 如果from_idx不在costs字典中，初始化它
-        if from_idx not in self.costs:
-            # 尝试计算从起点到该节点的成本
-            if from_idx != 0 and from_idx in self.parents:
-                parent_idx = self.parents[from_idx]
-                if parent_idx in self.costs:
-                    parent_cost = self.costs[parent_idx]
-                    edge_cost = np.linalg.norm(self.vertices[parent_idx] - self.vertices[from_idx])
-                    self.costs[from_idx] = parent_cost + edge_cost
-                else:
-                    # 如果父节点成本也未知，假设是无穷大，这样的路径就不会被选择
-                    self.costs[from_idx] = float('inf')
-                    print(f"警告: 节点 {from_idx} 的父节点 {parent_idx} 没有成本值")
-            else:
-                # 如果是起点或无法确定成本，设置为适当的值
-                self.costs[from_idx] = 0.0 if from_idx == 0 else float('inf')
-
         # 从起点到中间节点的代价
-        from_cost = self.costs[from_idx]
+        from_cost = self.tree.costs[from_idx]
         # 中间节点到目标点的代价（欧式距离）
         to_cost = np.linalg.norm(self.vertices[from_idx] - to_point)
 
         return from_cost + to_cost
 
-    def plan(self):
+    def near_collision_free(self, new_point, near_indices):
+        """
+        批量检查近邻节点到新节点的连线是否无碰撞
+
+        参数:
+            new_point: 新节点坐标
+            near_indices: 近邻节点的索引列表
+
+        返回:
+            collision_free: 与near_indices对齐的布尔数组
+        """
+        if not near_indices:
+            return np.zeros(0, dtype=bool)
+
+        # 懒惰模式下连线乐观地视为无碰撞，留到候选路径验证时再检测
+        if self.collision_mode == 'lazy':
+            self.skipped_checks += len(near_indices)
+            return np.ones(len(near_indices), dtype=bool)
+
+        self.collision_checks += len(near_indices)
+        return self.config_space.is_collision_free_batch(self.vertices[near_indices], new_point)
+
+    def choose_parent(self, new_point, near_indices, collision_free):
+        """
+        在近邻节点中选择使新节点代价最小的父节点
+
+        参数:
+            new_point: 新节点坐标
+            near_indices: 近邻节点的索引列表
+            collision_free: 与near_indices对齐的无碰撞标记
+
+        返回:
+            (min_idx, min_cost): 最优父节点索引和对应代价，没有可用父节点时min_idx为None
+        """
+        if not near_indices:
+            return None, float('inf')
+
+        # 一次性计算所有候选父节点的代价，有碰撞的候选视为无穷大
+        costs = self.tree.costs[near_indices] + self.tree.distances_to(new_point, near_indices)
+        costs = np.where(collision_free, costs, np.inf)
+
+        # argmin返回第一个最小值，与按near_indices顺序逐个比较的结果相同
+        best = int(np.argmin(costs))
+        if not costs[best] < np.inf:
+            return None, float('inf')
+        return near_indices[best], costs[best]
+
+    def choose_parent_sorted(self, new_point, near_indices):
+        """
+        按候选代价升序检测连线，选择第一个无碰撞的近邻作为父节点
+        稳定排序保证代价相同时按near_indices顺序选择，结果与批量检测后取最小值相同
+
+        参数:
+            new_point: 新节点坐标
+            near_indices: 近邻节点的索引列表
+
+        返回:
+            (min_idx, min_cost, order, collision_free, checked):
+                min_idx, min_cost: 最优父节点索引和对应代价，没有可用父节点时min_idx为None
+                order: 候选按代价升序排列的位置数组
+                collision_free: 与near_indices对齐的无碰撞标记，只有checked为True的位置有效
+                checked: 与near_indices对齐的布尔数组，标记已检测过的连线
+        """
+        count = len(near_indices)
+        collision_free = np.zeros(count, dtype=bool)
+        checked = np.zeros(count, dtype=bool)
+        if not count:
+            return None, float('inf'), np.zeros(0, dtype=np.int64), collision_free, checked
+
+        costs = self.tree.costs[near_indices] + self.tree.distances_to(new_point, near_indices)
+        order = np.argsort(costs, kind='stable')
+
+        for position in order.tolist():
+            if not costs[position] < np.inf:
+                break  # 其余候选与起点不连通
+            checked[position] = True
+            near_idx = near_indices[position]
+            if self.is_collision_free(self.vertices[near_idx], new_point):
+                collision_free[position] = True
+                return near_idx, costs[position], order, collision_free, checked
+
+        return None, float('inf'), order, collision_free, checked
+
+    def expand(self, rand_point, search_radius):
+        """
+        朝采样点扩展一个新节点：选择代价最小的父节点，并用新节点重布线近邻节点
+
+        参数:
+            rand_point: 采样点
+            search_radius: 近邻搜索半径
+
+        返回:
+            new_idx: 新节点的索引，扩展失败时返回None
+        """
+        # 2. 找到树中最近的节点
+        nearest_idx = self.nearest_neighbor(rand_point)
+        nearest_point = self.vertices[nearest_idx]
+
+        # 3. 朝随机点方向扩展一步
+        new_point = self.steer(nearest_point, rand_point)
+
+        # 4. 检查是否无碰撞（懒惰模式下只检查新节点本身）
+        if self.collision_mode == 'lazy':
+            if (not self.config_space.is_in_bounds(new_point) or
+                    self.config_space.is_point_in_obstacle(new_point)):
+                return None
+            self.skipped_checks += 1
+        elif not self.is_collision_free(nearest_point, new_point):
+            return None
+
+        # 5. 将新节点添加到树中，父节点确定前代价为无穷大
+        new_idx = self.add_vertex(new_point, None, float('inf'))
+
+        # 6. 找到新节点附近的节点
+        near_indices = self.near_vertices(new_point, search_radius)
+
+        # 7. 选择最优父节点（能够最小化从起点到新节点的代价）
+        order = checked = None
+        if self.parent_selection == 'sorted' and self.collision_mode == 'eager':
+            # 按代价升序检测，找到第一个无碰撞的候选即停止；检测结果和顺序在重布线时复用
+            min_idx, min_cost, order, collision_free, checked = self.choose_parent_sorted(new_point, near_indices)
+        else:
+            # 近邻节点与新节点之间的连线只做一次批量碰撞检测，重布线时复用
+            collision_free = self.near_collision_free(new_point, near_indices)
+            min_idx, min_cost = self.choose_parent(new_point, near_indices, collision_free)
+
+        # 如果没有找到有效的父节点，使用最近的节点作为父节点
+        if min_idx is None:
+            min_idx = nearest_idx
+            min_cost = self.new_cost(nearest_idx, new_point)
+
+        # 更新父节点和代价
+        self.tree.set_parent(new_idx, min_idx)
+        self.tree.costs[new_idx] = min_cost
+
+        # 记录扩展历史，用于可视化
+        self.expansion_history.append((min_idx, new_idx))
+
+        # 8. 重布线：检查是否可以通过新节点改进近邻节点的路径
+        self.rewire(new_idx, near_indices, collision_free, checked, order)
+
+        return new_idx
+
+    def validate_path(self, goal_idx):
+        """
+        验证从起点到goal_idx的路径上的连线
+        懒惰模式下批量检测尚未验证的边，无效的边被移除并修复其子树后重新验证
+
+        参数:
+            goal_idx: 路径终点的节点索引
+
+        返回:
+            bool: 路径是否与起点连通且所有连线无碰撞
+        """
+        if self.collision_mode != 'lazy':
+            return True
+
+        for _ in range(MAX_LAZY_REPAIR_ROUNDS):
+            chain = self.tree.path_to_root(goal_idx)
+            if chain[-1] != 0:
+                return False  # 与起点断开
+
+            # 路径上尚未验证的边，从起点一侧开始排列
+            pending = [(parent, child) for child, parent in zip(chain[-2::-1], chain[:0:-1])
+                       if (parent, child) not in self.valid_edges]
+            if not pending:
+                return True
+
+            parents, children = zip(*pending)
+            free = self.config_space.is_collision_free_batch(self.vertices[list(parents)],
+                                                             self.vertices[list(children)])
+            self.collision_checks += len(pending)
+            self.lazy_checks += len(pending)
+
+            invalid = []
+            for edge, edge_free in zip(pending, free):
+                if edge_free:
+                    self.valid_edges.add(edge)
+                else:
+                    invalid.append(edge)
+            if not invalid:
+                return True
+
+            for parent, child in invalid:
+                self.invalid_edges.add((parent, child))
+                self.invalidated_edges += 1
+                self.repair_subtree(child)
+
+        return False
+
+    def add_goal_node(self, idx):
+        """
+        新节点落在目标区域内时加入目标节点集合
+
+        参数:
+            idx: 节点索引
+
+        返回:
+            bool: 是否加入
+        """
+        if not self.is_goal_reached(self.vertices[idx]):
+            return False
+        self.goal_nodes.append(idx)
+        return True
+
+    def update_best_solution(self):
+        """
+        在目标节点集合中重新选出代价最小的节点作为当前最优解
+        代价随重布线和代价传递实时更新，每次只需比较目标节点的代价，复杂度为O(|目标节点|)；
+        懒惰模式下候选解需通过路径验证，验证修复后代价变化则重新选择
+
+        返回:
+            bool: 最优解代价是否降低
+        """
+        if not self.goal_nodes:
+            return False
+
+        nodes = np.asarray(self.goal_nodes, dtype=np.int64)
+        best_idx, best_cost = None, float('inf')
+        for _ in range(MAX_LAZY_REPAIR_ROUNDS):
+            costs = self.tree.costs[nodes]
+            position = int(np.argmin(costs))
+            if not costs[position] < np.inf:
+                break
+            idx, cost = int(nodes[position]), float(costs[position])
+            # 最优节点和代价都没有变化时，其路径已经验证过
+            if (idx == self.best_goal_idx and cost == self.best_cost) or self.validate_path(idx):
+                best_idx, best_cost = idx, cost
+                break
+
+        previous = self.best_cost
+        self.best_goal_idx, self.best_cost = best_idx, best_cost
+        return best_cost < previous
+
+    def current_solution(self):
+        """
+        提取当前最优解的路径，用于获取规划过程中的中间解
+
+        返回:
+            (path, cost): 路径点列表和代价，尚未找到解时为 ([], inf)
+        """
+        if self.best_goal_idx is None:
+            return [], float('inf')
+        return self.extract_path(self.best_goal_idx), self.best_cost
+
+    def remove_nodes(self, mask):
+        """
+        从树中删除节点及其后代，并按新编号更新规划器中保存的节点索引
+
+        参数:
+            mask: 长度为节点数的布尔数组，True表示删除
+
+        返回:
+            removed: 实际删除的节点数量
+        """
+        size = len(self.tree)
+        remap = self.tree.remove(mask)
+        removed = size - len(self.tree)
+        if removed:
+            self.remap_node_indices(remap)
+        return removed
+
+    def remap_node_indices(self, remap):
+        """
+        删除节点后按新编号更新规划器中保存的节点索引
+
+        参数:
+            remap: 旧索引到新索引的映射数组，被删除的节点为-1
+        """
+        goal_nodes = remap[np.asarray(self.goal_nodes, dtype=np.int64)]
+        self.goal_nodes = goal_nodes[goal_nodes >= 0].tolist()
+        if self.best_goal_idx is not None:
+            best = int(remap[self.best_goal_idx])
+            self.best_goal_idx = best if best >= 0 else None
+            if self.best_goal_idx is None:
+                self.best_cost = float('inf')
+        path_indices = remap[np.asarray(self.path_indices, dtype=np.int64)]
+        self.path_indices = path_indices.tolist() if (path_indices >= 0).all() else []
+
+        # 懒惰模式的边状态和扩展历史只保留两端都未被删除的边
+        def remap_edges(edges):
+            if not len(edges):
+                return np.zeros((0, 2), dtype=np.int64)
+            edges = remap[np.asarray(edges, dtype=np.int64)]
+            return edges[(edges >= 0).all(axis=1)]
+
+        self.valid_edges = set(map(tuple, remap_edges(list(self.valid_edges)).tolist()))
+        self.invalid_edges = set(map(tuple, remap_edges(list(self.invalid_edges)).tolist()))
+        self.expansion_history = list(map(tuple, remap_edges(self.expansion_history).tolist()))
+
+    def solution_snapshot(self, start_time):
+        """
+        生成当前最优解的快照
+
+        参数:
+            start_time: 规划开始时间
+
+        返回:
+            snapshot: 包含路径、代价、迭代次数、已用时间和节点数量的字典
+        """
+        path, cost = self.current_solution()
+        return {
+            'path': path,
+            'cost': cost,
+            'iteration': self.iterations,
+            'elapsed': time.time() - start_time,
+            'nodes': len(self.tree)
+        }
+
+    def repair_subtree(self, idx):
+        """
+        移除idx到父节点的无效连线，并为以idx为根的子树重新选择父节点
+        新父节点从近邻中不属于该子树、且连线未知无效的节点里按代价选取（仍是乐观选择）；
+        找不到时子树与起点断开，代价为无穷大，等待后续重布线重新接入
+
+        参数:
+            idx: 子树根节点索引
+        """
+        tree = self.tree
+        levels = tree.subtree_levels(idx)
+        in_subtree = np.zeros(len(tree), dtype=bool)
+        for level in levels:
+            in_subtree[level] = True
+
+        tree.set_parent(idx, None)
+        tree.costs[idx] = float('inf')
+
+        point = self.vertices[idx]
+        near = np.asarray(self.near_vertices(point, self.search_radius), dtype=np.int64)
+        if len(near):
+            costs = tree.costs[near] + tree.distances_to(point, near)
+            usable = ~in_subtree[near] & np.isfinite(costs)
+            usable &= np.array([(int(n), idx) not in self.invalid_edges for n in near], dtype=bool)
+            if usable.any():
+                best = int(np.argmin(np.where(usable, costs, np.inf)))
+                new_parent = int(near[best])
+                tree.set_parent(idx, new_parent)
+                tree.costs[idx] = costs[best]
+                self.expansion_history.append((new_parent, idx))
+
+        # 子树中其余节点的代价随子树根节点更新
+        tree.propagate_costs(idx)
+
+    def plan(self, on_solution=None):
         """
         执行RRT*规划算法
 
+        参数:
+            on_solution: 最优解改进时调用的回调函数，参数为解快照（见solution_snapshot），None表示不回调
+
         返回:
             success: 是否成功找到路径
             path: 找到的路径 (如果成功)
@@ -117,152 +605,171 @@ class RRTStar(BaseRRT):
             edges: 树的所有边
             planning_time: 规划耗时
         """
+        solutions = self.plan_anytime()
+        while True:
+            try:
+                snapshot = next(solutions)
+            except StopIteration as stop:
+                return stop.value
+            if on_solution is not None:
+                on_solution(snapshot)
+
+    def plan_anytime(self):
+        """
+        以生成器形式执行RRT*规划算法，每当最优解代价降低时产生一个解快照
+        生成器结束时的返回值与plan()的返回值相同
+
+        产生:
+            snapshot: 解快照（见solution_snapshot）
+        """
         # 重置规划器状态
         self.reset()
 
         # 记录开始时间
         start_time = time.time()
+        self.start_stop_criteria(start_time)
 
         # 动态调整搜索半径（可选）
         # 随着节点数量的增加，搜索半径可以适当减小
         search_radius = self.search_radius
 
         for i in range(self.max_iter):
+            # 时间预算用完或最优解代价在窗口内不再明显改进时提前停止
+            if self.should_stop(self.best_cost):
+                break
             self.iterations = i + 1
 
             # 1. 随机采样一个点
             rand_point = self.random_sample()
 
-            # 2. 找到树中最近的节点
-            nearest_idx = self.nearest_neighbor(rand_point)
-            nearest_point = self.vertices[nearest_idx]
-
-            # 3. 朝随机点方向扩展一步
-            new_point = self.steer(nearest_point, rand_point)
-
-            # 4. 检查是否无碰撞
-            if not self.is_collision_free(nearest_point, new_point):
+            # 2-8. 扩展、选择父节点并重布线
+            new_idx = self.expand(rand_point, search_radius)
+            if new_idx is None:
                 continue
 
-            # 5. 将新节点添加到树中
-            self.vertices.append(new_point)
-            new_idx = len(self.vertices) - 1
-
-            # 确保新节点在costs字典中初始化
-            self.costs[new_idx] = float('inf')  # 初始设置为无穷大
-
-
-            # 确保初始化新节点的成本
-            if new_idx not in self.costs:
-                self.costs[new_idx] = float('inf')  # 初始设置为无穷大
-
-            # 6. 找到新节点附近的节点
-            near_indices = self.near_vertices(new_point, search_radius)
-
-            # 7. 选择最优父节点（能够最小化从起点到新节点的代价）
-            min_cost = float('inf')
-            min_idx = None
-
-            for near_idx in near_indices:
-                # 检查从near_idx到new_point是否无碰撞
-                if not self.is_collision_free(self.vertices[near_idx], new_point):
-                    continue
-
-                try:
-                    # 计算经过近邻节点到新节点的代价
-                    cost = self.new_cost(near_idx, new_point)
-
-                    if cost < min_cost:
-                        min_cost = cost
-                        min_idx = near_idx
-                except Exception as e:
-                    print(f"计算代价时出错: {str(e)}")
-                    continue
-
-            # 如果没有找到有效的父节点，使用最近的节点作为父节点
-            if min_idx is None:
-                min_idx = nearest_idx
-                try:
-                    min_cost = self.new_cost(nearest_idx, new_point)
-                except Exception as e:
-                    print(f"计算最近节点代价时出错: {str(e)}")
-                    # 使用启发式估计替代
-                    min_cost = self.costs.get(nearest_idx, 0.0) + np.linalg.norm(nearest_point - new_point)
-
-            # 更新父节点和代价
-            self.parents[new_idx] = min_idx
-            self.edges.append((min_idx, new_idx))
-            self.costs[new_idx] = min_cost
-
-            # 记录扩展历史，用于可视化
-            self.expansion_history.append((min_idx, new_idx))
-
-            # 8. 重布线：检查是否可以通过新节点改进近邻节点的路径
-            self.rewire(new_idx, near_indices)
-
-            # 9. 检查是否达到目标
-            if self.is_goal_reached(new_point):
-                # 提取路径
-                self.path = self.extract_path(new_idx)
-                self.path_length = self.calculate_path_length(self.path)
+            # 9. 记录到达目标区域的节点，并更新当前最优解（懒惰模式下需先验证路径上的连线）
+            self.add_goal_node(new_idx)
+            improved = self.update_best_solution()
+            if self.best_goal_idx is not None:
                 self.success = True
 
                 # 每隔200次迭代周期性打印信息
                 if i % 200 == 0:
-                    print(f"迭代 {i}, 当前路径长度: {self.path_length:.2f}")
+                    print(f"迭代 {i}, 当前路径长度: {self.best_cost:.2f}")
 
                 # 不退出，继续优化 - 注释掉break允许算法继续寻找更优解
                 # break
 
+            # 最优解改进时产生快照
+            if improved:
+                yield self.solution_snapshot(start_time)
+
+        # 只在规划结束时提取一次最优路径（懒惰模式下已找到的解可能在验证后失效）
+        self.success = self.best_goal_idx is not None
+        if self.success:
+            self.path, self.path_indices = self.extract_path(self.best_goal_idx, return_indices=True)
+            self.path_length = self.calculate_path_length(self.path)
+
         # 记录规划耗时
         self.planning_time = time.time() - start_time
 
         # 打印最终的统计信息
         print(f"RRT*规划完成:")
-        print(f"  总迭代次数: {self.iterations}")
+        print(f"  碰撞检测模式: {self.collision_mode}, 检测次数: {self.collision_checks}")
+        print(f"  总迭代次数: {self.iterations}, 停止原因: {self.stop_reason}")
         print(f"  节点数量: {len(self.vertices)}")
         print(f"  找到路径: {self.success}")
         print(f"  路径长度: {self.path_length if self.success else 'N/A'}")
         print(f"  规划时间: {self.planning_time:.3f}秒")
         # 如果成功找到路径，简化树结构以减少视觉杂乱
-        if self.success:
-            self.simplify_tree_for_visualization()
+        edges = self.simplify_tree_for_visualization() if self.success else self.edges
         return {
             'success': self.success,
             'path': self.path,
             'vertices': self.vertices,
-            'edges': self.edges,
+            'edges': edges,
             'planning_time': self.planning_time,
             'iterations': self.iterations,
             'expansion_history': self.expansion_history
         }
 
-    def simplify_tree_for_visualization(self):
+    def get_details(self):
+        """返回算法详细信息"""
+        details = super().get_details()
+        details["collision_mode"] = self.collision_mode
+        details["neighborhood"] = self.neighborhood
+        details["parent_selection"] = self.parent_selection
+        details["simplify_level"] = self.simplify_level
+        if self.neighborhood == 'radius':
+            details["neighbor_radius"] = self.neighbor_radius()
+        elif self.neighborhood == 'knearest':
+            details["neighbor_count"] = self.neighbor_count()
+        details["collision_checks"] = self.collision_checks
+        details["collision_checks_saved"] = max(self.skipped_checks - self.lazy_checks, 0)
+        details["invalidated_edges"] = self.invalidated_edges
+        details["goal_nodes"] = len(self.goal_nodes)
+        return details
+
+    def simplify_tree_for_visualization(self, level=None):
         """
-        简化树结构以减少视觉杂乱 - 简单版本
-        只保留最终路径和对路径有直接贡献的边
+        简化树结构以减少视觉杂乱
+        用路径节点索引构造布尔掩码，对边数组做向量化筛选
+
+        参数:
+            level: 简化级别 ('path'、'neighbors' 或 'budget')，None表示使用simplify_level
+
+        返回:
+            edges: 简化后的边数组 (E, 2)
         """
-        if not self.success or not self.path:
-            return  # 如果没有找到路径，不需要简化
+        if not self.success or not self.path_indices:
+            return self.edges  # 如果没有找到路径，不需要简化
 
-        # 1. 找出路径上的所有点的索引
-        path_vertices = set()
-        for path_point in self.path:
-            for i, vertex in enumerate(self.vertices):
-                if np.array_equal(path_point, vertex):
-                    path_vertices.add(i)
-                    break
+        on_path = np.zeros(len(self.tree), dtype=bool)
+        on_path[self.path_indices] = True
+        return self.filter_edges_by_path(self.edges, on_path, level)
 
-        # 2. 只保留路径上的点相关的边
-        simplified_edges = []
-        for edge in self.edges:
-            if edge[0] in path_vertices or edge[1] in path_vertices:
-                simplified_edges.append(edge)
+    def filter_edges_by_path(self, edges, on_path, level=None):
+        """
+        按简化级别筛选与路径相关的边
 
-        # 3. 更新边集合
-        self.edges = simplified_edges
+        参数:
+            edges: 边数组 (E, 2)
+            on_path: 长度为节点数的布尔数组，标记路径上的节点
+            level: 简化级别 ('path'、'neighbors' 或 'budget')，None表示使用simplify_level
 
-    def rewire(self, new_idx, near_indices):
+        返回:
+            edges: 筛选后的边数组
+        """
+        level = level or self.simplify_level
+        if level not in SIMPLIFY_LEVELS:
+            raise ValueError(f"Unknown simplify level: {level}")
+
+        parent_on_path = on_path[edges[:, 0]]
+        child_on_path = on_path[edges[:, 1]]
+
+        # 1. 只保留路径本身的边（树中两端都在同一条根路径上的边必然相邻）
+        if level == 'path':
+            return edges[parent_on_path & child_on_path]
+
+        # 2. 保留路径上的点相关的边
+        if level == 'neighbors':
+            return edges[parent_on_path | child_on_path]
+
+        # 3. 路径的边总是保留，其余的边按与路径的跳数逐层加入，直到达到预算
+        selected = parent_on_path & child_on_path
+        reached = on_path.copy()
+        remaining = self.edge_budget - int(np.count_nonzero(selected))
+        while remaining > 0:
+            layer = np.flatnonzero(~selected & (reached[edges[:, 0]] | reached[edges[:, 1]]))
+            if not len(layer):
+                break
+            layer = layer[:remaining]
+            selected[layer] = True
+            reached[edges[layer].ravel()] = True
+            remaining -= len(layer)
+        return edges[selected]
+
+    def rewire(self, new_idx, near_indices, collision_free=None, checked=None, order=None):
         """
         重布线操作：检查是否可以通过新节点来改进近邻节点的路径
         修复版本，确保数据结构一致性
@@ -270,83 +777,70 @@ class RRTStar(BaseRRT):
         参数:
             new_idx: 新节点的索引
             near_indices: 近邻节点的索引列表
+            collision_free: 与near_indices对齐的无碰撞标记，None时在此处批量检测
+            checked: 与near_indices对齐的已检测标记，None表示collision_free全部有效；
+                     未检测的连线只在能够降低代价时才批量检测
+            order: 处理近邻的位置顺序，None表示按near_indices顺序
         """
-        new_point = self.vertices[new_idx]
+        if not near_indices:
+            return
 
-        for near_idx in near_indices:
-            # 跳过自身
-            if near_idx == new_idx:
+        new_point = self.vertices[new_idx]
+        if collision_free is None:
+            collision_free = self.near_collision_free(new_point, near_indices)
+
+        # 一次性计算经过新节点到各近邻节点的代价，筛选出能够改进的节点
+        costs = self.tree.costs
+        near = np.asarray(near_indices)
+        candidate_costs = costs[new_idx] + self.tree.distances_to(new_point, near)
+        improved = (near != new_idx) & (candidate_costs < costs[near])
+
+        if checked is not None:
+            pending = improved & ~checked
+            if pending.any():
+                collision_free = collision_free.copy()
+                collision_free[pending] = self.near_collision_free(new_point, near[pending].tolist())
+        improved &= collision_free
+
+        # 按给定顺序处理：按代价升序时祖先节点先被重布线，后代节点的代价经传递降低后可能无需再重布线
+        if order is not None:
+            improved_positions = order[improved[order]]
+        else:
+            improved_positions = np.flatnonzero(improved)
+
+        for near_idx, cost in zip(near[improved_positions].tolist(), candidate_costs[improved_positions]):
+            # 前面的重布线可能已经通过代价传递降低了该节点的代价
+            if not cost < costs[near_idx]:
                 continue
 
-            # 确保costs字典中包含near_idx
-            if near_idx not in self.costs:
-                # 如果没有cost，计算一个初始成本
-                parent = self.parents.get(near_idx)
-                if parent is not None and parent in self.costs:
-                    self.costs[near_idx] = self.costs[parent] + np.linalg.norm(
-                        self.vertices[parent] - self.vertices[near_idx]
-                    )
-                else:
-                    # 无法确定路径成本，设置为无穷大
-                    self.costs[near_idx] = float('inf')
-                    print(f"警告: 重布线中节点 {near_idx} 的父节点 {parent} 没有成本值")
+            try:
+                # 保存旧父节点以便回滚
+                old_parent = self.tree.parent_of(near_idx)
+                old_cost = costs[near_idx]
 
-            # 检查从new_idx到near_idx是否无碰撞
-            if not self.is_collision_free(new_point, self.vertices[near_idx]):
-                continue
+                # 原子化更新操作：边由父节点数组导出，只需修改父节点和代价，均为O(1)
+                # 1. 更新父节点引用
+                self.tree.set_parent(near_idx, new_idx)
 
-            try:
-                # 确保new_idx在costs字典中
-                if new_idx not in self.costs:
-                    parent = self.parents.get(new_idx)
-                    if parent is not None and parent in self.costs:
-                        self.costs[new_idx] = self.costs[parent] + np.linalg.norm(
-                            self.vertices[parent] - self.vertices[new_idx]
-                        )
-                    else:
-                        self.costs[new_idx] = float('inf')
-                        print(f"警告: 重布线中节点 {new_idx} 的父节点 {parent} 没有成本值")
-
-                # 计算经过新节点到近邻节点的代价
-                cost = self.costs[new_idx] + np.linalg.norm(new_point - self.vertices[near_idx])
-
-                # 如果代价更低，则更新父节点和代价
-                if cost < self.costs[near_idx]:
-                    # 保存旧父节点以便回滚
-                    old_parent = self.parents[near_idx]
-                    old_cost = self.costs[near_idx]
-
-                    # 原子化更新操作
-                    # 1. 更新父节点引用
-                    self.parents[near_idx] = new_idx
-
-                    # 2. 更新边集合 - 先创建新集合再赋值，避免中间状态
-                    new_edges = [(p, c) for (p, c) in self.edges if c != near_idx]
-                    new_edges.append((new_idx, near_idx))
-                    self.edges = new_edges
-
-                    # 3. 更新代价
-                    self.costs[near_idx] = cost
-
-                    # 4. 记录重布线历史
-                    self.expansion_history.append((new_idx, near_idx))
-
-                    # 验证更新是否成功
-                    if near_idx not in self.parents or self.parents[near_idx] != new_idx:
-                        print(f"错误: 更新父节点失败 - 节点 {near_idx}")
-                        # 回滚更改
-                        self.parents[near_idx] = old_parent
-                        self.costs[near_idx] = old_cost
-                        self.edges = [(p, c) for (p, c) in self.edges if c != near_idx]
-                        if old_parent is not None:
-                            self.edges.append((old_parent, near_idx))
+                # 2. 更新代价，并将代价的降低量传递给所有后代节点
+                costs[near_idx] = cost
+                self.tree.propagate_costs(near_idx)
+
+                # 3. 记录重布线历史
+                self.expansion_history.append((new_idx, near_idx))
+
+                # 验证更新是否成功
+                if self.tree.parent_of(near_idx) != new_idx:
+                    print(f"错误: 更新父节点失败 - 节点 {near_idx}")
+                    # 回滚更改
+                    self.tree.set_parent(near_idx, old_parent)
+                    costs[near_idx] = old_cost
+                    self.tree.propagate_costs(near_idx)
 
             except Exception as e:
                 print(f"重布线过程出现异常: {e}")
                 # 任何异常情况下，确保数据一致性
                 if 'old_parent' in locals() and 'old_cost' in locals():
-                    self.parents[near_idx] = old_parent
-                    self.costs[near_idx] = old_cost
-                    self.edges = [(p, c) for (p, c) in self.edges if c != near_idx]
-                    if old_parent is not None:
-                        self.edges.append((old_parent, near_idx))
\ No newline at end of file
+                    self.tree.set_parent(near_idx, old_parent)
+                    costs[near_idx] = old_cost
+                    self.tree.propagate_costs(near_idx)
@@ -0,0 +1,367 @@
+"""
+RRT*-Connect 算法实现
+
+双向渐近最优规划器：起点树和终点树交替扩展，每棵树都按RRT*的方式选择父节点和重布线。
+一棵树扩展出新节点后，另一棵树以RRT*的方式逐步朝该节点贪心连接；连接成功时两棵树之间
+形成一座"桥"，所有桥中经过两侧代价之和最小的一座即为当前最优解。
+与RRT-Connect一样能快速找到初始解，之后像Informed RRT*一样只在椭圆内采样，
+并可周期性地剪枝，使解持续改进。
+
+两棵树交换时，树的节点数组、空间索引和扩展历史作为整体交换，self.tree始终指向当前扩展的树，
+因此RRT*的扩展、选择父节点和重布线可以直接复用。
+"""
+
+import numpy as np
+import time
+from .informed_rrt import InformedRRT, PRUNE_TOLERANCE
+from .rrt_star import DEFAULT_EDGE_BUDGET
+
+
+class RRTStarConnect(InformedRRT):
+    """RRT*-Connect算法实现类"""
+
+    # 桥的两端分别属于两棵树，懒惰模式的边验证只针对单棵树，因此只支持立即检测
+    collision_modes = ('eager',)
+
+    def __init__(self, start, goal, config_space, step_size=0.5, goal_sample_rate=0.0,
+                 max_iter=1000, search_radius=1.0, nn_index='kdtree', near_index='grid',
+                 collision_mode='eager', neighborhood='fixed', parent_selection='batch',
+                 simplify_level='neighbors', edge_budget=DEFAULT_EDGE_BUDGET, prune_interval=None):
+        """
+        初始化RRT*-Connect规划器
+
+        参数:
+            start: 起始点坐标 [x, y]
+            goal: 目标点坐标 [x, y]
+            config_space: 配置空间对象
+            step_size: 扩展步长
+            goal_sample_rate: 采样目标点的概率，双向扩展时通常不需要
+            max_iter: 最大迭代次数
+            search_radius: 近邻搜索半径
+            nn_index: 最近邻索引类型 ('kdtree' 或 'brute_force')
+            near_index: 近邻半径查询索引类型 ('grid' 或 'brute_force')
+            collision_mode: 碰撞检测模式，只支持 'eager'
+            neighborhood: 近邻范围 ('fixed'、'radius' 或 'knearest')
+            parent_selection: 选择父节点的方式 ('batch' 或 'sorted')
+            simplify_level: 找到路径后可视化保留的边 ('path'、'neighbors' 或 'budget')
+            edge_budget: budget模式下保留的边数
+            prune_interval: 找到解后每隔多少次迭代剪枝一次，None或0表示不剪枝
+        """
+        super().__init__(start, goal, config_space, step_size, goal_sample_rate, max_iter, search_radius,
+                         nn_index, near_index, collision_mode, neighborhood, parent_selection,
+                         simplify_level, edge_budget, prune_interval)
+        self.reset_trees()
+
+    def reset(self):
+        """重置规划器状态"""
+        super().reset()
+        self.reset_trees()
+
+    def reset_trees(self):
+        """以基类创建的树作为起点树，新建终点树，并清空桥"""
+        # 当前扩展的树（start_tree）和另一棵树（goal_tree）及各自的扩展历史
+        self.start_tree = self.tree
+        self.goal_tree = self.create_tree(self.goal)
+        self.start_history = self.expansion_history
+        self.goal_history = []
+
+        # 两棵树当前是否处于交换状态（start_tree指向以终点为根的树）
+        self.trees_swapped = False
+
+        # 连接两棵树的桥 [(起点树节点, 终点树节点)] 和当前最优的桥
+        self.bridges = []
+        self.best_bridge = None
+
+    def swap_trees(self):
+        """交换当前扩展的树和另一棵树，节点数组、空间索引和扩展历史随树一起交换"""
+        self.start_tree, self.goal_tree = self.goal_tree, self.start_tree
+        self.start_history, self.goal_history = self.goal_history, self.start_history
+        self.trees_swapped = not self.trees_swapped
+        self.tree = self.start_tree
+        self.expansion_history = self.start_history
+
+    def tree_pair(self):
+        """
+        按原始方向返回两棵树
+
+        返回:
+            (start_tree, goal_tree): 以起点为根的树和以终点为根的树
+        """
+        if self.trees_swapped:
+            return self.goal_tree, self.start_tree
+        return self.start_tree, self.goal_tree
+
+    def connect(self, target, search_radius):
+        """
+        将当前树以RRT*的方式持续朝目标点扩展，直到到达目标点或被阻挡
+        每一步都选择父节点并重布线；新节点到目标点的距离每步至少缩短一个步长，因此必然终止
+
+        参数:
+            target: 目标点坐标
+            search_radius: 近邻搜索半径
+
+        返回:
+            status: 扩展状态 ('reached', 'trapped')
+            last_idx: 最后扩展节点的索引，没有扩展出节点时为None
+        """
+        last_idx = None
+        while True:
+            new_idx = self.expand(target, search_radius)
+            if new_idx is None:
+                return 'trapped', last_idx
+            last_idx = new_idx
+
+            # 距离不足一个步长时steer直接返回目标点，新节点与目标点重合
+            if np.array_equal(self.vertices[new_idx], target):
+                return 'reached', new_idx
+
+    def add_bridge(self, other_idx, active_idx):
+        """
+        记录连接两棵树的桥
+
+        参数:
+            other_idx: 另一棵树（goal_tree）中的节点索引
+            active_idx: 当前扩展的树（start_tree）中的节点索引
+        """
+        if self.trees_swapped:
+            self.bridges.append((other_idx, active_idx))
+        else:
+            self.bridges.append((active_idx, other_idx))
+
+    def bridge_costs(self, bridges):
+        """
+        计算经过各座桥的路径代价：两侧的代价加上桥本身的长度
+
+        参数:
+            bridges: 桥数组 (B, 2)，每行为 (起点树节点, 终点树节点)
+
+        返回:
+            costs: 代价数组 (B,)
+        """
+        start_tree, goal_tree = self.tree_pair()
+        diff = start_tree.points[bridges[:, 0]] - goal_tree.points[bridges[:, 1]]
+        return (start_tree.costs[bridges[:, 0]] + goal_tree.costs[bridges[:, 1]]
+                + np.sqrt(np.einsum('ij,ij->i', diff, diff)))
+
+    def update_best_solution(self):
+        """
+        在所有桥中重新选出代价最小的一座作为当前最优解
+        两侧的重布线都会降低桥的代价，每次比较全部桥的代价
+
+        返回:
+            bool: 最优解代价是否降低
+        """
+        if not self.bridges:
+            return False
+
+        bridges = np.asarray(self.bridges, dtype=np.int64)
+        costs = self.bridge_costs(bridges)
+        position = int(np.argmin(costs))
+
+        previous = self.best_cost
+        self.best_bridge = tuple(bridges[position].tolist())
+        self.best_cost = float(costs[position])
+        return self.best_cost < previous
+
+    def extract_bridge_path(self, bridge):
+        """
+        提取经过指定桥的路径
+
+        参数:
+            bridge: (起点树节点, 终点树节点)
+
+        返回:
+            (path, start_chain, goal_chain): 从起点到终点的路径点列表，
+                起点树一侧从根到桥的节点索引，终点树一侧从桥到根的节点索引
+        """
+        start_tree, goal_tree = self.tree_pair()
+        start_chain = start_tree.path_to_root(bridge[0])[::-1]
+        goal_chain = goal_tree.path_to_root(bridge[1])
+        path = list(start_tree.points[start_chain]) + list(goal_tree.points[goal_chain])
+
+        # 桥的两端重合时去掉重复的点
+        if np.array_equal(path[len(start_chain) - 1], path[len(start_chain)]):
+            del path[len(start_chain)]
+        return path, start_chain, goal_chain
+
+    def current_solution(self):
+        """
+        提取当前最优解的路径，用于获取规划过程中的中间解
+
+        返回:
+            (path, cost): 路径点列表和代价，尚未找到解时为 ([], inf)
+        """
+        if self.best_bridge is None:
+            return [], float('inf')
+        return self.extract_bridge_path(self.best_bridge)[0], self.best_cost
+
+    def solution_snapshot(self, start_time):
+        """生成当前最优解的快照，节点数量包含两棵树"""
+        snapshot = super().solution_snapshot(start_time)
+        snapshot['nodes'] = len(self.start_tree) + len(self.goal_tree)
+        return snapshot
+
+    def remap_node_indices(self, remap):
+        """删除节点后更新当前树的扩展历史，以及桥在当前树一侧的节点索引"""
+        super().remap_node_indices(remap)
+        # 基类重新生成了扩展历史列表，当前树保存的引用需随之更新
+        self.start_history = self.expansion_history
+        if not self.bridges:
+            return
+
+        bridges = np.asarray(self.bridges, dtype=np.int64)
+        side = 1 if self.trees_swapped else 0
+        bridges[:, side] = remap[bridges[:, side]]
+        self.bridges = list(map(tuple, bridges[bridges[:, side] >= 0].tolist()))
+
+    def prune_tree(self):
+        """
+        删除两棵树中不可能改进当前最优解的节点：到本树根的代价 + 到另一棵树根的直线距离 > 最优解代价
+        最优路径上的节点满足三角不等式，最优的桥不会被删除
+
+        返回:
+            removed: 删除的节点数量
+        """
+        if self.best_bridge is None:
+            return 0
+
+        bound = self.best_cost * (1 + PRUNE_TOLERANCE)
+        removed = 0
+        for _ in range(2):
+            heuristic = self.tree.costs + self.tree.distances_to(self.goal_tree.points[0])
+            removed += self.remove_nodes(~(heuristic <= bound))
+            self.swap_trees()
+
+        # 桥的索引已重新编号，重新定位最优的桥
+        self.update_best_solution()
+
+        self.prune_passes += 1
+        self.pruned_nodes += removed
+        return removed
+
+    def plan_anytime(self):
+        """
+        以生成器形式执行RRT*-Connect规划算法，每当最优解代价降低时产生一个解快照
+        plan()由父类提供，逐个消费快照并返回生成器结束时的规划结果
+
+        产生:
+            snapshot: 解快照（见solution_snapshot）
+
+        返回:
+            success: 是否成功找到路径
+            path: 找到的路径 (如果成功)
+            vertices: 两棵树的所有节点
+            edges: 两棵树的所有边
+            planning_time: 规划耗时
+        """
+        # 重置规划器状态
+        self.reset()
+
+        # 记录开始时间
+        start_time = time.time()
+        self.start_stop_criteria(start_time)
+
+        search_radius = self.search_radius
+
+        for i in range(self.max_iter):
+            # 时间预算用完或最优解代价在窗口内不再明显改进时提前停止
+            if self.should_stop(self.best_cost):
+                break
+            self.iterations = i + 1
+
+            # 周期性剪枝，保持两棵树的规模和每次迭代的开销
+            if self.prune_interval and self.success and i % self.prune_interval == 0:
+                self.prune_tree()
+
+            # 1. 采样一个点（找到解后在椭圆内采样）
+            rand_point = self.informed_sample()
+
+            # 2. 当前树以RRT*的方式朝采样点扩展一步
+            new_idx = self.expand(rand_point, search_radius)
+            if new_idx is None:
+                # 扩展失败也交换，下次从另一棵树开始扩展
+                self.swap_trees()
+                continue
+
+            # 3. 另一棵树以RRT*的方式贪心地连接到新节点，成功时记录桥
+            # 交换之后另一棵树成为当前树，下次迭代从它开始扩展
+            target = self.vertices[new_idx].copy()
+            self.swap_trees()
+            status, connect_idx = self.connect(target, search_radius)
+            if status == 'reached':
+                self.add_bridge(new_idx, connect_idx)
+
+            # 4. 两侧的重布线都可能降低已有桥的代价，重新选出最优的桥
+            improved = self.update_best_solution()
+            if improved:
+                # 每次找到更好的路径时重新计算采样椭圆
+                self.best_path_length = self.best_cost
+                self.ellipse_transform = self.compute_ellipse_transform()
+                if not self.initial_solution_found:
+                    self.initial_solution_found = True
+                    print(f"找到初始解，长度: {self.best_cost:.2f}")
+                self.success = True
+
+                # 最优解改进时产生快照
+                yield self.solution_snapshot(start_time)
+
+        # 换回原来的方向，起点树在前、终点树在后
+        if self.trees_swapped:
+            self.swap_trees()
+
+        self.success = self.best_bridge is not None
+        offset = len(self.start_tree)
+        if self.success:
+            self.path, start_chain, goal_chain = self.extract_bridge_path(self.best_bridge)
+            self.path_indices = start_chain + [idx + offset for idx in goal_chain]
+            self.path_length = self.calculate_path_length(self.path)
+
+        # 记录规划耗时
+        self.planning_time = time.time() - start_time
+
+        print(f"RRT*-Connect规划完成:")
+        print(f"  碰撞检测次数: {self.collision_checks}")
+        print(f"  总迭代次数: {self.iterations}, 停止原因: {self.stop_reason}")
+        print(f"  节点数量: 起点树 {len(self.start_tree)}, 终点树 {len(self.goal_tree)}, 桥 {len(self.bridges)}")
+        print(f"  找到路径: {self.success}")
+        print(f"  规划时间: {self.planning_time:.3f}秒")
+        print(f"  路径长度: {self.path_length if self.success else 'N/A'}")
+
+        # 拼接两棵树的节点、边和扩展历史，终点树的索引整体偏移起点树的节点数
+        vertices = np.vstack([self.start_tree.points, self.goal_tree.points])
+        edge_blocks = [self.start_tree.edges(), self.goal_tree.edges() + offset]
+        if self.success:
+            edge_blocks.append([[self.best_bridge[0], self.best_bridge[1] + offset]])
+        edges = np.vstack(edge_blocks).astype(np.int64)
+        expansion_history = self.start_history + [(parent + offset, child + offset)
+                                                  for parent, child in self.goal_history]
+
+        if self.success:
+            on_path = np.zeros(len(vertices), dtype=bool)
+            on_path[self.path_indices] = True
+            edges = self.filter_edges_by_path(edges, on_path)
+
+        return {
+            'success': self.success,
+            'path': self.path,
+            'vertices': vertices,
+            'edges': edges,
+            'planning_time': self.planning_time,
+            'iterations': self.iterations,
+            'expansion_history': expansion_history
+        }
+
+    def get_name(self):
+        """返回算法名称"""
+        return "RRT*-Connect 算法"
+
+    def get_details(self):
+        """返回算法详细信息"""
+        details = super().get_details()
+        details["name"] = self.get_name()
+        details["nodes"] = len(self.start_tree) + len(self.goal_tree)
+        details["start_tree_size"] = len(self.start_tree)
+        details["goal_tree_size"] = len(self.goal_tree)
+        details["bridges"] = len(self.bridges)
+        details.pop("goal_nodes", None)
+        return details
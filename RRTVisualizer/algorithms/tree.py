@@ -0,0 +1,321 @@
+"""
+基于NumPy数组的树存储结构
+
+所有规划器共用的树：节点坐标保存在 (N, 2) 浮点数组中，父节点和代价
+分别保存在整型和浮点数组中，缓冲区按倍数扩容以摊还分配开销。
+可选地维护子节点邻接表，并可挂载若干空间索引，插入节点时同步更新。
+删除节点时压缩数组并重新编号，挂载的索引随之重建。
+"""
+
+import numpy as np
+
+
+class Tree:
+    """数组存储的搜索树"""
+
+    def __init__(self, root, initial_capacity=256, track_children=False):
+        """
+        初始化树
+
+        参数:
+            root: 根节点坐标 [x, y]
+            initial_capacity: 缓冲区的初始容量
+            track_children: 是否维护子节点邻接表
+        """
+        capacity = max(1, initial_capacity)
+        self._points = np.empty((capacity, 2), dtype=float)
+        self._parents = np.empty(capacity, dtype=np.int64)
+        self._costs = np.empty(capacity, dtype=float)
+        self._size = 0
+
+        self.track_children = track_children
+        self.children = [] if track_children else None
+
+        # 挂载的空间索引 {名称: 索引}，与树使用相同的节点编号
+        self.indexes = {}
+
+        self.add(root, None, 0.0)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def points(self):
+        """节点坐标视图 (N, 2)"""
+        return self._points[:self._size]
+
+    @property
+    def parents(self):
+        """父节点索引视图 (N,)，根节点为-1"""
+        return self._parents[:self._size]
+
+    @property
+    def costs(self):
+        """从根节点到各节点的代价视图 (N,)"""
+        return self._costs[:self._size]
+
+    def _grow(self):
+        """容量不足时将所有缓冲区扩大一倍"""
+        capacity = 2 * len(self._points)
+        points = np.empty((capacity, 2), dtype=float)
+        parents = np.empty(capacity, dtype=np.int64)
+        costs = np.empty(capacity, dtype=float)
+        points[:self._size] = self._points[:self._size]
+        parents[:self._size] = self._parents[:self._size]
+        costs[:self._size] = self._costs[:self._size]
+        self._points = points
+        self._parents = parents
+        self._costs = costs
+
+    def attach_index(self, name, index):
+        """
+        挂载一个空间索引，并将已有节点插入其中
+
+        参数:
+            name: 索引名称
+            index: 支持add(point)的空间索引
+        """
+        for point in self.points:
+            index.add(point)
+        self.indexes[name] = index
+
+    def add(self, point, parent=None, cost=0.0):
+        """
+        添加节点
+
+        参数:
+            point: 节点坐标 [x, y]
+            parent: 父节点索引，None表示没有父节点
+            cost: 从根节点到该节点的代价
+
+        返回:
+            idx: 新节点的索引
+        """
+        if self._size == len(self._points):
+            self._grow()
+
+        idx = self._size
+        self._points[idx] = point
+        self._parents[idx] = -1 if parent is None else parent
+        self._costs[idx] = cost
+        self._size += 1
+
+        if self.track_children:
+            self.children.append([])
+            if parent is not None:
+                self.children[parent].append(idx)
+
+        for index in self.indexes.values():
+            index.add(self._points[idx])
+
+        return idx
+
+    def add_chain(self, points, parent):
+        """
+        批量添加一串首尾相连的节点：第一个节点的父节点为parent，之后每个节点的父节点为前一个节点
+        代价按父节点代价加上沿链的累计距离计算
+
+        参数:
+            points: 节点坐标数组 (K, 2)
+            parent: 第一个节点的父节点索引
+
+        返回:
+            indices: 新节点的索引数组
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        count = len(points)
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        while self._size + count > len(self._points):
+            self._grow()
+
+        first = self._size
+        indices = np.arange(first, first + count)
+        segments = np.diff(np.vstack([self._points[parent], points]), axis=0)
+        self._points[first:first + count] = points
+        self._parents[first] = parent
+        self._parents[first + 1:first + count] = indices[:-1]
+        self._costs[first:first + count] = self._costs[parent] + np.cumsum(np.sqrt(np.einsum('ij,ij->i', segments, segments)))
+        self._size += count
+
+        if self.track_children:
+            self.children[parent].append(first)
+            self.children.extend([idx + 1] for idx in indices[:-1].tolist())
+            self.children.append([])
+
+        for index in self.indexes.values():
+            for idx in indices:
+                index.add(self._points[idx])
+
+        return indices
+
+    def parent_of(self, idx):
+        """
+        获取节点的父节点
+
+        参数:
+            idx: 节点索引
+
+        返回:
+            parent: 父节点索引，没有父节点时返回None
+        """
+        parent = int(self._parents[idx])
+        return None if parent < 0 else parent
+
+    def set_parent(self, idx, parent):
+        """
+        修改节点的父节点，同时维护子节点邻接表
+
+        参数:
+            idx: 节点索引
+            parent: 新的父节点索引，None表示断开
+        """
+        if self.track_children:
+            old_parent = self._parents[idx]
+            if old_parent >= 0:
+                self.children[old_parent].remove(idx)
+            if parent is not None:
+                self.children[parent].append(idx)
+
+        self._parents[idx] = -1 if parent is None else parent
+
+    def edges(self):
+        """
+        由父节点数组导出树的所有边
+
+        返回:
+            edges: 边数组 (E, 2)，每行为 (parent, child)，按子节点索引升序排列
+        """
+        children = np.flatnonzero(self.parents >= 0)
+        return np.column_stack([self._parents[children], children])
+
+    def path_to_root(self, idx):
+        """
+        从节点沿父节点回溯到根节点
+
+        参数:
+            idx: 起始节点索引
+
+        返回:
+            indices: 节点索引列表 [idx, parent, ..., root]，遇到循环引用时提前结束
+        """
+        indices = [idx]
+        parents = self._parents
+        for _ in range(self._size):
+            parent = int(parents[indices[-1]])
+            if parent < 0:
+                break
+            indices.append(parent)
+        return indices
+
+    def subtree_levels(self, idx):
+        """
+        按层次列出以idx为根的子树
+
+        参数:
+            idx: 子树根节点索引
+
+        返回:
+            levels: 节点索引数组的列表，第k个数组为子树中深度为k的节点
+        """
+        levels = [np.array([idx], dtype=np.int64)]
+        if self.track_children:
+            # 沿子节点邻接表逐层展开，只访问子树中的节点
+            level = [idx]
+            while True:
+                level = [child for node in level for child in self.children[node]]
+                if not level:
+                    return levels
+                levels.append(np.array(level, dtype=np.int64))
+
+        # 没有子节点邻接表时，用父节点数组逐层筛选
+        parents = self.parents
+        in_subtree = np.zeros(self._size, dtype=bool)
+        in_subtree[idx] = True
+        while True:
+            # 父节点属于上一层的节点构成下一层
+            frontier = np.zeros(self._size, dtype=bool)
+            frontier[levels[-1]] = True
+            valid = parents >= 0
+            level = np.flatnonzero(valid & frontier[np.where(valid, parents, 0)] & ~in_subtree)
+            if len(level) == 0:
+                return levels
+            in_subtree[level] = True
+            levels.append(level)
+
+    def propagate_costs(self, idx):
+        """
+        idx的代价改变后，逐层更新其所有后代的代价
+
+        参数:
+            idx: 代价发生变化的节点索引
+        """
+        levels = self.subtree_levels(idx)
+        for level in levels[1:]:
+            parents = self._parents[level]
+            diff = self._points[level] - self._points[parents]
+            self._costs[level] = self._costs[parents] + np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    def remove(self, mask):
+        """
+        删除mask标记的节点及其所有后代（父节点被删除的孤立子树），根节点始终保留
+        剩余节点保持原有顺序重新编号，子节点邻接表和挂载的索引随之重建
+
+        参数:
+            mask: 长度为节点数的布尔数组，True表示删除
+
+        返回:
+            remap: 旧索引到新索引的映射数组，被删除的节点为-1
+        """
+        parents = self.parents
+        removed = np.array(mask, dtype=bool)
+        removed[0] = False
+
+        # 逐层扩展到被删除节点的后代
+        has_parent = parents >= 0
+        safe_parents = np.where(has_parent, parents, 0)
+        while True:
+            orphaned = ~removed & has_parent & removed[safe_parents]
+            if not orphaned.any():
+                break
+            removed |= orphaned
+
+        keep = np.flatnonzero(~removed)
+        remap = np.full(self._size, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        if len(keep) == self._size:
+            return remap
+
+        kept_parents = parents[keep]
+        new_parents = np.where(kept_parents >= 0, remap[np.maximum(kept_parents, 0)], -1)
+        count = len(keep)
+        self._points[:count] = self._points[keep]
+        self._costs[:count] = self._costs[keep]
+        self._parents[:count] = new_parents
+        self._size = count
+
+        if self.track_children:
+            self.children = [[] for _ in range(count)]
+            for child, parent in enumerate(new_parents.tolist()):
+                if parent >= 0:
+                    self.children[parent].append(child)
+
+        for index in self.indexes.values():
+            index.rebuild_from(self.points)
+
+        return remap
+
+    def distances_to(self, point, indices=None):
+        """
+        计算节点到给定点的欧式距离
+
+        参数:
+            point: 给定点坐标
+            indices: 参与计算的节点索引，None表示全部节点
+
+        返回:
+            distances: 距离数组
+        """
+        points = self.points if indices is None else self._points[indices]
+        diff = points - point
+        return np.sqrt(np.einsum('ij,ij->i', diff, diff))
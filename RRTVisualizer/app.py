@@ -8,13 +8,15 @@ RRTVisualizer-Web - Web应用主文件
 import os
 import json
 import numpy as np
-from flask import Flask, render_template, request, jsonify, abort, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, abort, redirect, url_for, flash, session, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from datetime import timedelta
 from flask_wtf.csrf import CSRFProtect
 # 导入算法
-from algorithms import BaseRRT, RRTStar, RRTConnect, InformedRRT
+from algorithms import BaseRRT, RRTStar, RRTConnect, InformedRRT, RRTStarConnect, BITStar, FMTStar
+from algorithms.base_rrt import DEFAULT_CONVERGENCE_TOLERANCE
+from algorithms.rrt_star import NEIGHBORHOODS, PARENT_SELECTIONS, SIMPLIFY_LEVELS
 from environment import ConfigurationSpace, RectangleObstacle, CircleObstacle, PolygonObstacle, PRESETS
 from utils.converter import numpy_to_list
 from auth import UserManager
@@ -37,28 +39,41 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# 创建配置空间及算法实例
-config_space = ConfigurationSpace(800, 600)
-algorithms = {
-    "BaseRRT": BaseRRT(
-        [0, 0], [0, 0], config_space,
-        step_size=20, goal_sample_rate=0.05, max_iter=1000
-    ),
-    "RRTStar": RRTStar(
-        [0, 0], [0, 0], config_space,
-        step_size=20, goal_sample_rate=0.05, max_iter=3000, search_radius=50
-    ),
-    "RRTConnect": RRTConnect(
-        [0, 0], [0, 0], config_space,
-        step_size=20, max_iter=1500
-    ),
-    "InformedRRT": InformedRRT(
-        [0, 0], [0, 0], config_space,
-        step_size=20, goal_sample_rate=0.05, max_iter=3000, search_radius=50
-    )
+# 距离场栅格边长，用于快速排除远离障碍物的碰撞检测
+DISTANCE_FIELD_RESOLUTION = 4
+
+# 创建配置空间
+config_space = ConfigurationSpace(800, 600, distance_field_resolution=DISTANCE_FIELD_RESOLUTION)
+
+# 算法类及其默认参数，每个规划请求创建独立的算法实例，并发请求之间互不影响
+algorithm_factories = {
+    "BaseRRT": (BaseRRT, dict(step_size=20, goal_sample_rate=0.05, max_iter=1000)),
+    "RRTStar": (RRTStar, dict(step_size=20, goal_sample_rate=0.05, max_iter=3000, search_radius=50)),
+    "RRTConnect": (RRTConnect, dict(step_size=20, max_iter=1500)),
+    "InformedRRT": (InformedRRT, dict(step_size=20, goal_sample_rate=0.05, max_iter=3000, search_radius=50)),
+    "RRTStarConnect": (RRTStarConnect, dict(step_size=20, max_iter=2000, search_radius=50)),
+    "BITStar": (BITStar, dict(step_size=20, max_iter=3000, search_radius=50)),
+    "FMTStar": (FMTStar, dict(step_size=20, max_iter=2000, search_radius=50))
 }
 
 
+def create_algorithm(algorithm_name, start, goal, space):
+    """
+    按算法名称创建新的算法实例
+
+    参数:
+        algorithm_name: 算法名称（algorithm_factories中的键）
+        start: 起始点坐标 [x, y]
+        goal: 目标点坐标 [x, y]
+        space: 配置空间对象
+
+    返回:
+        algorithm: 使用默认参数创建的算法实例
+    """
+    algorithm_class, defaults = algorithm_factories[algorithm_name]
+    return algorithm_class(np.array(start), np.array(goal), space, **defaults)
+
+
 # 主页 - 修改为检查登录状态
 @app.route('/')
 def index():
@@ -316,38 +331,39 @@ def check_username():
 
 
 
-# API: 执行规划
-@app.route('/api/plan', methods=['POST'])
-def plan():
-    try:
-        # 获取请求数据
-        data = request.json
+def prepare_algorithm(data):
+    """
+    根据规划请求创建配置空间和新的算法实例，并设置算法参数
 
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+    参数:
+        data: 请求的JSON数据
 
-        # 验证必需参数
-        required_fields = ['start', 'goal', 'algorithm', 'obstacles', 'parameters']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+    返回:
+        (algorithm, error): 成功时error为None；请求无效时algorithm为None，error为 (响应, 状态码)
+    """
+    if not data:
+        return None, (jsonify({'error': 'No data provided'}), 400)
 
-        # 提取参数
-        start = data['start']
-        goal = data['goal']
-        algorithm_name = data['algorithm']
-        obstacles_data = data['obstacles']
-        parameters = data['parameters']
+    # 验证必需参数
+    required_fields = ['start', 'goal', 'algorithm', 'obstacles', 'parameters']
+    for field in required_fields:
+        if field not in data:
+            return None, (jsonify({'error': f'Missing required field: {field}'}), 400)
 
-        # 验证算法名称
-        if algorithm_name not in algorithms:
-            return jsonify({'error': f'Unknown algorithm: {algorithm_name}'}), 400
+    # 提取参数
+    start = data['start']
+    goal = data['goal']
+    algorithm_name = data['algorithm']
+    obstacles_data = data['obstacles']
+    parameters = data['parameters']
 
-        # 重置配置空间
-        global config_space
-        config_space = ConfigurationSpace(800, 600)
+    # 验证算法名称
+    if algorithm_name not in algorithm_factories:
+        return None, (jsonify({'error': f'Unknown algorithm: {algorithm_name}'}), 400)
 
-        # 添加障碍物
+    # 先创建新的配置空间并添加障碍物，障碍物无效时直接拒绝请求
+    space = ConfigurationSpace(800, 600, distance_field_resolution=DISTANCE_FIELD_RESOLUTION)
+    try:
         for obs in obstacles_data:
             if obs['type'] == 'rectangle':
                 obstacle = RectangleObstacle(
@@ -360,22 +376,88 @@ def plan():
             else:
                 continue
 
-            config_space.add_obstacle(obstacle)
+            space.add_obstacle(obstacle)
+    except (KeyError, TypeError, ValueError) as e:
+        return None, (jsonify({'error': f'Invalid obstacle: {e}'}), 400)
+
+    algorithm = create_algorithm(algorithm_name, start, goal, space)
+
+    # 验证全部参数，任何一项无效时都不修改全局配置空间
+    if 'collisionMode' in parameters and hasattr(algorithm, 'collision_mode'):
+        if parameters['collisionMode'] not in algorithm.collision_modes:
+            return None, (jsonify({'error': f"Unsupported collision mode: {parameters['collisionMode']}"}), 400)
+    if 'neighborhood' in parameters and hasattr(algorithm, 'neighborhood'):
+        if parameters['neighborhood'] not in NEIGHBORHOODS:
+            return None, (jsonify({'error': f"Unknown neighborhood: {parameters['neighborhood']}"}), 400)
+    if 'parentSelection' in parameters and hasattr(algorithm, 'parent_selection'):
+        if parameters['parentSelection'] not in PARENT_SELECTIONS:
+            return None, (jsonify({'error': f"Unknown parent selection: {parameters['parentSelection']}"}), 400)
+    if 'simplifyLevel' in parameters and hasattr(algorithm, 'simplify_level'):
+        if parameters['simplifyLevel'] not in SIMPLIFY_LEVELS:
+            return None, (jsonify({'error': f"Unknown simplify level: {parameters['simplifyLevel']}"}), 400)
+    if 'edgeBudget' in parameters and hasattr(algorithm, 'edge_budget'):
+        edge_budget = parameters['edgeBudget']
+        if not isinstance(edge_budget, int) or isinstance(edge_budget, bool) or edge_budget < 0:
+            return None, (jsonify({'error': f"Invalid edge budget: {edge_budget}"}), 400)
+    if 'pruneInterval' in parameters and hasattr(algorithm, 'prune_interval'):
+        prune_interval = parameters['pruneInterval']
+        if prune_interval is not None and (not isinstance(prune_interval, int)
+                                           or isinstance(prune_interval, bool) or prune_interval < 0):
+            return None, (jsonify({'error': f"Invalid prune interval: {prune_interval}"}), 400)
+    if 'batchSize' in parameters and hasattr(algorithm, 'batch_size'):
+        batch_size = parameters['batchSize']
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            return None, (jsonify({'error': f"Invalid batch size: {batch_size}"}), 400)
+
+    # 停止条件只对本次请求有效，未给出的条件不限制
+    try:
+        algorithm.set_stop_criteria(
+            time_budget=parameters.get('timeBudget'),
+            convergence_window=parameters.get('convergenceWindow'),
+            convergence_tolerance=parameters.get('convergenceTolerance', DEFAULT_CONVERGENCE_TOLERANCE)
+        )
+    except (TypeError, ValueError) as e:
+        return None, (jsonify({'error': f'Invalid stop criteria: {e}'}), 400)
+
+    # 更新算法参数
+    if 'stepSize' in parameters:
+        algorithm.step_size = parameters['stepSize']
+    if 'maxIter' in parameters:
+        algorithm.max_iter = parameters['maxIter']
+    if 'goalSampleRate' in parameters and hasattr(algorithm, 'goal_sample_rate'):
+        algorithm.goal_sample_rate = parameters['goalSampleRate']
+    if 'searchRadius' in parameters and hasattr(algorithm, 'search_radius'):
+        algorithm.search_radius = parameters['searchRadius']
+    if 'collisionMode' in parameters and hasattr(algorithm, 'collision_mode'):
+        algorithm.collision_mode = parameters['collisionMode']
+    if 'neighborhood' in parameters and hasattr(algorithm, 'neighborhood'):
+        algorithm.neighborhood = parameters['neighborhood']
+    if 'parentSelection' in parameters and hasattr(algorithm, 'parent_selection'):
+        algorithm.parent_selection = parameters['parentSelection']
+    if 'simplifyLevel' in parameters and hasattr(algorithm, 'simplify_level'):
+        algorithm.simplify_level = parameters['simplifyLevel']
+    if 'edgeBudget' in parameters and hasattr(algorithm, 'edge_budget'):
+        algorithm.edge_budget = parameters['edgeBudget']
+    if 'pruneInterval' in parameters and hasattr(algorithm, 'prune_interval'):
+        algorithm.prune_interval = parameters['pruneInterval'] or None
+    if 'batchSize' in parameters and hasattr(algorithm, 'batch_size'):
+        algorithm.batch_size = parameters['batchSize']
+
+    # 请求全部有效后才替换全局配置空间
+    global config_space
+    config_space = space
+
+    return algorithm, None
 
-        # 更新算法参数
-        algorithm = algorithms[algorithm_name]
-        algorithm.start = np.array(start)
-        algorithm.goal = np.array(goal)
-        algorithm.config_space = config_space
 
-        if 'stepSize' in parameters:
-            algorithm.step_size = parameters['stepSize']
-        if 'maxIter' in parameters:
-            algorithm.max_iter = parameters['maxIter']
-        if 'goalSampleRate' in parameters and hasattr(algorithm, 'goal_sample_rate'):
-            algorithm.goal_sample_rate = parameters['goalSampleRate']
-        if 'searchRadius' in parameters and hasattr(algorithm, 'search_radius'):
-            algorithm.search_radius = parameters['searchRadius']
+# API: 执行规划
+@app.route('/api/plan', methods=['POST'])
+def plan():
+    try:
+        # 获取请求数据并设置算法参数
+        algorithm, error = prepare_algorithm(request.json)
+        if error is not None:
+            return error
 
         # 执行规划
         result = algorithm.plan()
@@ -393,10 +475,52 @@ def plan():
         return jsonify({'error': str(e)}), 500
 
 
+# API: 流式执行规划（anytime模式）
+# 响应为逐行的JSON：最优解每次改进时推送一行 type 为 solution 的解快照，最后一行为 type 为 result 的完整结果
+@app.route('/api/plan/stream', methods=['POST'])
+def plan_stream():
+    try:
+        # 在创建算法实例之前按算法类拒绝不支持anytime模式的算法
+        data = request.json
+        if data and data.get('algorithm') in algorithm_factories:
+            algorithm_class, _ = algorithm_factories[data['algorithm']]
+            if not hasattr(algorithm_class, 'plan_anytime'):
+                return jsonify({'error': f"Algorithm does not support anytime planning: {data['algorithm']}"}), 400
+
+        algorithm, error = prepare_algorithm(data)
+        if error is not None:
+            return error
+    except Exception as e:
+        app.logger.error(f"Error in plan stream endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        solutions = algorithm.plan_anytime()
+        try:
+            while True:
+                try:
+                    snapshot = next(solutions)
+                except StopIteration as stop:
+                    result = numpy_to_list(stop.value)
+                    result['details'] = numpy_to_list(algorithm.get_details())
+                    result['type'] = 'result'
+                    yield json.dumps(result) + '\n'
+                    return
+
+                snapshot = numpy_to_list(snapshot)
+                snapshot['type'] = 'solution'
+                yield json.dumps(snapshot) + '\n'
+        except Exception as e:
+            app.logger.error(f"Error in plan stream endpoint: {str(e)}")
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 # API: 获取支持的算法
 @app.route('/api/algorithms', methods=['GET'])
 def get_algorithms():
-    return jsonify(list(algorithms.keys()))
+    return jsonify(list(algorithm_factories.keys()))
 
 
 # API: 获取预设场景列表
@@ -5,6 +5,9 @@
 
 from .obstacles import Obstacle, RectangleObstacle, CircleObstacle, PolygonObstacle
 from .space import ConfigurationSpace
+from .collision import CompiledObstacles
+from .bvh import AABBTree
+from .distance_field import DistanceField
 from .presets import PRESETS, ScenePreset
 
 # 导出所有环境相关类
@@ -14,6 +17,9 @@ __all__ = [
     'CircleObstacle',
     'PolygonObstacle',
     'ConfigurationSpace',
+    'CompiledObstacles',
+    'AABBTree',
+    'DistanceField',
     'PRESETS',
     'ScenePreset'
 ]
\ No newline at end of file
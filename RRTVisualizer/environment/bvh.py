@@ -0,0 +1,304 @@
+"""
+障碍物包围盒层次结构（动态AABB树）
+
+每个叶节点保存一个障碍物的轴对齐包围盒，内部节点保存两个子节点包围盒的并集。
+查询时只进入与查询区域重叠的子树，候选障碍物的筛选代价随障碍物数量K按log K增长。
+支持增量插入和删除，树高度明显失衡时整体重建。
+包围盒编号在插入时分配，删除其他包围盒不会改变已有编号。
+"""
+
+import math
+
+import numpy as np
+
+
+class AABBTree:
+    """障碍物包围盒的动态AABB树"""
+
+    def __init__(self, boxes=None, margin=0.0):
+        """
+        初始化AABB树
+
+        参数:
+            boxes: 初始包围盒列表 [(x_min, y_min, x_max, y_max), ...]，第i个包围盒对应编号i
+            margin: 包围盒外扩量
+        """
+        self.margin = margin
+        self.clear()
+        if boxes:
+            self.rebuild(boxes)
+
+    def clear(self):
+        """清空树"""
+        # 节点数据以平行列表保存，item为-1的是内部节点
+        self._x0 = []
+        self._y0 = []
+        self._x1 = []
+        self._y1 = []
+        self._left = []
+        self._right = []
+        self._parent = []
+        self._height = []
+        self._item = []
+        self._free = []
+        self._root = -1
+
+        # 各编号对应的叶节点 {编号: 叶节点}，包围盒无界的编号为-1
+        self._leaves = {}
+        # 包围盒无界的编号集合，任何查询都会返回
+        self._unbounded = set()
+        # 下一个插入的包围盒使用的编号，编号不会复用
+        self._next_item = 0
+
+    def __len__(self):
+        return len(self._leaves)
+
+    @property
+    def height(self):
+        """树的高度，空树为-1"""
+        return -1 if self._root < 0 else self._height[self._root]
+
+    def _new_node(self, x0, y0, x1, y1, item=-1):
+        """分配一个节点"""
+        if self._free:
+            node = self._free.pop()
+            self._x0[node], self._y0[node], self._x1[node], self._y1[node] = x0, y0, x1, y1
+            self._left[node] = self._right[node] = self._parent[node] = -1
+            self._height[node] = 0
+            self._item[node] = item
+            return node
+
+        self._x0.append(x0)
+        self._y0.append(y0)
+        self._x1.append(x1)
+        self._y1.append(y1)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._parent.append(-1)
+        self._height.append(0)
+        self._item.append(item)
+        return len(self._item) - 1
+
+    def _free_node(self, node):
+        """回收节点"""
+        self._item[node] = -1
+        self._free.append(node)
+
+    def _refit(self, node):
+        """从node开始向上更新包围盒和高度"""
+        while node >= 0:
+            left = self._left[node]
+            right = self._right[node]
+            self._x0[node] = min(self._x0[left], self._x0[right])
+            self._y0[node] = min(self._y0[left], self._y0[right])
+            self._x1[node] = max(self._x1[left], self._x1[right])
+            self._y1[node] = max(self._y1[left], self._y1[right])
+            self._height[node] = 1 + max(self._height[left], self._height[right])
+            node = self._parent[node]
+
+    def _padded(self, box):
+        """返回外扩后的包围盒，无界时返回None"""
+        x0, y0, x1, y1 = (float(value) for value in box)
+        if not all(math.isfinite(value) for value in (x0, y0, x1, y1)):
+            return None
+        return (x0 - self.margin, y0 - self.margin, x1 + self.margin, y1 + self.margin)
+
+    def _insert_leaf(self, leaf):
+        """将叶节点挂到树上：沿包围盒扩大面积最小的分支下降，与到达的叶节点组成新的内部节点"""
+        if self._root < 0:
+            self._root = leaf
+            return
+
+        x0, y0, x1, y1 = self._x0[leaf], self._y0[leaf], self._x1[leaf], self._y1[leaf]
+        node = self._root
+        while self._item[node] < 0:
+            best = -1
+            best_cost = math.inf
+            for child in (self._left[node], self._right[node]):
+                cx0, cy0, cx1, cy1 = self._x0[child], self._y0[child], self._x1[child], self._y1[child]
+                area = (cx1 - cx0) * (cy1 - cy0)
+                merged = (max(cx1, x1) - min(cx0, x0)) * (max(cy1, y1) - min(cy0, y0))
+                cost = merged - area
+                if cost < best_cost:
+                    best = child
+                    best_cost = cost
+            node = best
+
+        # node为兄弟叶节点，新建父节点替换它的位置
+        old_parent = self._parent[node]
+        parent = self._new_node(0.0, 0.0, 0.0, 0.0)
+        self._parent[parent] = old_parent
+        self._left[parent] = node
+        self._right[parent] = leaf
+        self._parent[node] = parent
+        self._parent[leaf] = parent
+        if old_parent < 0:
+            self._root = parent
+        elif self._left[old_parent] == node:
+            self._left[old_parent] = parent
+        else:
+            self._right[old_parent] = parent
+        self._refit(parent)
+
+    def _remove_leaf(self, leaf):
+        """将叶节点从树上摘下，由兄弟节点顶替父节点的位置"""
+        if leaf == self._root:
+            self._root = -1
+            return
+
+        parent = self._parent[leaf]
+        sibling = self._right[parent] if self._left[parent] == leaf else self._left[parent]
+        grandparent = self._parent[parent]
+        self._parent[sibling] = grandparent
+        if grandparent < 0:
+            self._root = sibling
+        else:
+            if self._left[grandparent] == parent:
+                self._left[grandparent] = sibling
+            else:
+                self._right[grandparent] = sibling
+            self._refit(grandparent)
+        self._free_node(parent)
+
+    def _is_unbalanced(self):
+        """树高度超过平衡树高度的两倍左右时视为失衡"""
+        leaves = len(self._leaves) - len(self._unbounded)
+        return leaves > 2 and self.height > 2 * math.log2(leaves) + 4
+
+    def insert(self, box):
+        """
+        插入一个包围盒
+
+        参数:
+            box: 包围盒 (x_min, y_min, x_max, y_max)
+
+        返回:
+            item: 新包围盒的编号，比之前分配过的所有编号都大
+        """
+        item = self._next_item
+        self._next_item += 1
+        padded = self._padded(box)
+        if padded is None:
+            self._leaves[item] = -1
+            self._unbounded.add(item)
+            return item
+
+        leaf = self._new_node(*padded, item=item)
+        self._leaves[item] = leaf
+        self._insert_leaf(leaf)
+        if self._is_unbalanced():
+            self._rebuild_from_leaves()
+        return item
+
+    def remove(self, item):
+        """
+        删除一个包围盒，其余包围盒的编号不变
+        只需摘下一个叶节点并沿祖先向上更新包围盒，复杂度为O(log K)
+
+        参数:
+            item: 包围盒编号
+        """
+        if item not in self._leaves:
+            raise IndexError("bounding box index out of range")
+
+        leaf = self._leaves.pop(item)
+        if leaf < 0:
+            self._unbounded.discard(item)
+        else:
+            self._remove_leaf(leaf)
+            self._free_node(leaf)
+
+    def rebuild(self, boxes):
+        """
+        用一组包围盒重新构建整棵树，编号从0重新分配
+
+        参数:
+            boxes: 包围盒列表，第i个包围盒对应编号i
+        """
+        self.clear()
+        for item, box in enumerate(boxes):
+            padded = self._padded(box)
+            if padded is None:
+                self._leaves[item] = -1
+                self._unbounded.add(item)
+            else:
+                self._leaves[item] = self._new_node(*padded, item=item)
+        self._next_item = len(boxes)
+        self._rebuild_from_leaves()
+
+    def _rebuild_from_leaves(self):
+        """保留各编号的叶包围盒，自顶向下按包围盒中心的中位数重新划分"""
+        boxes = [(index, self._x0[leaf], self._y0[leaf], self._x1[leaf], self._y1[leaf])
+                 for index, leaf in self._leaves.items() if leaf >= 0]
+        unbounded = self._unbounded
+        next_item = self._next_item
+        self.clear()
+        self._leaves = {index: -1 for index in unbounded}
+        self._unbounded = unbounded
+        self._next_item = next_item
+        leaves = []
+        for index, x0, y0, x1, y1 in boxes:
+            leaf = self._new_node(x0, y0, x1, y1, item=index)
+            self._leaves[index] = leaf
+            leaves.append(leaf)
+        if not leaves:
+            return
+
+        centers_x = {leaf: self._x0[leaf] + self._x1[leaf] for leaf in leaves}
+        centers_y = {leaf: self._y0[leaf] + self._y1[leaf] for leaf in leaves}
+
+        def build(group, parent):
+            if len(group) == 1:
+                node = group[0]
+                self._parent[node] = parent
+                return node
+
+            # 沿包围盒中心跨度较大的轴按中位数切分
+            xs = [centers_x[leaf] for leaf in group]
+            ys = [centers_y[leaf] for leaf in group]
+            centers = centers_x if max(xs) - min(xs) >= max(ys) - min(ys) else centers_y
+            group = sorted(group, key=centers.__getitem__)
+            half = len(group) // 2
+
+            node = self._new_node(0.0, 0.0, 0.0, 0.0)
+            self._parent[node] = parent
+            self._left[node] = build(group[:half], node)
+            self._right[node] = build(group[half:], node)
+            left, right = self._left[node], self._right[node]
+            self._x0[node] = min(self._x0[left], self._x0[right])
+            self._y0[node] = min(self._y0[left], self._y0[right])
+            self._x1[node] = max(self._x1[left], self._x1[right])
+            self._y1[node] = max(self._y1[left], self._y1[right])
+            self._height[node] = 1 + max(self._height[left], self._height[right])
+            return node
+
+        self._root = build(leaves, -1)
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """
+        查找与给定矩形区域重叠的包围盒
+
+        参数:
+            min_x, min_y, max_x, max_y: 查询区域
+
+        返回:
+            items: 按编号升序排列的包围盒编号数组
+        """
+        items = list(self._unbounded)
+        if self._root >= 0:
+            x0, y0, x1, y1 = self._x0, self._y0, self._x1, self._y1
+            left, right, item = self._left, self._right, self._item
+            stack = [self._root]
+            while stack:
+                node = stack.pop()
+                if x0[node] > max_x or x1[node] < min_x or y0[node] > max_y or y1[node] < min_y:
+                    continue
+                if item[node] >= 0:
+                    items.append(item[node])
+                else:
+                    stack.append(left[node])
+                    stack.append(right[node])
+
+        items = np.array(items, dtype=np.int64)
+        items.sort()
+        return items
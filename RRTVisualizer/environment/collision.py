@@ -0,0 +1,537 @@
+"""
+向量化碰撞检测引擎
+
+将配置空间中的障碍物编译为结构化数组（矩形边界、圆心与半径、多边形边），
+一次向量化运算即可判断线段与全部障碍物的关系。查询时先用所有障碍物的
+包围盒做一次保守筛选，只对包围盒与线段相交的障碍物做精确判定。
+障碍物很多时，筛选改由AABB树完成，只访问与查询区域重叠的包围盒。
+障碍物按编号保存，增删障碍物时原地更新数组：新障碍物追加到末尾（容量按两倍扩充），
+删除的障碍物只标记失效，包围盒置空后不会再成为候选。
+判定规则与各障碍物类的 is_point_in_obstacle / is_line_in_obstacle 完全一致。
+"""
+
+import numpy as np
+from .obstacles import RectangleObstacle, CircleObstacle, PolygonObstacle
+
+
+# 与障碍物类中 _line_intersection 相同的平行判定阈值
+PARALLEL_EPS = 1e-10
+
+# 包围盒筛选时的外扩量，保证筛选是保守的（不会漏掉精确判定为相交的障碍物）
+BBOX_MARGIN = 1e-6
+
+# 障碍物类型编号
+KIND_RECTANGLE = 0
+KIND_CIRCLE = 1
+KIND_POLYGON = 2
+KIND_OTHER = 3
+
+
+def _reserve(array, size, fill):
+    """
+    数组容量不足size时按两倍扩容
+
+    参数:
+        array: 一维数组
+        size: 需要的容量
+        fill: 新增部分的填充值
+
+    返回:
+        array: 容量不小于size的数组，前len(array)个元素不变
+    """
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _segment_hits_edges(px, py, qx, qy, ax, ay, ex, ey):
+    """
+    判断线段 p->q 与一组边 a->a+e 是否相交（与 _line_intersection 规则一致）
+    所有参数按NumPy规则广播，可同时判断多条线段与多条边
+
+    参数:
+        px, py, qx, qy: 线段端点坐标（标量或数组）
+        ax, ay: 各条边起点坐标数组
+        ex, ey: 各条边方向向量数组
+
+    返回:
+        hits: 每条边是否与线段相交的布尔数组
+    """
+    v1x = qx - px
+    v1y = qy - py
+    cross = v1x * ey - v1y * ex
+    valid = np.abs(cross) >= PARALLEL_EPS
+    # 平行的边不参与判定，用1代替分母避免除零
+    cross = np.where(valid, cross, 1.0)
+
+    vx = ax - px
+    vy = ay - py
+    t1 = (vx * ey - vy * ex) / cross
+    t2 = (vx * v1y - vy * v1x) / cross
+    return valid & (t1 >= 0) & (t1 <= 1) & (t2 >= 0) & (t2 <= 1)
+
+
+def _clip_segments_to_boxes(px, py, qx, qy, x0, y0, x1, y1):
+    """
+    Liang-Barsky裁剪：判断线段 p->q 与一组闭矩形是否相交（与 RectangleObstacle.is_line_in_obstacle 一致）
+    所有参数按NumPy规则广播，可同时判断多条线段与多个矩形
+
+    参数:
+        px, py, qx, qy: 线段端点坐标（标量或数组）
+        x0, y0, x1, y1: 矩形边界数组
+
+    返回:
+        hits: 线段与各矩形是否相交的布尔数组
+    """
+    t_enter = 0.0
+    t_exit = 1.0
+    for p, q, low, high in ((px, qx, x0, x1), (py, qy, y0, y1)):
+        d = q - p
+        parallel = d == 0
+        # 与平板平行时，起点在平板内则该方向不限制参数区间，否则区间为空
+        inside = (low <= p) & (p <= high)
+        safe_d = np.where(parallel, 1.0, d)
+        t_low = (low - p) / safe_d
+        t_high = (high - p) / safe_d
+        t_near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t_low, t_high))
+        t_far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t_low, t_high))
+        t_enter = np.maximum(t_enter, t_near)
+        t_exit = np.minimum(t_exit, t_far)
+    return t_enter <= t_exit
+
+
+class CompiledObstacles:
+    """编译后的障碍物集合"""
+
+    def __init__(self, obstacles, bvh=None):
+        """
+        将障碍物列表编译为结构化数组
+
+        参数:
+            obstacles: 障碍物对象列表，第i个障碍物的编号为i
+            bvh: 与障碍物编号一致的AABBTree，提供时用它筛选候选障碍物
+        """
+        self.bvh = bvh
+
+        rects = []
+        circles = []
+        self._polygons = []
+        polygons = self._polygons
+        # 无法编译的自定义障碍物，仍逐个调用其方法
+        self.others = []
+
+        # 按编号记录每个障碍物的类型和在对应类型数组中的行号
+        kinds = []
+        rows = []
+        for obstacle in obstacles:
+            if isinstance(obstacle, RectangleObstacle):
+                kinds.append(KIND_RECTANGLE)
+                rows.append(len(rects))
+                rects.append(obstacle)
+            elif isinstance(obstacle, CircleObstacle):
+                kinds.append(KIND_CIRCLE)
+                rows.append(len(circles))
+                circles.append(obstacle)
+            elif isinstance(obstacle, PolygonObstacle):
+                kinds.append(KIND_POLYGON)
+                rows.append(len(polygons))
+                polygons.append(obstacle)
+            else:
+                kinds.append(KIND_OTHER)
+                rows.append(len(self.others))
+                self.others.append(obstacle)
+
+        self.kinds = np.array(kinds, dtype=int)
+        self.rows = np.array(rows, dtype=int)
+        self.alive = np.ones(len(kinds), dtype=bool)
+        # 已分配的编号数和其中仍有效的障碍物数
+        self._size = len(kinds)
+        self._live = len(kinds)
+        self._kind_counts = [kinds.count(kind) for kind in range(4)]
+        self._update_single_kind()
+
+        self._compile_rectangles(rects)
+        self._compile_circles(circles)
+        self._compile_polygons(polygons)
+        self._compile_bounding_boxes()
+
+    def _compile_rectangles(self, rects):
+        """矩形: 边界数组 (K,)"""
+        self.rect_count = len(rects)
+        self.rect_x0 = np.array([r.x for r in rects], dtype=float)
+        self.rect_y0 = np.array([r.y for r in rects], dtype=float)
+        self.rect_x1 = np.array([r.x + r.width for r in rects], dtype=float)
+        self.rect_y1 = np.array([r.y + r.height for r in rects], dtype=float)
+
+    def _compile_circles(self, circles):
+        """圆: 圆心数组和半径数组"""
+        self.circle_count = len(circles)
+        self.circle_cx = np.array([c.center[0] for c in circles], dtype=float)
+        self.circle_cy = np.array([c.center[1] for c in circles], dtype=float)
+        self.circle_r = np.array([c.radius for c in circles], dtype=float)
+
+    def _compile_polygons(self, polygons):
+        """多边形: 所有多边形的边拼接为一个边数组，并记录每条边所属的多边形"""
+        self.polygon_count = len(polygons)
+        starts = []
+        ends = []
+        owners = []
+        for i, polygon in enumerate(polygons):
+            vertices = np.asarray(polygon.vertices, dtype=float)
+            starts.append(vertices[:-1])
+            ends.append(vertices[1:])
+            owners.append(np.full(len(vertices) - 1, i))
+
+        if polygons:
+            starts = np.concatenate(starts)
+            ends = np.concatenate(ends)
+            self.poly_owner = np.concatenate(owners)
+            # 每个多边形第一条边在边数组中的位置，用于按多边形分段归约
+            self._poly_offsets = np.concatenate([[0], np.cumsum([len(o) for o in owners])[:-1]])
+        else:
+            starts = np.empty((0, 2))
+            ends = np.empty((0, 2))
+            self.poly_owner = np.empty(0, dtype=int)
+
+        self.poly_ax = starts[:, 0]
+        self.poly_ay = starts[:, 1]
+        self.poly_bx = ends[:, 0]
+        self.poly_by = ends[:, 1]
+        self.poly_ex = self.poly_bx - self.poly_ax
+        self.poly_ey = self.poly_by - self.poly_ay
+
+    def _compile_bounding_boxes(self):
+        """按编号汇总所有障碍物的轴对齐包围盒"""
+        count = len(self.kinds)
+        self.bbox_x0 = np.full(count, -np.inf)
+        self.bbox_y0 = np.full(count, -np.inf)
+        self.bbox_x1 = np.full(count, np.inf)
+        self.bbox_y1 = np.full(count, np.inf)
+
+        rect = self.kinds == KIND_RECTANGLE
+        self.bbox_x0[rect] = self.rect_x0
+        self.bbox_y0[rect] = self.rect_y0
+        self.bbox_x1[rect] = self.rect_x1
+        self.bbox_y1[rect] = self.rect_y1
+
+        circle = self.kinds == KIND_CIRCLE
+        self.bbox_x0[circle] = self.circle_cx - self.circle_r
+        self.bbox_y0[circle] = self.circle_cy - self.circle_r
+        self.bbox_x1[circle] = self.circle_cx + self.circle_r
+        self.bbox_y1[circle] = self.circle_cy + self.circle_r
+
+        polygon = self.kinds == KIND_POLYGON
+        if self.polygon_count:
+            self.bbox_x0[polygon] = np.minimum.reduceat(self.poly_ax, self._poly_offsets)
+            self.bbox_y0[polygon] = np.minimum.reduceat(self.poly_ay, self._poly_offsets)
+            self.bbox_x1[polygon] = np.maximum.reduceat(self.poly_ax, self._poly_offsets)
+            self.bbox_y1[polygon] = np.maximum.reduceat(self.poly_ay, self._poly_offsets)
+
+        # 自定义障碍物使用其get_bounding_box，未重写时为无穷大，始终参与精确判定
+        other = np.flatnonzero(self.kinds == KIND_OTHER)
+        for index, obstacle in zip(other, self.others):
+            x0, y0, x1, y1 = obstacle.get_bounding_box()
+            self.bbox_x0[index], self.bbox_y0[index], self.bbox_x1[index], self.bbox_y1[index] = x0, y0, x1, y1
+
+        self.bbox_x0 -= BBOX_MARGIN
+        self.bbox_y0 -= BBOX_MARGIN
+        self.bbox_x1 += BBOX_MARGIN
+        self.bbox_y1 += BBOX_MARGIN
+
+    def _update_single_kind(self):
+        """有效障碍物只有一种类型时记录该类型，否则为None"""
+        present = [kind for kind in range(4) if self._kind_counts[kind]]
+        self._single_kind = present[0] if len(present) == 1 else None
+
+    def add(self, obstacle):
+        """
+        追加一个障碍物，只写入新障碍物的数据
+
+        参数:
+            obstacle: 障碍物对象
+
+        返回:
+            item: 新障碍物的编号，与AABB树插入时分配的编号一致
+        """
+        if isinstance(obstacle, RectangleObstacle):
+            kind = KIND_RECTANGLE
+            row = self.rect_count
+            self.rect_count += 1
+            box = (obstacle.x, obstacle.y, obstacle.x + obstacle.width, obstacle.y + obstacle.height)
+            for name, value in zip(('rect_x0', 'rect_y0', 'rect_x1', 'rect_y1'), box):
+                array = _reserve(getattr(self, name), self.rect_count, 0.0)
+                array[row] = value
+                setattr(self, name, array)
+        elif isinstance(obstacle, CircleObstacle):
+            kind = KIND_CIRCLE
+            row = self.circle_count
+            self.circle_count += 1
+            values = (obstacle.center[0], obstacle.center[1], obstacle.radius)
+            for name, value in zip(('circle_cx', 'circle_cy', 'circle_r'), values):
+                array = _reserve(getattr(self, name), self.circle_count, 0.0)
+                array[row] = value
+                setattr(self, name, array)
+            box = (values[0] - values[2], values[1] - values[2], values[0] + values[2], values[1] + values[2])
+        elif isinstance(obstacle, PolygonObstacle):
+            # 多边形的边拼接在一个数组中，按多边形分段，追加时重新拼接
+            kind = KIND_POLYGON
+            row = len(self._polygons)
+            self._polygons.append(obstacle)
+            self._compile_polygons(self._polygons)
+            vertices = np.asarray(obstacle.vertices, dtype=float)[:-1]
+            box = (*vertices.min(axis=0), *vertices.max(axis=0))
+        else:
+            kind = KIND_OTHER
+            row = len(self.others)
+            self.others.append(obstacle)
+            box = obstacle.get_bounding_box()
+
+        item = self._size
+        self._size += 1
+        self._live += 1
+        self.kinds = _reserve(self.kinds, self._size, KIND_OTHER)
+        self.rows = _reserve(self.rows, self._size, 0)
+        self.alive = _reserve(self.alive, self._size, False)
+        self.kinds[item] = kind
+        self.rows[item] = row
+        self.alive[item] = True
+
+        # 未使用的容量保持为空包围盒，包围盒筛选不会选中
+        for name, fill, value, margin in (('bbox_x0', np.inf, box[0], -BBOX_MARGIN),
+                                          ('bbox_y0', np.inf, box[1], -BBOX_MARGIN),
+                                          ('bbox_x1', -np.inf, box[2], BBOX_MARGIN),
+                                          ('bbox_y1', -np.inf, box[3], BBOX_MARGIN)):
+            array = _reserve(getattr(self, name), self._size, fill)
+            array[item] = value + margin
+            setattr(self, name, array)
+
+        self._kind_counts[kind] += 1
+        self._update_single_kind()
+        return item
+
+    def remove(self, item):
+        """
+        删除一个障碍物：标记失效并置空包围盒，其余障碍物的编号和数据不变
+
+        参数:
+            item: 障碍物编号
+        """
+        if not (0 <= item < self._size and self.alive[item]):
+            raise IndexError("obstacle index out of range")
+
+        self.alive[item] = False
+        self.bbox_x0[item] = self.bbox_y0[item] = np.inf
+        self.bbox_x1[item] = self.bbox_y1[item] = -np.inf
+        self._live -= 1
+        self._kind_counts[self.kinds[item]] -= 1
+        self._update_single_kind()
+
+    @property
+    def dead_count(self):
+        """已删除但仍占用编号的障碍物数"""
+        return self._size - self._live
+
+    def live_items(self):
+        """全部有效障碍物的编号数组"""
+        return np.flatnonzero(self.alive[:self._size])
+
+    def __len__(self):
+        return self._live
+
+    def candidates(self, min_x, min_y, max_x, max_y):
+        """
+        查找包围盒与给定矩形区域相交的障碍物
+
+        参数:
+            min_x, min_y, max_x, max_y: 查询区域
+
+        返回:
+            indices: 障碍物编号数组
+        """
+        if self.bvh is not None:
+            return self.bvh.query(min_x, min_y, max_x, max_y)
+        return np.flatnonzero((self.bbox_x0 <= max_x) & (self.bbox_x1 >= min_x) &
+                              (self.bbox_y0 <= max_y) & (self.bbox_y1 >= min_y))
+
+    def _split_by_kind(self, indices):
+        """将障碍物编号按类型拆分为各类型数组中的行号，只有一种类型时其余类型为None"""
+        if self._single_kind is not None:
+            kind = self._single_kind
+            rows = self.rows[indices]
+            return [rows if kind == k else None for k in range(4)]
+
+        kinds = self.kinds[indices]
+        rows = self.rows[indices]
+        return [rows[kinds == k] for k in range(4)]
+
+    def _points_in_rectangles(self, px, py, rows):
+        x0, y0, x1, y1 = self.rect_x0[rows], self.rect_y0[rows], self.rect_x1[rows], self.rect_y1[rows]
+        return (x0 <= px) & (px <= x1) & (y0 <= py) & (py <= y1)
+
+    def _points_in_circles(self, px, py, rows):
+        dx = px - self.circle_cx[rows]
+        dy = py - self.circle_cy[rows]
+        return np.sqrt(dx * dx + dy * dy) <= self.circle_r[rows]
+
+    def _points_in_polygons(self, px, py):
+        """射线法，逐边判断水平射线是否穿过，再按多边形统计奇偶性（对全部多边形计算）"""
+        ay, by = self.poly_ay, self.poly_by
+        spans = ((ay <= py) & (py < by)) | ((by <= py) & (py < ay))
+        sloped = ay != by
+        dy = np.where(sloped, by - ay, 1.0)
+        x_intersect = self.poly_ax + (py - ay) * self.poly_ex / dy
+        crossings = spans & sloped & (x_intersect > px)
+        counts = np.add.reduceat(crossings.astype(np.int64), self._poly_offsets, axis=-1)
+        return counts % 2 == 1
+
+    def point_collides(self, point):
+        """
+        判断点是否位于任一障碍物内部
+
+        参数:
+            point: 点坐标 [x, y]
+
+        返回:
+            bool: 是否在障碍物内部
+        """
+        px = float(point[0])
+        py = float(point[1])
+
+        candidates = self.candidates(px, py, px, py)
+        if len(candidates) == 0:
+            return False
+        rects, circles, polygons, others = self._split_by_kind(candidates)
+
+        if rects is not None and len(rects) and self._points_in_rectangles(px, py, rects).any():
+            return True
+        if circles is not None and len(circles) and self._points_in_circles(px, py, circles).any():
+            return True
+        if polygons is not None and len(polygons) and self._points_in_polygons(px, py)[polygons].any():
+            return True
+        if others is not None:
+            return any(self.others[row].is_point_in_obstacle(point) for row in others)
+        return False
+
+    def _segment_hits_rectangles(self, px, py, qx, qy, rows):
+        return _clip_segments_to_boxes(px, py, qx, qy, self.rect_x0[rows], self.rect_y0[rows],
+                                       self.rect_x1[rows], self.rect_y1[rows])
+
+    def _segment_hits_circles(self, px, py, qx, qy, rows):
+        hits = self._points_in_circles(px, py, rows) | self._points_in_circles(qx, qy, rows)
+
+        dx = qx - px
+        dy = qy - py
+        length = np.sqrt(dx * dx + dy * dy)
+        # 退化线段只需判断端点，用1代替长度避免除零
+        degenerate = length == 0
+        safe_length = np.where(degenerate, 1.0, length)
+        ux = dx / safe_length
+        uy = dy / safe_length
+
+        # 圆心到线段的最近距离：投影落在线段外时取到端点的距离
+        cx = self.circle_cx[rows]
+        cy = self.circle_cy[rows]
+        sx = cx - px
+        sy = cy - py
+        projection = sx * ux + sy * uy
+        ex = cx - qx
+        ey = cy - qy
+        wx = sx - projection * ux
+        wy = sy - projection * uy
+        distance = np.where(
+            projection < 0, np.sqrt(sx * sx + sy * sy),
+            np.where(projection > length, np.sqrt(ex * ex + ey * ey), np.sqrt(wx * wx + wy * wy))
+        )
+        return hits | (~degenerate & (distance <= self.circle_r[rows]))
+
+    def _segment_hits_polygons(self, px, py, qx, qy):
+        """对全部多边形计算，返回每个多边形是否与线段相交"""
+        hits = self._points_in_polygons(px, py) | self._points_in_polygons(qx, qy)
+
+        edge_hits = _segment_hits_edges(px, py, qx, qy,
+                                        self.poly_ax, self.poly_ay, self.poly_ex, self.poly_ey)
+        return hits | np.logical_or.reduceat(edge_hits, self._poly_offsets, axis=-1)
+
+    def segment_collides(self, start, end):
+        """
+        判断线段是否与任一障碍物相交
+
+        参数:
+            start: 线段起点坐标 [x, y]
+            end: 线段终点坐标 [x, y]
+
+        返回:
+            bool: 是否与障碍物相交
+        """
+        px = float(start[0])
+        py = float(start[1])
+        qx = float(end[0])
+        qy = float(end[1])
+
+        # 只有包围盒与线段包围盒重叠的障碍物才可能与线段相交
+        candidates = self.candidates(min(px, qx), min(py, qy), max(px, qx), max(py, qy))
+        if len(candidates) == 0:
+            return False
+        rects, circles, polygons, others = self._split_by_kind(candidates)
+
+        if rects is not None and len(rects) and self._segment_hits_rectangles(px, py, qx, qy, rects).any():
+            return True
+        if circles is not None and len(circles) and self._segment_hits_circles(px, py, qx, qy, circles).any():
+            return True
+        if polygons is not None and len(polygons) and self._segment_hits_polygons(px, py, qx, qy)[polygons].any():
+            return True
+        if others is not None:
+            return any(self.others[row].is_line_in_obstacle(start, end) for row in others)
+        return False
+
+    def segments_collide(self, starts, ends):
+        """
+        批量判断多条线段是否与障碍物相交
+        所有线段与所有候选障碍物构成 M x K 的广播运算，一次完成判定
+
+        参数:
+            starts: 线段起点数组 (M, 2)，也可以是所有线段共用的单个点 [x, y]
+            ends: 线段终点数组 (M, 2)，也可以是所有线段共用的单个点 [x, y]
+
+        返回:
+            collides: 长度为M的布尔数组，True表示对应线段与障碍物相交
+        """
+        starts, ends = np.broadcast_arrays(np.atleast_2d(np.asarray(starts, dtype=float)),
+                                           np.atleast_2d(np.asarray(ends, dtype=float)))
+        collides = np.zeros(len(starts), dtype=bool)
+        if len(starts) == 0 or self._live == 0:
+            return collides
+
+        # 列向量形式的端点坐标 (M, 1)，与障碍物数组 (K,) 广播为 (M, K)
+        px, py = starts[:, 0:1], starts[:, 1:2]
+        qx, qy = ends[:, 0:1], ends[:, 1:2]
+
+        # 只保留至少与一条线段包围盒重叠的障碍物
+        min_x, max_x = np.minimum(px, qx), np.maximum(px, qx)
+        min_y, max_y = np.minimum(py, qy), np.maximum(py, qy)
+        if self.bvh is None:
+            candidates = np.arange(self._size)
+        else:
+            # 先用所有线段包围盒的并集在AABB树中粗筛
+            candidates = self.bvh.query(min_x.min(), min_y.min(), max_x.max(), max_y.max())
+        overlap = ((self.bbox_x0[candidates] <= max_x) & (self.bbox_x1[candidates] >= min_x) &
+                   (self.bbox_y0[candidates] <= max_y) & (self.bbox_y1[candidates] >= min_y))
+        candidates = candidates[overlap.any(axis=0)]
+        if len(candidates) == 0:
+            return collides
+        rects, circles, polygons, others = self._split_by_kind(candidates)
+
+        if rects is not None and len(rects):
+            collides |= self._segment_hits_rectangles(px, py, qx, qy, rects).any(axis=1)
+        if circles is not None and len(circles):
+            collides |= self._segment_hits_circles(px, py, qx, qy, circles).any(axis=1)
+        if polygons is not None and len(polygons):
+            collides |= self._segment_hits_polygons(px, py, qx, qy)[:, polygons].any(axis=1)
+        if others is not None:
+            for i in range(len(starts)):
+                if not collides[i]:
+                    collides[i] = any(self.others[row].is_line_in_obstacle(starts[i], ends[i])
+                                      for row in others)
+        return collides
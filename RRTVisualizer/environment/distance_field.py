@@ -0,0 +1,269 @@
+"""
+占据栅格与有向距离场
+
+将配置空间按给定分辨率划分为栅格，在每个栅格中心计算到障碍物的有向欧式距离
+（障碍物外为正，内部为负），占据栅格即距离不大于0的栅格。
+有向距离是1-Lipschitz的，栅格内任一点的距离与栅格中心相差不超过半个对角线，
+由此得到点和线段碰撞检测的保守判定：只有落在不确定带内的查询才需要精确判定。
+增删障碍物时只重新计算距离可能改变的栅格。
+"""
+
+import math
+
+import numpy as np
+from .collision import KIND_OTHER, KIND_RECTANGLE, KIND_CIRCLE, KIND_POLYGON, BBOX_MARGIN
+
+
+# 判定时额外留出的浮点误差余量
+DISTANCE_EPS = 1e-9
+
+# 分块计算时每块 栅格数 x 障碍物数 的上限，控制临时数组大小
+CHUNK_ELEMENTS = 1 << 20
+
+
+class DistanceField:
+    """配置空间的占据栅格和有向距离场"""
+
+    def __init__(self, compiled, bounds, resolution):
+        """
+        栅格化障碍物并计算有向距离场
+
+        参数:
+            compiled: CompiledObstacles对象
+            bounds: 配置空间边界字典
+            resolution: 栅格边长
+        """
+        if resolution <= 0:
+            raise ValueError("distance field resolution must be positive")
+
+        self.resolution = float(resolution)
+        self.x_min = float(bounds['x_min'])
+        self.y_min = float(bounds['y_min'])
+        self.cols = max(1, int(math.ceil((bounds['x_max'] - self.x_min) / self.resolution)))
+        self.rows = max(1, int(math.ceil((bounds['y_max'] - self.y_min) / self.resolution)))
+        self.half_diagonal = self.resolution * math.sqrt(2) / 2
+
+        self.xs = self.x_min + (np.arange(self.cols) + 0.5) * self.resolution
+        self.ys = self.y_min + (np.arange(self.rows) + 0.5) * self.resolution
+        grid_x, grid_y = np.meshgrid(self.xs, self.ys)
+
+        # distance[row, col] 为栅格中心的有向距离
+        self.distance = self._signed_distance(compiled, grid_x.ravel(), grid_y.ravel()).reshape(self.rows, self.cols)
+        self.occupancy = self.distance <= 0
+
+    @staticmethod
+    def _signed_distance(compiled, px, py, items=None):
+        """
+        计算一组点到障碍物并集的有向距离
+        每个障碍物的有向距离取最小值：障碍物外为精确距离，内部为穿透深度的下界
+
+        参数:
+            compiled: CompiledObstacles对象
+            px, py: 点坐标数组 (N,)
+            items: 参与计算的障碍物编号数组，None表示全部有效障碍物
+
+        返回:
+            distance: 有向距离数组 (N,)
+        """
+        distance = np.full(len(px), np.inf)
+        if items is None:
+            items = compiled.live_items()
+        if not len(items):
+            return distance
+        count = len(items)
+        chunk = max(1, CHUNK_ELEMENTS // count)
+
+        kinds = compiled.kinds[items]
+        rows = compiled.rows[items]
+        rects = rows[kinds == KIND_RECTANGLE]
+        rect_x0, rect_y0 = compiled.rect_x0[rects], compiled.rect_y0[rects]
+        rect_x1, rect_y1 = compiled.rect_x1[rects], compiled.rect_y1[rects]
+        circles = rows[kinds == KIND_CIRCLE]
+        circle_cx, circle_cy, circle_r = compiled.circle_cx[circles], compiled.circle_cy[circles], compiled.circle_r[circles]
+        polygons = rows[kinds == KIND_POLYGON]
+        others = items[kinds == KIND_OTHER]
+
+        for start in range(0, len(px), chunk):
+            x = px[start:start + chunk, np.newaxis]
+            y = py[start:start + chunk, np.newaxis]
+            part = distance[start:start + chunk]
+
+            if len(rects):
+                # 矩形的有向距离：外部为到矩形的距离，内部为到最近边的距离取负
+                dx = np.maximum(rect_x0 - x, x - rect_x1)
+                dy = np.maximum(rect_y0 - y, y - rect_y1)
+                outside = np.hypot(np.maximum(dx, 0), np.maximum(dy, 0))
+                inside = np.minimum(np.maximum(dx, dy), 0)
+                np.minimum(part, (outside + inside).min(axis=1), out=part)
+
+            if len(circles):
+                d = np.hypot(x - circle_cx, y - circle_cy) - circle_r
+                np.minimum(part, d.min(axis=1), out=part)
+
+            if len(polygons):
+                # 到各条边的距离按多边形取最小值，射线法判断内外决定符号
+                ax, ay = compiled.poly_ax, compiled.poly_ay
+                ex, ey = compiled.poly_ex, compiled.poly_ey
+                length_sq = ex * ex + ey * ey
+                t = ((x - ax) * ex + (y - ay) * ey) / np.where(length_sq > 0, length_sq, 1.0)
+                t = np.clip(t, 0, 1)
+                edge_distance = np.hypot(x - ax - t * ex, y - ay - t * ey)
+                d = np.minimum.reduceat(edge_distance, compiled._poly_offsets, axis=1)
+                d = np.where(compiled._points_in_polygons(x, y), -d, d)[:, polygons]
+                np.minimum(part, d.min(axis=1), out=part)
+
+            if len(others):
+                # 自定义障碍物只知道包围盒：包围盒外取到包围盒的距离，内部无法判定记为0
+                dx = np.maximum(compiled.bbox_x0[others] - x, x - compiled.bbox_x1[others])
+                dy = np.maximum(compiled.bbox_y0[others] - y, y - compiled.bbox_y1[others])
+                outside = np.hypot(np.maximum(dx, 0), np.maximum(dy, 0))
+                np.minimum(part, outside.min(axis=1), out=part)
+
+        return distance
+
+    def _affected_cells(self, box):
+        """
+        找出距离可能受某个障碍物影响的栅格
+        障碍物包含在包围盒内，它的有向距离不小于包围盒的有向距离，
+        只有包围盒有向距离不大于当前距离的栅格才可能由该障碍物决定距离
+
+        参数:
+            box: 障碍物包围盒 (x_min, y_min, x_max, y_max)
+
+        返回:
+            (rows, cols): 受影响栅格的行号和列号数组
+        """
+        x0, y0 = box[0] - BBOX_MARGIN, box[1] - BBOX_MARGIN
+        x1, y1 = box[2] + BBOX_MARGIN, box[3] + BBOX_MARGIN
+
+        # 栅格距离的最大值限定了受影响的范围：包围盒外距离超过该值的栅格不会受影响
+        reach = float(self.distance.max())
+        col0 = int(np.searchsorted(self.xs, x0 - reach, side='left'))
+        col1 = int(np.searchsorted(self.xs, x1 + reach, side='right'))
+        row0 = int(np.searchsorted(self.ys, y0 - reach, side='left'))
+        row1 = int(np.searchsorted(self.ys, y1 + reach, side='right'))
+        if col0 >= col1 or row0 >= row1:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        x = self.xs[np.newaxis, col0:col1]
+        y = self.ys[row0:row1, np.newaxis]
+        with np.errstate(invalid='ignore'):
+            dx = np.maximum(x0 - x, x - x1)
+            dy = np.maximum(y0 - y, y - y1)
+            box_distance = np.hypot(np.maximum(dx, 0), np.maximum(dy, 0)) + np.minimum(np.maximum(dx, dy), 0)
+        # 无界包围盒的有向距离为nan，所有栅格都受影响
+        affected = ~(box_distance > self.distance[row0:row1, col0:col1])
+        rows, cols = np.nonzero(affected)
+        return rows + row0, cols + col0
+
+    def add_obstacle(self, compiled, box):
+        """
+        加入一个障碍物后更新距离场，只计算该障碍物对受影响栅格的距离
+
+        参数:
+            compiled: 只包含新障碍物的CompiledObstacles对象
+            box: 新障碍物的包围盒
+        """
+        rows, cols = self._affected_cells(box)
+        if not len(rows):
+            return
+        distance = self._signed_distance(compiled, self.xs[cols], self.ys[rows])
+        self.distance[rows, cols] = np.minimum(self.distance[rows, cols], distance)
+        self.occupancy[rows, cols] = self.distance[rows, cols] <= 0
+
+    def remove_obstacle(self, compiled, box):
+        """
+        移除一个障碍物后更新距离场，受影响的栅格只与附近的障碍物重新计算距离
+        距离是1-Lipschitz的，受影响区域外一圈栅格的距离加上到区域内最远点的距离是区域内距离的上界，
+        包围盒离区域超过该上界的障碍物不会决定区域内的距离
+
+        参数:
+            compiled: 移除后的CompiledObstacles对象
+            box: 被移除障碍物的包围盒
+        """
+        rows, cols = self._affected_cells(box)
+        if not len(rows):
+            return
+
+        row0, row1 = int(rows.min()), int(rows.max()) + 1
+        col0, col1 = int(cols.min()), int(cols.max()) + 1
+        ring_row0, ring_row1 = max(row0 - 1, 0), min(row1 + 1, self.rows)
+        ring_col0, ring_col1 = max(col0 - 1, 0), min(col1 + 1, self.cols)
+        ring = self.distance[ring_row0:ring_row1, ring_col0:ring_col1].copy()
+        ring[row0 - ring_row0:row1 - ring_row0, col0 - ring_col0:col1 - ring_col0] = np.inf
+        bound = float(ring.min()) + math.hypot((ring_col1 - ring_col0) * self.resolution,
+                                               (ring_row1 - ring_row0) * self.resolution)
+
+        items = None
+        if math.isfinite(bound):
+            items = compiled.candidates(self.xs[col0] - bound, self.ys[row0] - bound,
+                                        self.xs[col1 - 1] + bound, self.ys[row1 - 1] + bound)
+        self.distance[rows, cols] = self._signed_distance(compiled, self.xs[cols], self.ys[rows], items)
+        self.occupancy[rows, cols] = self.distance[rows, cols] <= 0
+
+    @property
+    def free_area(self):
+        """栅格中心无碰撞的栅格总面积，作为自由空间面积的估计"""
+        return float(np.count_nonzero(~self.occupancy)) * self.resolution * self.resolution
+
+    def _cell(self, x, y):
+        """点所在栅格的行列号，超出栅格范围时返回None"""
+        col = int((x - self.x_min) // self.resolution)
+        row = int((y - self.y_min) // self.resolution)
+        # 恰好位于右、上边界的点归入最后一个栅格
+        if col == self.cols and x - self.x_min <= self.cols * self.resolution:
+            col -= 1
+        if row == self.rows and y - self.y_min <= self.rows * self.resolution:
+            row -= 1
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row, col
+        return None
+
+    def distance_bounds(self, point):
+        """
+        点的有向距离的上下界
+
+        参数:
+            point: 点坐标 [x, y]
+
+        返回:
+            (lower, upper): 有向距离的下界和上界，点在栅格范围外时为 (-inf, inf)
+        """
+        x = float(point[0])
+        y = float(point[1])
+        cell = self._cell(x, y)
+        if cell is None:
+            return -math.inf, math.inf
+
+        # 点到栅格中心的距离不超过半个对角线
+        distance = float(self.distance[cell])
+        margin = self.half_diagonal + DISTANCE_EPS
+        return distance - margin, distance + margin
+
+    def distance_bounds_batch(self, points):
+        """
+        批量计算点的有向距离的上下界
+
+        参数:
+            points: 点坐标数组 (M, 2)
+
+        返回:
+            (lower, upper): 下界和上界数组 (M,)，栅格范围外的点为 (-inf, inf)
+        """
+        points = np.asarray(points, dtype=float)
+        x = points[:, 0] - self.x_min
+        y = points[:, 1] - self.y_min
+        col = np.floor(x / self.resolution).astype(np.int64)
+        row = np.floor(y / self.resolution).astype(np.int64)
+        # 恰好位于右、上边界的点归入最后一个栅格
+        col[(col == self.cols) & (x <= self.cols * self.resolution)] -= 1
+        row[(row == self.rows) & (y <= self.rows * self.resolution)] -= 1
+        valid = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+
+        lower = np.full(len(points), -np.inf)
+        upper = np.full(len(points), np.inf)
+        distance = self.distance[row[valid], col[valid]]
+        margin = self.half_diagonal + DISTANCE_EPS
+        lower[valid] = distance - margin
+        upper[valid] = distance + margin
+        return lower, upper
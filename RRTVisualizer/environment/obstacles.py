@@ -67,6 +67,16 @@ class Obstacle(ABC):
         """
         pass
 
+    def get_bounding_box(self):
+        """
+        获取障碍物的轴对齐包围盒
+        基类无法确定障碍物范围，返回覆盖整个平面的包围盒
+
+        返回:
+            (x_min, y_min, x_max, y_max): 包围盒坐标
+        """
+        return (-np.inf, -np.inf, np.inf, np.inf)
+
 
 class RectangleObstacle(Obstacle):
     """矩形障碍物"""
@@ -104,7 +114,8 @@ class RectangleObstacle(Obstacle):
     def is_line_in_obstacle(self, start, end):
         """
         判断线段是否与矩形相交
-        使用分离轴定理
+        使用Liang-Barsky裁剪：依次用x、y两个方向的平板裁剪线段参数区间[0, 1]，
+        区间非空即相交（矩形按闭区域处理，沿边界滑过的线段也视为相交）
 
         参数:
             start: 线段起点坐标 [x, y]
@@ -113,62 +124,27 @@ class RectangleObstacle(Obstacle):
         返回:
             bool: 是否与矩形相交
         """
-        # 如果起点或终点在矩形内部，则相交
-        if self.is_point_in_obstacle(start) or self.is_point_in_obstacle(end):
-            return True
-
-        # 如果线段在矩形的某一边外完全投影，则不相交
-        if (start[0] < self.x and end[0] < self.x) or \
-                (start[0] > self.x + self.width and end[0] > self.x + self.width) or \
-                (start[1] < self.y and end[1] < self.y) or \
-                (start[1] > self.y + self.height and end[1] > self.y + self.height):
-            return False
-
-        # 检查线段是否与矩形的边相交
-        # 矩形的四条边
-        rectangle_edges = [
-            ([self.x, self.y], [self.x + self.width, self.y]),  # 上边
-            ([self.x, self.y], [self.x, self.y + self.height]),  # 左边
-            ([self.x + self.width, self.y], [self.x + self.width, self.y + self.height]),  # 右边
-            ([self.x, self.y + self.height], [self.x + self.width, self.y + self.height])  # 下边
-        ]
-
-        # 检查线段是否与矩形的任一边相交
-        for edge in rectangle_edges:
-            if self._line_intersection(start, end, edge[0], edge[1]):
-                return True
-
-        return False
-
-    def _line_intersection(self, line1_start, line1_end, line2_start, line2_end):
-        """
-        检查两条线段是否相交
-
-        参数:
-            line1_start, line1_end: 第一条线段的端点
-            line2_start, line2_end: 第二条线段的端点
-
-        返回:
-            bool: 是否相交
-        """
-        # 计算方向向量
-        v1 = np.array(line1_end) - np.array(line1_start)
-        v2 = np.array(line2_end) - np.array(line2_start)
-
-        # 计算叉积
-        cross_product = np.cross(v1, v2)
-
-        # 如果叉积为0，则两线段平行
-        if abs(cross_product) < 1e-10:
-            return False
-
-        # 计算参数t1和t2
-        v = np.array(line2_start) - np.array(line1_start)
-        t1 = np.cross(v, v2) / cross_product
-        t2 = np.cross(v, v1) / cross_product
-
-        # 检查t1和t2是否在[0, 1]范围内
-        return 0 <= t1 <= 1 and 0 <= t2 <= 1
+        t_enter = 0.0
+        t_exit = 1.0
+        for p, q, low, high in ((float(start[0]), float(end[0]), self.x, self.x + self.width),
+                                (float(start[1]), float(end[1]), self.y, self.y + self.height)):
+            d = q - p
+            if d == 0:
+                # 与平板平行：起点不在平板内则不相交
+                if p < low or p > high:
+                    return False
+                continue
+
+            t_low = (low - p) / d
+            t_high = (high - p) / d
+            if t_low > t_high:
+                t_low, t_high = t_high, t_low
+            t_enter = max(t_enter, t_low)
+            t_exit = min(t_exit, t_high)
+            if t_enter > t_exit:
+                return False
+
+        return True
 
     def get_boundary(self):
         """
@@ -179,6 +155,10 @@ class RectangleObstacle(Obstacle):
         """
         return (self.x, self.y, self.width, self.height)
 
+    def get_bounding_box(self):
+        """返回矩形的包围盒 (x_min, y_min, x_max, y_max)"""
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
     def get_type(self):
         """返回障碍物类型"""
         return "rectangle"
@@ -260,6 +240,11 @@ class CircleObstacle(Obstacle):
         """
         return (self.center[0], self.center[1], self.radius)
 
+    def get_bounding_box(self):
+        """返回圆的包围盒 (x_min, y_min, x_max, y_max)"""
+        return (self.center[0] - self.radius, self.center[1] - self.radius,
+                self.center[0] + self.radius, self.center[1] + self.radius)
+
     def get_type(self):
         """返回障碍物类型"""
         return "circle"
@@ -379,6 +364,12 @@ class PolygonObstacle(Obstacle):
         """
         return self.vertices.tolist()
 
+    def get_bounding_box(self):
+        """返回多边形的包围盒 (x_min, y_min, x_max, y_max)"""
+        x_min, y_min = self.vertices.min(axis=0)
+        x_max, y_max = self.vertices.max(axis=0)
+        return (x_min, y_min, x_max, y_max)
+
     def get_type(self):
         """返回障碍物类型"""
         return "polygon"
\ No newline at end of file
@@ -4,14 +4,32 @@
 配置空间包含机器人的运动范围和障碍物信息，用于RRT算法的碰撞检测和采样
 """
 
+import math
+from collections import OrderedDict
+
 import numpy as np
 from .obstacles import Obstacle
+from .collision import CompiledObstacles, BBOX_MARGIN
+from .bvh import AABBTree
+from .distance_field import DistanceField
+
+
+# 障碍物数量达到该值时，改用AABB树筛选候选障碍物
+BVH_THRESHOLD = 128
+
+# 碰撞检测缓存的默认量化精度
+COLLISION_CACHE_TOLERANCE = 1e-6
+
+# 未设置距离场时，估计自由空间面积所用临时栅格在长边方向的栅格数
+FREE_SPACE_GRID_CELLS = 128
 
 
 class ConfigurationSpace:
     """配置空间类"""
 
-    def __init__(self, width, height, obstacles=None):
+    def __init__(self, width, height, obstacles=None, bvh_threshold=BVH_THRESHOLD,
+                 distance_field_resolution=None, collision_cache_size=0,
+                 collision_cache_tolerance=COLLISION_CACHE_TOLERANCE):
         """
         初始化配置空间
 
@@ -19,6 +37,10 @@ class ConfigurationSpace:
             width: 空间宽度
             height: 空间高度
             obstacles: 障碍物列表
+            bvh_threshold: 障碍物数量达到该值时使用AABB树筛选候选障碍物，None表示不使用
+            distance_field_resolution: 占据栅格和有向距离场的栅格边长，None表示不使用
+            collision_cache_size: 线段碰撞检测LRU缓存的容量，0表示不使用缓存
+            collision_cache_tolerance: 缓存键的量化精度，端点坐标相差小于该值的线段共用检测结果
         """
         self.width = width
         self.height = height
@@ -32,33 +54,158 @@ class ConfigurationSpace:
             'y_max': height
         }
 
+        # 障碍物包围盒的AABB树，随障碍物的添加和移除增量更新
+        self.bvh_threshold = bvh_threshold
+        self._bvh = AABBTree([obstacle.get_bounding_box() for obstacle in self.obstacles],
+                             margin=BBOX_MARGIN)
+        # 障碍物列表中每个位置对应的编号（AABB树和编译数组共用），移除障碍物不改变其他障碍物的编号
+        self._ids = list(range(len(self.obstacles)))
+        # 已移除但仍占用编号的障碍物数，超过现有障碍物数时重新编号
+        self._dead_ids = 0
+
+        # 编译后的障碍物数组和距离场，增删障碍物时原地更新，首次查询时计算
+        self.distance_field_resolution = distance_field_resolution
+        self._compiled = None
+        self._distance_field = None
+        self._free_space_volume = None
+
+        # 线段碰撞检测结果的LRU缓存 {量化后的线段: 是否无碰撞}
+        self.collision_cache_size = collision_cache_size
+        self.collision_cache_tolerance = collision_cache_tolerance
+        self._collision_cache = OrderedDict()
+        self.collision_cache_hits = 0
+        self.collision_cache_misses = 0
+
     def add_obstacle(self, obstacle):
         """
         添加障碍物
+        编译数组追加一行，距离场只更新新障碍物附近的栅格
 
         参数:
             obstacle: 障碍物对象
         """
         if isinstance(obstacle, Obstacle):
             self.obstacles.append(obstacle)
+            self._ids.append(self._bvh.insert(obstacle.get_bounding_box()))
+            if self._compiled is not None:
+                self._compiled.add(obstacle)
+            if self._distance_field is not None:
+                self._distance_field.add_obstacle(CompiledObstacles([obstacle]), obstacle.get_bounding_box())
+            self._obstacles_changed()
         else:
             raise TypeError("obstacle must be an instance of Obstacle")
 
     def remove_obstacle(self, index):
         """
-        移除障碍物
+        移除障碍物，其后的障碍物依次前移
+        AABB树摘下一个叶节点，编译数组中该障碍物标记失效，距离场只重新计算受影响的栅格
 
         参数:
             index: 障碍物索引
         """
         if 0 <= index < len(self.obstacles):
-            del self.obstacles[index]
+            obstacle = self.obstacles.pop(index)
+            item = self._ids.pop(index)
+            self._bvh.remove(item)
+            self._dead_ids += 1
+            if self._compiled is not None:
+                self._compiled.remove(item)
+                if self._dead_ids > len(self.obstacles):
+                    # 失效编号过多时丢弃编译数组，下次编译时重新编号
+                    self._compiled = None
+            if self._distance_field is not None:
+                self._distance_field.remove_obstacle(self.get_compiled_obstacles(), obstacle.get_bounding_box())
+            self._obstacles_changed()
         else:
             raise IndexError("obstacle index out of range")
 
     def clear_obstacles(self):
         """清除所有障碍物"""
         self.obstacles = []
+        self._bvh.clear()
+        self._ids = []
+        self._dead_ids = 0
+        self.invalidate()
+
+    def _obstacles_changed(self):
+        """障碍物增删后丢弃依赖整个障碍物集合的结果：自由空间面积和碰撞检测缓存"""
+        self._free_space_volume = None
+        self._collision_cache.clear()
+
+    def invalidate(self):
+        """丢弃编译结果、距离场和碰撞检测缓存，下次查询时重新计算（障碍物对象被直接修改后使用）"""
+        self._compiled = None
+        self._distance_field = None
+        self._free_space_volume = None
+        self._collision_cache.clear()
+
+    def collision_cache_info(self):
+        """
+        获取碰撞检测缓存的统计信息
+
+        返回:
+            info: 包含命中次数、未命中次数、当前大小和容量的字典
+        """
+        return {
+            'hits': self.collision_cache_hits,
+            'misses': self.collision_cache_misses,
+            'size': len(self._collision_cache),
+            'capacity': self.collision_cache_size
+        }
+
+    def clear_collision_cache(self):
+        """清空碰撞检测缓存并重置统计"""
+        self._collision_cache.clear()
+        self.collision_cache_hits = 0
+        self.collision_cache_misses = 0
+
+    def get_compiled_obstacles(self):
+        """
+        获取编译后的障碍物数组，必要时重新编译
+
+        返回:
+            compiled: CompiledObstacles对象
+        """
+        if self._compiled is None:
+            if self._dead_ids:
+                # 编译数组按列表顺序从0编号，AABB树随之重新编号
+                self._bvh.rebuild([obstacle.get_bounding_box() for obstacle in self.obstacles])
+                self._ids = list(range(len(self.obstacles)))
+                self._dead_ids = 0
+            self._compiled = CompiledObstacles(self.obstacles)
+        use_bvh = self.bvh_threshold is not None and len(self.obstacles) >= self.bvh_threshold
+        self._compiled.bvh = self._bvh if use_bvh else None
+        return self._compiled
+
+    def get_distance_field(self):
+        """
+        获取占据栅格和有向距离场，必要时重新计算
+
+        返回:
+            field: DistanceField对象，未设置栅格分辨率时返回None
+        """
+        if self.distance_field_resolution is None:
+            return None
+        if self._distance_field is None:
+            self._distance_field = DistanceField(self.get_compiled_obstacles(), self.bounds,
+                                                 self.distance_field_resolution)
+        return self._distance_field
+
+    def free_space_volume(self):
+        """
+        估计自由空间的面积（二维配置空间的体积）
+        有距离场时直接统计其占据栅格，否则用一个临时的粗栅格统计，结果缓存到障碍物集合变化为止
+
+        返回:
+            volume: 自由空间面积
+        """
+        if self._free_space_volume is None:
+            field = self.get_distance_field()
+            if field is None:
+                resolution = max(self.width, self.height) / FREE_SPACE_GRID_CELLS
+                field = DistanceField(self.get_compiled_obstacles(), self.bounds, resolution)
+            self._free_space_volume = field.free_area
+        return self._free_space_volume
 
     def is_in_bounds(self, point):
         """
@@ -73,6 +220,20 @@ class ConfigurationSpace:
         return (self.bounds['x_min'] <= point[0] <= self.bounds['x_max'] and
                 self.bounds['y_min'] <= point[1] <= self.bounds['y_max'])
 
+    def is_in_bounds_batch(self, points):
+        """
+        批量判断点是否在配置空间边界内
+
+        参数:
+            points: 点坐标数组 (M, 2)
+
+        返回:
+            in_bounds: 长度为M的布尔数组
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        return ((self.bounds['x_min'] <= points[:, 0]) & (points[:, 0] <= self.bounds['x_max']) &
+                (self.bounds['y_min'] <= points[:, 1]) & (points[:, 1] <= self.bounds['y_max']))
+
     def is_collision_free(self, from_point, to_point):
         """
         判断从from_point到to_point的路径是否无碰撞
@@ -88,12 +249,127 @@ class ConfigurationSpace:
         if not self.is_in_bounds(from_point) or not self.is_in_bounds(to_point):
             return False
 
-        # 检查路径是否与任何障碍物相交
-        for obstacle in self.obstacles:
-            if obstacle.is_line_in_obstacle(from_point, to_point):
+        if not self.collision_cache_size:
+            return self._check_segment(from_point, to_point)
+
+        # 端点量化后按固定顺序组成缓存键，正反方向的同一线段共用结果
+        tolerance = self.collision_cache_tolerance
+        a = (round(float(from_point[0]) / tolerance), round(float(from_point[1]) / tolerance))
+        b = (round(float(to_point[0]) / tolerance), round(float(to_point[1]) / tolerance))
+        key = (a, b) if a <= b else (b, a)
+
+        free = self._collision_cache.get(key)
+        if free is not None:
+            self.collision_cache_hits += 1
+            self._collision_cache.move_to_end(key)
+            return free
+
+        self.collision_cache_misses += 1
+        free = self._check_segment(from_point, to_point)
+        self._collision_cache[key] = free
+        if len(self._collision_cache) > self.collision_cache_size:
+            self._collision_cache.popitem(last=False)
+        return free
+
+    def _check_segment(self, from_point, to_point):
+        """判断边界内的线段是否无碰撞：先用距离场做保守判定，不确定时做精确判定"""
+        field = self.get_distance_field()
+        if field is not None:
+            # 线段上任一点到最近端点的距离不超过半个线段长度，
+            # 两端点的净空都大于半个线段长度时整条线段无碰撞
+            from_lower, from_upper = field.distance_bounds(from_point)
+            to_lower, to_upper = field.distance_bounds(to_point)
+            half_length = math.hypot(to_point[0] - from_point[0], to_point[1] - from_point[1]) / 2
+            if from_lower > half_length and to_lower > half_length:
+                return True
+            # 端点位于障碍物内部时线段必然碰撞
+            if from_upper < 0 or to_upper < 0:
                 return False
 
-        return True
+        # 一次向量化运算检查路径是否与任何障碍物相交
+        return not self.get_compiled_obstacles().segment_collides(from_point, to_point)
+
+    def is_collision_free_batch(self, from_points, to_points):
+        """
+        批量判断多条线段是否无碰撞
+
+        参数:
+            from_points: 起点数组 (M, 2)，或所有线段共用的单个起点 [x, y]
+            to_points: 终点数组 (M, 2)，或所有线段共用的单个终点 [x, y]
+
+        返回:
+            free: 长度为M的布尔数组，True表示对应线段无碰撞
+        """
+        from_points, to_points = np.broadcast_arrays(np.atleast_2d(np.asarray(from_points, dtype=float)),
+                                                     np.atleast_2d(np.asarray(to_points, dtype=float)))
+
+        # 检查起点和终点是否在边界内
+        in_bounds = self.is_in_bounds_batch(from_points) & self.is_in_bounds_batch(to_points)
+
+        free = in_bounds
+        uncertain = in_bounds.copy()
+        field = self.get_distance_field()
+        if field is not None:
+            # 与单条线段相同的净空判定，只有不确定的线段才做精确判定
+            from_lower, from_upper = field.distance_bounds_batch(from_points)
+            to_lower, to_upper = field.distance_bounds_batch(to_points)
+            diff = to_points - from_points
+            half_length = np.sqrt(np.einsum('ij,ij->i', diff, diff)) / 2
+            accepted = (from_lower > half_length) & (to_lower > half_length)
+            rejected = (from_upper < 0) | (to_upper < 0)
+            free = in_bounds & ~rejected
+            uncertain &= ~accepted & ~rejected
+
+        if uncertain.any():
+            rows = np.flatnonzero(uncertain)
+            free[rows] = ~self.get_compiled_obstacles().segments_collide(from_points[rows], to_points[rows])
+        return free
+
+    def is_point_in_obstacle(self, point):
+        """
+        判断点是否位于任一障碍物内部
+
+        参数:
+            point: 点坐标 [x, y]
+
+        返回:
+            bool: 是否在障碍物内部
+        """
+        field = self.get_distance_field()
+        if field is not None:
+            lower, upper = field.distance_bounds(point)
+            if lower > 0:
+                return False
+            if upper < 0:
+                return True
+        return self.get_compiled_obstacles().point_collides(point)
+
+    def is_point_in_obstacle_batch(self, points):
+        """
+        批量判断点是否位于任一障碍物内部
+        距离场能确定的点直接判定，只有靠近障碍物边界的点才逐个精确判定
+
+        参数:
+            points: 点坐标数组 (M, 2)
+
+        返回:
+            inside: 长度为M的布尔数组，True表示在障碍物内部
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        inside = np.zeros(len(points), dtype=bool)
+        uncertain = np.ones(len(points), dtype=bool)
+
+        field = self.get_distance_field()
+        if field is not None:
+            lower, upper = field.distance_bounds_batch(points)
+            inside = upper < 0
+            uncertain = ~(lower > 0) & ~inside
+
+        if uncertain.any():
+            compiled = self.get_compiled_obstacles()
+            for row in np.flatnonzero(uncertain):
+                inside[row] = compiled.point_collides(points[row])
+        return inside
 
     def sample(self):
         """
@@ -120,19 +396,40 @@ class ConfigurationSpace:
         """
         for _ in range(max_attempts):
             point = self.sample()
-            collision = False
 
             # 检查点是否在任何障碍物内部
-            for obstacle in self.obstacles:
-                if obstacle.is_point_in_obstacle(point):
-                    collision = True
-                    break
-
-            if not collision:
+            if not self.is_point_in_obstacle(point):
                 return point
 
         return None  # 找不到无碰撞点
 
+    def sample_free_batch(self, count, max_rounds=100):
+        """
+        一次采样多个无碰撞的点，每轮按还缺少的数量批量均匀采样并批量剔除障碍物内的点
+
+        参数:
+            count: 需要的点数
+            max_rounds: 最大采样轮数
+
+        返回:
+            points: 采样点数组 (K, 2)，K <= count，采样轮数用完仍不足时K小于count
+        """
+        low = [self.bounds['x_min'], self.bounds['y_min']]
+        high = [self.bounds['x_max'], self.bounds['y_max']]
+        collected = []
+        total = 0
+        for _ in range(max_rounds):
+            if total >= count:
+                break
+            points = np.random.uniform(low, high, (count - total, 2))
+            points = points[~self.is_point_in_obstacle_batch(points)]
+            collected.append(points)
+            total += len(points)
+
+        if not collected:
+            return np.empty((0, 2))
+        return np.vstack(collected)
+
     def get_obstacles(self):
         """
         获取所有障碍物
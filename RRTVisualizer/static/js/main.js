@@ -158,12 +158,25 @@ if (loadPresetBtn) {
     const stepSizeValue = document.getElementById('stepSizeValue');
     const maxIterationsSlider = document.getElementById('maxIterations');
     const maxIterationsValue = document.getElementById('maxIterationsValue');
+    const timeBudgetInput = document.getElementById('timeBudget');
+    const convergenceWindowInput = document.getElementById('convergenceWindow');
     const goalSampleRateSlider = document.getElementById('goalSampleRate');
     const goalSampleRateValue = document.getElementById('goalSampleRateValue');
     const searchRadiusSlider = document.getElementById('searchRadius');
     const searchRadiusValue = document.getElementById('searchRadiusValue');
     const goalSampleRateContainer = document.getElementById('goalSampleRateContainer');
     const searchRadiusContainer = document.getElementById('searchRadiusContainer');
+    const collisionModeContainer = document.getElementById('collisionModeContainer');
+    const collisionModeSelect = document.getElementById('collisionMode');
+    const neighborhoodSelect = document.getElementById('neighborhood');
+    const parentSelectionContainer = document.getElementById('parentSelectionContainer');
+    const parentSelectionSelect = document.getElementById('parentSelection');
+    const simplifyLevelSelect = document.getElementById('simplifyLevel');
+    const edgeBudgetInput = document.getElementById('edgeBudget');
+    const pruneIntervalContainer = document.getElementById('pruneIntervalContainer');
+    const pruneIntervalInput = document.getElementById('pruneInterval');
+    const batchSizeContainer = document.getElementById('batchSizeContainer');
+    const batchSizeInput = document.getElementById('batchSize');
 
     const startXInput = document.getElementById('startX');
     const startYInput = document.getElementById('startY');
@@ -267,13 +280,27 @@ if (loadPresetBtn) {
         });
     }
 
+    // 支持懒惰碰撞检测的算法，其余算法只支持立即检测，不显示也不发送碰撞检测模式
+    const lazyCollisionAlgorithms = ['RRTStar', 'InformedRRT'];
+
+    // 只有通过RRT*的扩展步骤选择父节点的算法才读取父节点选择方式
+    const parentSelectionAlgorithms = ['RRTStar', 'InformedRRT', 'RRTStarConnect'];
+
+    // 读取剪枝间隔和每批采样数的算法
+    const pruneIntervalAlgorithms = ['InformedRRT', 'RRTStarConnect'];
+    const batchSizeAlgorithms = ['BITStar'];
+
+    // 近邻范围默认不是固定半径的算法，与后端构造参数的默认值一致；切换算法时恢复为该默认值
+    const neighborhoodDefaults = { BITStar: 'radius', FMTStar: 'radius' };
+
     function updateAlgorithmParameters() {
         if (!algorithmSelect || !goalSampleRateContainer || !searchRadiusContainer) return;
 
         const selectedAlgorithm = algorithmSelect.value;
 
         // 控制目标采样率参数的显示
-        if (selectedAlgorithm === 'RRTConnect') {
+        if (selectedAlgorithm === 'RRTConnect' || selectedAlgorithm === 'RRTStarConnect' || selectedAlgorithm === 'BITStar' ||
+            selectedAlgorithm === 'FMTStar') {
             fadeOut(goalSampleRateContainer, () => {
                 goalSampleRateContainer.style.display = 'none';
             });
@@ -283,7 +310,8 @@ if (loadPresetBtn) {
         }
 
         // 控制搜索半径参数的显示
-        if (selectedAlgorithm === 'RRTStar' || selectedAlgorithm === 'InformedRRT') {
+        if (selectedAlgorithm === 'RRTStar' || selectedAlgorithm === 'InformedRRT' || selectedAlgorithm === 'RRTStarConnect' || selectedAlgorithm === 'BITStar' ||
+            selectedAlgorithm === 'FMTStar') {
             searchRadiusContainer.style.display = 'block';
             fadeIn(searchRadiusContainer);
         } else {
@@ -291,6 +319,26 @@ if (loadPresetBtn) {
                 searchRadiusContainer.style.display = 'none';
             });
         }
+
+        if (neighborhoodSelect) {
+            neighborhoodSelect.value = neighborhoodDefaults[selectedAlgorithm] || 'fixed';
+        }
+
+        // 控制碰撞检测模式的显示
+        if (collisionModeContainer) {
+            collisionModeContainer.style.display = lazyCollisionAlgorithms.includes(selectedAlgorithm) ? 'block' : 'none';
+        }
+
+        // 控制只有部分算法读取的参数的显示
+        if (parentSelectionContainer) {
+            parentSelectionContainer.style.display = parentSelectionAlgorithms.includes(selectedAlgorithm) ? 'block' : 'none';
+        }
+        if (pruneIntervalContainer) {
+            pruneIntervalContainer.style.display = pruneIntervalAlgorithms.includes(selectedAlgorithm) ? 'block' : 'none';
+        }
+        if (batchSizeContainer) {
+            batchSizeContainer.style.display = batchSizeAlgorithms.includes(selectedAlgorithm) ? 'block' : 'none';
+        }
     }
 
     // 初始化参数显示
@@ -319,6 +367,18 @@ if (loadPresetBtn) {
                 title = 'Informed RRT*算法';
                 description = 'RRT*的进一步优化，当找到初始解后，使用椭圆采样空间来聚焦搜索，加速收敛到最优解。在复杂环境中特别有效。';
                 break;
+            case 'RRTStarConnect':
+                title = 'RRT*-Connect算法';
+                description = '双向RRT*算法，起点树和终点树交替扩展并各自重布线，两棵树相连后保留代价最小的连接。像RRT-Connect一样快速找到初始解，之后在椭圆内采样持续改进路径。';
+                break;
+            case 'BITStar':
+                title = 'BIT*算法';
+                description = '批量知情树搜索，每批采样一组点，按"起点代价+边代价+启发式"的顺序处理边，只对有希望改进路径的边做碰撞检测。找到解后在椭圆内采样并剪枝，路径质量收敛快。';
+                break;
+            case 'FMTStar':
+                title = 'FMT*算法';
+                description = '快速行进树，先一次性采样全部状态，再从起点按代价从小到大推进树，每个样本只检测代价最小的一条连线。不是随时算法，迭代次数即采样数，在开阔环境中以更少的时间得到与RRT*相当的路径。';
+                break;
             default:
                 title = '未知算法';
                 description = '没有关于此算法的详细信息。';
@@ -544,11 +604,12 @@ if (loadPresetBtn) {
                 startBtn.classList.add('active');
             }
 
-            // 准备请求数据
+            // 准备请求数据，值为undefined的参数不会被序列化，由后端使用算法的默认值
+            const selectedAlgorithm = algorithmSelect ? algorithmSelect.value : 'BaseRRT';
             const requestData = {
                 start: [visualizer.state.start.x, visualizer.state.start.y],
                 goal: [visualizer.state.goal.x, visualizer.state.goal.y],
-                algorithm: algorithmSelect ? algorithmSelect.value : 'BaseRRT',
+                algorithm: selectedAlgorithm,
                 obstacles: visualizer.state.obstacles.map(obstacle => {
                     if (obstacle.type === 'rectangle') {
                         return {
@@ -572,7 +633,21 @@ if (loadPresetBtn) {
                     stepSize: stepSizeSlider ? Number(stepSizeSlider.value) : 20,
                     maxIter: maxIterationsSlider ? Number(maxIterationsSlider.value) : 1000,
                     goalSampleRate: goalSampleRateSlider ? Number(goalSampleRateSlider.value) : 0.05,
-                    searchRadius: searchRadiusSlider ? Number(searchRadiusSlider.value) : 50
+                    searchRadius: searchRadiusSlider ? Number(searchRadiusSlider.value) : 50,
+                    collisionMode: collisionModeSelect && lazyCollisionAlgorithms.includes(selectedAlgorithm)
+                        ? collisionModeSelect.value : undefined,
+                    neighborhood: neighborhoodSelect ? neighborhoodSelect.value : 'fixed',
+                    parentSelection: parentSelectionSelect && parentSelectionAlgorithms.includes(selectedAlgorithm)
+                        ? parentSelectionSelect.value : undefined,
+                    simplifyLevel: simplifyLevelSelect ? simplifyLevelSelect.value : 'neighbors',
+                    edgeBudget: edgeBudgetInput ? Math.max(0, parseInt(edgeBudgetInput.value, 10) || 0) : 500,
+                    pruneInterval: pruneIntervalInput && pruneIntervalAlgorithms.includes(selectedAlgorithm)
+                        ? Math.max(0, parseInt(pruneIntervalInput.value, 10) || 0) : undefined,
+                    batchSize: batchSizeInput && batchSizeAlgorithms.includes(selectedAlgorithm)
+                        ? Math.max(1, parseInt(batchSizeInput.value, 10) || 100) : undefined,
+                    timeBudget: timeBudgetInput && Number(timeBudgetInput.value) > 0 ? Number(timeBudgetInput.value) : null,
+                    convergenceWindow: convergenceWindowInput && parseInt(convergenceWindowInput.value, 10) > 0
+                        ? parseInt(convergenceWindowInput.value, 10) : null
                 }
             };
 
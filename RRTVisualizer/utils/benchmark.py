@@ -0,0 +1,181 @@
+"""
+规划器收敛速度基准测试工具
+
+在预设场景上统计RRT*类规划器的解代价首次降到目标代价以下所需的迭代次数。
+解代价按路径几何长度重新计算，不依赖树中保存的代价，便于比较不同的代价维护方式。
+
+命令行用法: python -m utils.benchmark [场景名 ...]
+"""
+
+import io
+import sys
+import contextlib
+
+import numpy as np
+from environment import PRESETS
+from algorithms import RRTStar
+
+
+def path_cost(tree, idx):
+    """
+    按几何长度计算从根节点到idx的路径代价
+
+    参数:
+        tree: Tree对象
+        idx: 节点索引
+
+    返回:
+        cost: 路径长度，与根节点不连通时为无穷大
+    """
+    chain = tree.path_to_root(idx)
+    if chain[-1] != 0:
+        return float('inf')
+    points = tree.points[chain]
+    segments = np.diff(points, axis=0)
+    return float(np.sqrt(np.einsum('ij,ij->i', segments, segments)).sum())
+
+
+def best_goal_cost(planner):
+    """
+    计算到达目标区域的所有节点中最短的路径代价
+
+    参数:
+        planner: RRT*类规划器
+
+    返回:
+        cost: 最短路径代价，没有节点到达目标时为无穷大
+    """
+    distances = planner.tree.distances_to(planner.goal)
+    best = float('inf')
+    for idx in np.flatnonzero(distances < planner.step_size / 2).tolist():
+        if planner.validate_path(idx):
+            best = min(best, path_cost(planner.tree, idx))
+    return best
+
+
+def iterations_to_target_cost(planner, target_cost, max_iter, seed=None):
+    """
+    逐次迭代扩展规划器，返回解代价首次不超过目标代价时的迭代次数
+
+    参数:
+        planner: 提供 reset / random_sample / expand 的RRT*类规划器
+        target_cost: 目标代价
+        max_iter: 最大迭代次数
+        seed: 随机种子，None表示不重置
+
+    返回:
+        iterations: 达到目标代价时的迭代次数，未达到时返回None
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    planner.reset()
+
+    for i in range(max_iter):
+        new_idx = planner.expand(planner.random_sample(), planner.search_radius)
+        if new_idx is not None and best_goal_cost(planner) <= target_cost:
+            return i + 1
+    return None
+
+
+def reference_cost(planner_factory, preset_name, max_iter, seed=0):
+    """
+    用一次较长的规划得到场景的参考代价
+
+    参数:
+        planner_factory: 以 (start, goal, config_space) 创建规划器的函数
+        preset_name: 预设场景名称
+        max_iter: 迭代次数
+        seed: 随机种子
+
+    返回:
+        cost: 参考代价，未找到路径时为无穷大
+    """
+    preset = PRESETS[preset_name]
+    # 部分场景在创建配置空间时才确定建议的起点和终点
+    space = preset.create_space()
+    planner = planner_factory(preset.suggested_start, preset.suggested_goal, space)
+    planner.max_iter = max_iter
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = planner.plan()
+    return best_goal_cost(planner) if result['success'] else float('inf')
+
+
+def benchmark_presets(planner_factory, target_costs, seeds=range(5), max_iter=3000):
+    """
+    在多个预设场景上统计达到目标代价所需的迭代次数
+
+    参数:
+        planner_factory: 以 (start, goal, config_space) 创建规划器的函数
+        target_costs: {场景名: 目标代价}
+        seeds: 随机种子序列，每个种子运行一次
+        max_iter: 每次运行的最大迭代次数
+
+    返回:
+        results: {场景名: 各次运行的迭代次数列表，未达到目标的为None}
+    """
+    results = {}
+    for name, target in target_costs.items():
+        preset = PRESETS[name]
+        runs = []
+        for seed in seeds:
+            space = preset.create_space()
+            planner = planner_factory(preset.suggested_start, preset.suggested_goal, space)
+            with contextlib.redirect_stdout(io.StringIO()):
+                runs.append(iterations_to_target_cost(planner, target, max_iter, seed))
+        results[name] = runs
+    return results
+
+
+def summarize(runs):
+    """
+    汇总一组运行结果
+
+    参数:
+        runs: 迭代次数列表，未达到目标的为None
+
+    返回:
+        summary: 包含达到目标的次数和迭代次数中位数的字典
+    """
+    reached = [r for r in runs if r is not None]
+    return {
+        'reached': len(reached),
+        'runs': len(runs),
+        'median_iterations': float(np.median(reached)) if reached else None
+    }
+
+
+def default_planner_factory(start, goal, config_space):
+    """与Web应用相同参数的RRT*规划器"""
+    return RRTStar(start, goal, config_space, step_size=20, goal_sample_rate=0.05,
+                   max_iter=3000, search_radius=50)
+
+
+def main(preset_names=None, target_ratio=1.05, seeds=range(5), max_iter=3000):
+    """
+    以较长规划的参考代价乘以target_ratio作为目标代价，打印各场景的迭代次数
+
+    参数:
+        preset_names: 场景名称列表，None表示全部场景
+        target_ratio: 目标代价相对参考代价的倍数
+        seeds: 随机种子序列
+        max_iter: 每次运行的最大迭代次数
+    """
+    names = preset_names or list(PRESETS)
+    targets = {}
+    for name in names:
+        reference = reference_cost(default_planner_factory, name, 2 * max_iter)
+        if np.isfinite(reference):
+            targets[name] = target_ratio * reference
+        else:
+            print(f"{name}: 参考规划未找到路径，跳过")
+
+    results = benchmark_presets(default_planner_factory, targets, seeds, max_iter)
+    for name, runs in results.items():
+        summary = summarize(runs)
+        print(f"{name}: 目标代价 {targets[name]:.2f}, 达到 {summary['reached']}/{summary['runs']}, "
+              f"迭代次数中位数 {summary['median_iterations']}, 明细 {runs}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or None)